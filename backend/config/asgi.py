@@ -13,4 +13,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Importar despues de inicializar Django (usa modelos y settings).
+from notificaciones.stream import STREAM_PATH, stream_notificaciones  # noqa: E402
+
+
+async def application(scope, receive, send):
+    # El stream SSE se atiende fuera de Django para no ocupar un hilo por cliente.
+    if scope['type'] == 'http' and scope['path'] == STREAM_PATH:
+        await stream_notificaciones(scope, receive, send)
+        return
+    await django_application(scope, receive, send)
@@ -0,0 +1,118 @@
+"""
+Procesamiento por lotes para migraciones de datos y comandos.
+
+``procesar_por_lotes`` recorre un queryset en orden de clave primaria (keyset:
+``pk > ultimo`` con ``LIMIT``, sin ``OFFSET``) y entrega cada lote de ids a una
+accion que lo resuelve con una sola sentencia: un ``UPDATE`` o un
+``INSERT ... SELECT`` sobre ``id = ANY(ids)`` (ver ``accion_sql``). Cada lote
+es su propia transaccion, asi que los bloqueos duran un lote y no la tabla
+entera; entre lotes se puede pausar para no saturar la base.
+
+Con ``punto_control`` el ultimo id procesado se guarda en la tabla
+``lotes_punto_control`` en la misma transaccion que el lote. Si el proceso se
+interrumpe, la siguiente ejecucion sigue desde ahi; al terminar se borra. La
+tabla se crea al vuelo porque una migracion vieja no puede depender de un
+modelo posterior. En un ``RunPython`` esto solo sirve con ``atomic = False``
+en la migracion; si no, todo vuelve a ser una sola transaccion.
+
+Los valores por defecto de ``lote`` y ``pausa`` salen de ``LOTES_TAMANO`` y
+``LOTES_PAUSA``, para poder frenar una migracion pesada sin tocar codigo.
+"""
+
+import time
+
+from django.conf import settings
+from django.db import connections, transaction
+
+
+TABLA_PUNTOS = "lotes_punto_control"
+
+
+def _asegurar_tabla(alias):
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {TABLA_PUNTOS} (
+                nombre varchar(200) PRIMARY KEY,
+                ultimo text NOT NULL,
+                procesados bigint NOT NULL,
+                actualizado_en timestamptz NOT NULL DEFAULT now()
+            )
+            """
+        )
+
+
+def _leer_punto(alias, nombre):
+    with connections[alias].cursor() as cursor:
+        cursor.execute(f"SELECT ultimo, procesados FROM {TABLA_PUNTOS} WHERE nombre = %s", [nombre])
+        return cursor.fetchone() or (None, 0)
+
+
+def _guardar_punto(alias, nombre, ultimo, procesados):
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {TABLA_PUNTOS} (nombre, ultimo, procesados) VALUES (%s, %s, %s)
+            ON CONFLICT (nombre) DO UPDATE
+            SET ultimo = EXCLUDED.ultimo, procesados = EXCLUDED.procesados, actualizado_en = now()
+            """,
+            [nombre, str(ultimo), procesados],
+        )
+
+
+def _borrar_punto(alias, nombre):
+    with connections[alias].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLA_PUNTOS} WHERE nombre = %s", [nombre])
+
+
+def accion_sql(sql, params=None, using="default"):
+    """
+    Accion para ``procesar_por_lotes`` que ejecuta ``sql`` con ``%(ids)s`` ligado
+    a la lista de ids del lote (mas los ``params`` con nombre que se pasen) y
+    devuelve las filas afectadas.
+    """
+
+    def ejecutar(ids):
+        with connections[using].cursor() as cursor:
+            cursor.execute(sql, {**(params or {}), "ids": list(ids)})
+            return cursor.rowcount
+
+    return ejecutar
+
+
+def procesar_por_lotes(queryset, accion, lote=None, pausa=None, punto_control=None, progreso=None):
+    """
+    Llama ``accion(ids)`` por cada lote de claves primarias de ``queryset`` y
+    devuelve la suma de lo que retorne (filas afectadas). ``progreso(total,
+    ultimo)``, si se indica, se llama tras confirmar cada lote.
+    """
+    lote = lote or settings.LOTES_TAMANO
+    pausa = settings.LOTES_PAUSA if pausa is None else pausa
+    alias = queryset.db
+
+    ultimo, total = None, 0
+    if punto_control:
+        _asegurar_tabla(alias)
+        ultimo, total = _leer_punto(alias, punto_control)
+
+    pendientes = queryset.order_by("pk").values_list("pk", flat=True)
+    while True:
+        siguiente = pendientes if ultimo is None else pendientes.filter(pk__gt=ultimo)
+        ids = list(siguiente[:lote])
+        if not ids:
+            break
+        with transaction.atomic(using=alias):
+            total += accion(ids) or 0
+            ultimo = ids[-1]
+            if punto_control:
+                _guardar_punto(alias, punto_control, ultimo, total)
+        if progreso:
+            progreso(total, ultimo)
+        if len(ids) < lote:
+            break
+        if pausa:
+            time.sleep(pausa)
+
+    if punto_control:
+        _borrar_punto(alias, punto_control)
+    return total
@@ -0,0 +1,114 @@
+"""
+Metricas en formato de exposicion de Prometheus (``/metrics``).
+
+Con gunicorn cada worker es un proceso, asi que los contadores no pueden vivir
+solo en memoria. Si ``PROMETHEUS_MULTIPROC_DIR`` esta definido, ``prometheus_client``
+escribe cada valor en archivos mapeados en memoria dentro de ese directorio y
+``/metrics`` los suma con ``MultiProcessCollector``, responda el worker que
+responda. ``gunicorn.conf.py`` limpia el directorio al arrancar. Los comandos
+(``barrer_aperturas``, ``procesar_notificaciones``) que corran en la misma
+maquina con el mismo directorio suman sus eventos al total.
+
+Sin esa variable (``runserver``) se usa el registro normal del proceso.
+
+Las profundidades de cola (outbox, reservas pendientes, aperturas sin cerrar)
+no son contadores: se consultan en la base en cada lectura de ``/metrics``.
+
+Por eso el endpoint no es publico: con ``METRICAS_TOKEN`` exige
+``Authorization: Bearer <token>``; sin token solo responde a administradores con
+sesion iniciada, salvo con ``DEBUG`` activo.
+"""
+
+import hmac
+import os
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+
+
+PETICION_SEGUNDOS = Histogram(
+    "uisrooms_peticion_segundos",
+    "Latencia de las peticiones HTTP por vista y accion de DRF.",
+    ["vista", "accion", "metodo", "estado"],
+)
+PETICION_CONSULTAS = Histogram(
+    "uisrooms_peticion_consultas",
+    "Consultas SQL ejecutadas por peticion.",
+    ["vista", "accion"],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, float("inf")),
+)
+CACHE = Counter(
+    "uisrooms_cache",
+    "Lecturas de las caches internas por resultado (acierto o fallo).",
+    ["cache", "resultado"],
+)
+EVENTOS = Counter(
+    "uisrooms_eventos",
+    "Eventos de negocio confirmados (aprobaciones, rechazos automaticos, ausencias...).",
+    ["evento"],
+)
+
+
+def observar_peticion(vista, accion, metodo, estado, segundos, consultas):
+    vista = vista or "sin_vista"
+    PETICION_SEGUNDOS.labels(vista, accion or "", metodo, f"{estado // 100}xx").observe(segundos)
+    PETICION_CONSULTAS.labels(vista, accion or "").observe(consultas)
+
+
+def cache_leida(nombre, acierto):
+    CACHE.labels(nombre, "acierto" if acierto else "fallo").inc()
+
+
+def contar_evento(evento, cantidad=1):
+    """Suma ``cantidad`` al evento cuando la transaccion en curso se confirma."""
+    if cantidad:
+        transaction.on_commit(lambda: EVENTOS.labels(evento).inc(cantidad))
+
+
+class ColasCollector:
+    def collect(self):
+        from notificaciones.models import EventoNotificacion
+        from reservas.models import EstadoReserva, RegistroApertura, Reserva
+
+        colas = GaugeMetricFamily(
+            "uisrooms_cola_pendientes",
+            "Elementos pendientes por cola al momento de la lectura.",
+            labels=["cola"],
+        )
+        colas.add_metric(["outbox_notificaciones"], EventoNotificacion.objects.filter(procesado=False).count())
+        colas.add_metric(["reservas_por_aprobar"], Reserva.objects.filter(estado=EstadoReserva.PENDIENTE).count())
+        colas.add_metric(
+            ["aperturas_sin_cerrar"],
+            RegistroApertura.objects.filter(completado=True, cierre_registrado=False).count(),
+        )
+        yield colas
+
+
+_COLAS = CollectorRegistry(auto_describe=False)
+_COLAS.register(ColasCollector())
+
+
+def _autorizada(request):
+    token = settings.METRICAS_TOKEN
+    if token:
+        return hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
+    if settings.DEBUG:
+        return True
+    from usuarios.permisos import capacidades_de
+
+    return capacidades_de(getattr(request, "user", None)).es_admin
+
+
+def vista_metricas(request):
+    if not _autorizada(request):
+        return HttpResponseForbidden()
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registro = CollectorRegistry()
+        MultiProcessCollector(registro)
+    else:
+        registro = REGISTRY
+    return HttpResponse(generate_latest(registro) + generate_latest(_COLAS), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,177 @@
+"""
+Perfilado de SQL por peticion.
+
+``PerfiladoSQLMiddleware`` envuelve la ejecucion de consultas de cada peticion
+(``connection.execute_wrapper``) y mide el numero de consultas, el tiempo en la
+base, el tiempo de la vista y el de ``render`` (el renderer de DRF convirtiendo
+la respuesta a JSON). Los serializers de DRF (``serializer.data``) corren dentro
+de la vista, asi que su tiempo cuenta como ``vista``. A los administradores se
+les devuelve en la cabecera ``Server-Timing``, que las herramientas de red del
+navegador muestran junto a la peticion.
+
+Las peticiones que superan ``PERFIL_SQL_UMBRAL_PETICION_MS`` y las consultas que
+superan ``PERFIL_SQL_UMBRAL_CONSULTA_MS`` se registran como una linea JSON en el
+logger ``config.perfilado``, con el SQL normalizado (sin literales ni listas de
+parametros) y la vista que lo origino, por ejemplo ``ReservaViewSet.aperturas``.
+Con ``PERFIL_SQL=0`` no hay cabecera ni registro. El mismo middleware alimenta
+los histogramas de ``config/metricas.py`` salvo que ``METRICAS=0`` y abre las
+trazas muestreadas de ``config/trazas.py``.
+"""
+
+import json
+import logging
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from config import metricas, trazas
+from usuarios.permisos import capacidades_de
+
+
+logger = logging.getLogger(__name__)
+
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s")
+_LISTAS = re.compile(r"\(\?(?:\s*,\s*\?)+\)")
+_FILAS = re.compile(r"(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+")
+_ESPACIOS = re.compile(r"\s+")
+
+
+def normalizar_sql(sql):
+    """Quita literales y parametros para agrupar consultas con la misma forma."""
+    sql = _LITERALES.sub("?", sql)
+    sql = _LISTAS.sub("(...)", sql)
+    sql = _FILAS.sub(r"\1, ...", sql)
+    return _ESPACIOS.sub(" ", sql).strip()
+
+
+def partes_vista(view_func, metodo):
+    """
+    ``(Clase, accion)`` para vistas de DRF, con la accion como aparece en la URL
+    (``registrar-apertura``); ``(modulo.funcion, "")`` para el resto.
+    """
+    clase = getattr(view_func, "cls", None)
+    if clase is None:
+        return f"{view_func.__module__}.{getattr(view_func, '__qualname__', view_func.__class__.__name__)}", ""
+    metodo = metodo.lower()
+    accion = (getattr(view_func, "actions", None) or {}).get(metodo, metodo)
+    return clase.__name__, getattr(getattr(clase, accion, None), "url_path", accion)
+
+
+class _Perfil:
+    __slots__ = ("inicio", "vista", "inicio_vista", "db", "consultas", "lentas", "fin_vista", "render")
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.vista = None
+        self.inicio_vista = None
+        self.db = 0.0
+        self.consultas = 0
+        self.lentas = []
+        self.fin_vista = None
+        self.render = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            self.db += duracion
+            self.consultas += 1
+            trazas.registrar_consulta(sql, int(duracion * 1e9))
+            if settings.PERFIL_SQL and duracion * 1000 >= settings.PERFIL_SQL_UMBRAL_CONSULTA_MS:
+                self.lentas.append((sql, duracion))
+
+
+def _ms(segundos):
+    return round(segundos * 1000, 2)
+
+
+class PerfiladoSQLMiddleware:
+    def __init__(self, get_response):
+        if not (settings.PERFIL_SQL or settings.METRICAS or settings.TRAZAS_MUESTREO):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        perfil = _Perfil()
+        request._perfil_sql = perfil
+        with ExitStack() as pila:
+            raiz = pila.enter_context(trazas.traza_peticion(f"{request.method} {request.path}"))
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(perfil))
+            response = self.get_response(request)
+            total = time.perf_counter() - perfil.inicio
+            vista, accion = partes_vista(perfil.vista, request.method) if perfil.vista else (None, "")
+            if raiz is not None:
+                raiz.nombre = f"{request.method} {vista}.{accion}" if vista else raiz.nombre
+                raiz.atributos.update(
+                    {
+                        "http.method": request.method,
+                        "http.target": request.get_full_path(),
+                        "http.status_code": response.status_code,
+                        "db.consultas": perfil.consultas,
+                    }
+                )
+
+        if settings.METRICAS:
+            metricas.observar_peticion(vista, accion, request.method, response.status_code, total, perfil.consultas)
+        if not settings.PERFIL_SQL:
+            return response
+        if perfil.lentas or total * 1000 >= settings.PERFIL_SQL_UMBRAL_PETICION_MS:
+            self._registrar(request, response, perfil, f"{vista}.{accion}" if accion else vista, total)
+        if capacidades_de(getattr(request, "user", None)).es_admin:
+            response["Server-Timing"] = self._server_timing(perfil, total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        perfil = getattr(request, "_perfil_sql", None)
+        if perfil is not None:
+            perfil.vista = view_func
+            perfil.inicio_vista = time.perf_counter()
+        return None
+
+    def process_template_response(self, request, response):
+        perfil = getattr(request, "_perfil_sql", None)
+        if perfil is not None:
+            perfil.fin_vista = time.perf_counter()
+
+            def fin_render(respuesta):
+                perfil.render = time.perf_counter() - perfil.fin_vista
+
+            response.add_post_render_callback(fin_render)
+        return response
+
+    @staticmethod
+    def _server_timing(perfil, total):
+        partes = [f'db;dur={_ms(perfil.db)};desc="{perfil.consultas} consultas"']
+        if perfil.inicio_vista is not None:
+            fin_vista = perfil.fin_vista or (perfil.inicio + total)
+            partes.append(f"vista;dur={_ms(fin_vista - perfil.inicio_vista)}")
+        if perfil.fin_vista is not None:
+            partes.append(f"render;dur={_ms(perfil.render)}")
+        partes.append(f"total;dur={_ms(total)}")
+        return ", ".join(partes)
+
+    @staticmethod
+    def _registrar(request, response, perfil, vista, total):
+        registro = {
+            "evento": "peticion_lenta" if total * 1000 >= settings.PERFIL_SQL_UMBRAL_PETICION_MS else "consulta_lenta",
+            "metodo": request.method,
+            "ruta": request.path,
+            "vista": vista,
+            "estado": response.status_code,
+            "total_ms": _ms(total),
+            "db_ms": _ms(perfil.db),
+            "consultas": perfil.consultas,
+            "render_ms": _ms(perfil.render),
+        }
+        if perfil.lentas:
+            registro["consultas_lentas"] = [
+                {"sql": normalizar_sql(sql), "ms": _ms(duracion)} for sql, duracion in perfil.lentas
+            ]
+        logger.warning(json.dumps(registro, ensure_ascii=False))
@@ -0,0 +1,66 @@
+"""
+Cache versionada de datos de referencia.
+
+Espacios, roles y la disponibilidad base se leen en casi todas las pantallas y
+cambian pocas veces por semestre. Cada ``ConjuntoReferencia`` guarda su lista
+completa en la cache ``referencias`` bajo una clave con version; guardar o
+borrar uno de sus modelos sube la version (al confirmar la transaccion) y la
+siguiente lectura la recarga. Las copias viejas simplemente vencen.
+
+El backend se elige con ``CACHE_REFERENCIAS`` (``memoria``, ``archivo`` o
+``db``). En memoria cada proceso tiene su copia y la invalidacion solo llega al
+proceso que hizo el cambio; ``CACHE_REFERENCIAS_TTL`` acota ese desfase. Con
+varios workers conviene ``archivo`` o ``db``.
+"""
+
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from config import metricas
+
+
+ALIAS = "referencias"
+
+
+class ConjuntoReferencia:
+    def __init__(self, nombre, cargar, modelos=()):
+        self.nombre = nombre
+        self.cargar = cargar
+        self._clave_version = f"ref:{nombre}:version"
+        for modelo in modelos:
+            uid = f"referencias:{nombre}:{modelo._meta.label_lower}"
+            post_save.connect(self._al_cambiar, sender=modelo, weak=False, dispatch_uid=uid)
+            post_delete.connect(self._al_cambiar, sender=modelo, weak=False, dispatch_uid=uid)
+
+    @property
+    def cache(self):
+        return caches[ALIAS]
+
+    def version(self):
+        version = self.cache.get(self._clave_version)
+        if version is None:
+            # Una version inicial unica evita leer datos de antes de un reinicio de la cache.
+            self.cache.add(self._clave_version, time.time_ns(), timeout=None)
+            version = self.cache.get(self._clave_version)
+        return version
+
+    def obtener(self):
+        clave = f"ref:{self.nombre}:{self.version()}"
+        datos = self.cache.get(clave)
+        metricas.cache_leida(f"referencias:{self.nombre}", datos is not None)
+        if datos is None:
+            datos = self.cargar()
+            self.cache.set(clave, datos)
+        return datos
+
+    def invalidar(self):
+        try:
+            self.cache.incr(self._clave_version)
+        except ValueError:
+            self.cache.set(self._clave_version, time.time_ns(), timeout=None)
+
+    def _al_cambiar(self, sender, **kwargs):
+        transaction.on_commit(self.invalidar)
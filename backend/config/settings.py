@@ -50,6 +50,7 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'config.perfilado.PerfiladoSQLMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -94,6 +95,38 @@ DATABASES = {
     }
 }
 
+# Cache. `referencias` guarda espacios, roles y disponibilidad base (ver
+# config/referencias.py), la generacion de permisos de cada rol
+# (usuarios/permisos.py) y la version de token de cada usuario
+# (usuarios/tokens.py): "memoria" (por proceso; los demas workers ven un cambio
+# a lo sumo CACHE_REFERENCIAS_TTL segundos despues), "archivo" o "db" (compartidas
+# entre workers; "db" requiere `python manage.py createcachetable`).
+CACHE_REFERENCIAS = os.getenv('CACHE_REFERENCIAS', 'memoria')
+CACHE_REFERENCIAS_TTL = int(os.getenv('CACHE_REFERENCIAS_TTL', '300'))
+_BACKENDS_REFERENCIAS = {
+    'memoria': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'referencias',
+    },
+    'archivo': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_REFERENCIAS_RUTA', str(BASE_DIR / '.cache' / 'referencias')),
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_referencias',
+    },
+}
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'referencias': {
+        **_BACKENDS_REFERENCIAS[CACHE_REFERENCIAS],
+        'TIMEOUT': CACHE_REFERENCIAS_TTL,
+    },
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',},
@@ -129,7 +162,7 @@ AUTH_USER_MODEL = 'usuarios.Usuario'
 # Opcional: configuración básica de DRF (cuando uses)
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'usuarios.authentication.JWTRolAuthentication',
         'rest_framework.authentication.SessionAuthentication',  # opcional para admin/web
     ),
     'DEFAULT_PERMISSION_CLASSES': (
@@ -145,6 +178,52 @@ LOGGING = {
     'root': {'handlers': ['console'], 'level': 'INFO'},
 }
 
+# Perfilado de SQL por peticion (config/perfilado.py): cabecera Server-Timing para
+# administradores y registro en JSON de peticiones y consultas que pasan el umbral.
+PERFIL_SQL = os.getenv('PERFIL_SQL', '1') == '1'
+PERFIL_SQL_UMBRAL_PETICION_MS = float(os.getenv('PERFIL_SQL_UMBRAL_PETICION_MS', '500'))
+PERFIL_SQL_UMBRAL_CONSULTA_MS = float(os.getenv('PERFIL_SQL_UMBRAL_CONSULTA_MS', '100'))
+
+# Trazas de peticiones (config/trazas.py): fraccion muestreada (0 a 1) y archivo
+# OTLP/JSON donde se agregan, una traza por linea.
+TRAZAS_MUESTREO = float(os.getenv('TRAZAS_MUESTREO', '0'))
+TRAZAS_ARCHIVO = os.getenv('TRAZAS_ARCHIVO', str(BASE_DIR / 'trazas.jsonl'))
+
+# Metricas de Prometheus en /metrics (config/metricas.py). Con varios workers de
+# gunicorn hay que definir PROMETHEUS_MULTIPROC_DIR en el entorno del proceso.
+METRICAS = os.getenv('METRICAS', '1') == '1'
+# Sin token, /metrics solo responde a administradores (o a cualquiera con DEBUG).
+METRICAS_TOKEN = os.getenv('METRICAS_TOKEN', '')
+if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+# Migraciones de datos y backfills por lotes (config/lotes.py): filas por lote y
+# pausa en segundos entre lotes.
+LOTES_TAMANO = int(os.getenv('LOTES_TAMANO', '1000'))
+LOTES_PAUSA = float(os.getenv('LOTES_PAUSA', '0'))
+
+# Retencion de notificaciones (dias por tipo); la aplica `purgar_notificaciones`.
+# Se puede sobrescribir con NOTIFICACIONES_RETENCION="agenda=60,sistema=180".
+NOTIFICACIONES_RETENCION = {
+    'agenda': 90,
+    'reserva': 180,
+    'incidencia': 365,
+    'sistema': 365,
+}
+for _regla in filter(None, os.getenv('NOTIFICACIONES_RETENCION', '').split(',')):
+    _tipo, _, _dias = _regla.partition('=')
+    NOTIFICACIONES_RETENCION[_tipo.strip()] = int(_dias)
+# Dias que se conservan los eventos del outbox ya expandidos (0 los conserva siempre).
+NOTIFICACIONES_EVENTOS_RETENCION = int(os.getenv('NOTIFICACIONES_EVENTOS_RETENCION', '7'))
+
+# Con JWT_SIN_ESTADO=1 las lecturas (GET/HEAD/OPTIONS) se autorizan con los claims
+# de rol del token, sin consultar la base; las escrituras siempre validan el usuario.
+JWT_SIN_ESTADO = os.getenv('JWT_SIN_ESTADO', '0') == '1'
+
+# JTI de refresh tokens revocados que cada proceso recuerda para rechazarlos sin
+# consultar la lista negra. Los vencidos se purgan con `purgar_tokens`.
+TOKENS_REVOCADOS_EN_MEMORIA = int(os.getenv('TOKENS_REVOCADOS_EN_MEMORIA', '10000'))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),        # token corto para acceso
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),           # refresh para renovar access
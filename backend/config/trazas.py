@@ -0,0 +1,168 @@
+"""
+Trazas ligeras de peticiones con spans anidados.
+
+``PerfiladoSQLMiddleware`` abre una traza para una fraccion ``TRAZAS_MUESTREO``
+de las peticiones (0 la desactiva, 1 traza todas). Dentro de ella, las
+funciones decoradas con ``@trazar`` abren spans hijos y cada consulta SQL queda
+como span ``db`` con su sentencia normalizada, colgado del span en que se
+ejecuto. Fuera de una traza el decorador solo consulta una ``ContextVar``.
+
+Al terminar la peticion la traza se agrega como una linea JSON a
+``TRAZAS_ARCHIVO`` con el formato de OTLP/JSON (``resourceSpans``), el mismo que
+escribe el exportador de archivo de OpenTelemetry, asi que se puede cargar en un
+collector (receptor ``otlpjsonfile``) o leer con ``jq``. Cada linea se escribe
+con una sola llamada en modo append, de modo que varios workers pueden
+compartir el archivo.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+_span_actual = contextvars.ContextVar("traza_span_actual", default=None)
+_lock_archivo = threading.Lock()
+
+SPAN_INTERNO = 1
+SPAN_SERVIDOR = 2
+SPAN_CLIENTE = 3
+
+
+class Span:
+    __slots__ = ("traza", "id", "padre", "nombre", "tipo", "inicio", "fin", "atributos")
+
+    def __init__(self, traza, nombre, padre=None, tipo=SPAN_INTERNO, inicio=None, atributos=None):
+        self.traza = traza
+        self.id = os.urandom(8).hex()
+        self.padre = padre
+        self.nombre = nombre
+        self.tipo = tipo
+        self.inicio = inicio or time.time_ns()
+        self.fin = None
+        self.atributos = atributos or {}
+        traza.spans.append(self)
+
+
+class Traza:
+    __slots__ = ("id", "spans")
+
+    def __init__(self):
+        self.id = os.urandom(16).hex()
+        self.spans = []
+
+
+def activa():
+    return _span_actual.get() is not None
+
+
+@contextmanager
+def traza_peticion(nombre):
+    """Span raiz de una peticion muestreada; ``None`` si no toca trazarla."""
+    if not settings.TRAZAS_MUESTREO or random.random() >= settings.TRAZAS_MUESTREO:
+        yield None
+        return
+    raiz = Span(Traza(), nombre, tipo=SPAN_SERVIDOR)
+    token = _span_actual.set(raiz)
+    try:
+        yield raiz
+    finally:
+        _span_actual.reset(token)
+        raiz.fin = time.time_ns()
+        exportar(raiz.traza)
+
+
+@contextmanager
+def span(nombre, **atributos):
+    padre = _span_actual.get()
+    if padre is None:
+        yield None
+        return
+    actual = Span(padre.traza, nombre, padre=padre.id, atributos=atributos)
+    token = _span_actual.set(actual)
+    try:
+        yield actual
+    finally:
+        _span_actual.reset(token)
+        actual.fin = time.time_ns()
+
+
+def trazar(nombre=None):
+    """Decorador: ejecuta la funcion dentro de un span (por defecto ``Clase.metodo``)."""
+
+    def decorador(funcion):
+        nombre_span = nombre or funcion.__qualname__
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if _span_actual.get() is None:
+                return funcion(*args, **kwargs)
+            with span(nombre_span):
+                return funcion(*args, **kwargs)
+
+        return envoltura
+
+    return decorador
+
+
+def registrar_consulta(sql, duracion_ns):
+    padre = _span_actual.get()
+    if padre is None:
+        return
+    fin = time.time_ns()
+    consulta = Span(padre.traza, "db", padre=padre.id, tipo=SPAN_CLIENTE, inicio=fin - duracion_ns)
+    consulta.fin = fin
+    consulta.atributos["db.statement"] = sql
+
+
+def _atributo(clave, valor):
+    if isinstance(valor, bool):
+        return {"key": clave, "value": {"boolValue": valor}}
+    if isinstance(valor, int):
+        return {"key": clave, "value": {"intValue": str(valor)}}
+    if isinstance(valor, float):
+        return {"key": clave, "value": {"doubleValue": valor}}
+    return {"key": clave, "value": {"stringValue": str(valor)}}
+
+
+def _a_otlp(traza):
+    # Import diferido: perfilado importa este modulo.
+    from config.perfilado import normalizar_sql
+
+    spans = []
+    for actual in traza.spans:
+        atributos = dict(actual.atributos)
+        if "db.statement" in atributos:
+            atributos["db.statement"] = normalizar_sql(atributos["db.statement"])
+        registro = {
+            "traceId": traza.id,
+            "spanId": actual.id,
+            "name": actual.nombre,
+            "kind": actual.tipo,
+            "startTimeUnixNano": str(actual.inicio),
+            "endTimeUnixNano": str(actual.fin or actual.inicio),
+            "attributes": [_atributo(clave, valor) for clave, valor in atributos.items()],
+        }
+        if actual.padre:
+            registro["parentSpanId"] = actual.padre
+        spans.append(registro)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [_atributo("service.name", "uisrooms")]},
+                "scopeSpans": [{"scope": {"name": "config.trazas"}, "spans": spans}],
+            }
+        ]
+    }
+
+
+def exportar(traza):
+    linea = json.dumps(_a_otlp(traza), ensure_ascii=False, separators=(",", ":")) + "\n"
+    with _lock_archivo, open(settings.TRAZAS_ARCHIVO, "a", encoding="utf-8") as archivo:
+        archivo.write(linea)
@@ -16,7 +16,7 @@ Including another URLconf
 """
 from django.contrib import admin
 from rest_framework import routers
-from usuarios.views import UsuarioViewSet, RolViewSet
+from usuarios.views import RolViewSet, TokenConRolRefreshView, TokenConRolView, UsuarioViewSet
 from espacios.views import EspacioViewSet, DisponibilidadEspacioViewSet
 from reservas.views import (
     ReservaViewSet,
@@ -30,7 +30,7 @@ from incidencias.views import IncidenciaViewSet, IncidenciaRespuestaViewSet
 from objetos.views import ObjetoPerdidoViewSet
 from notificaciones.views import NotificacionViewSet
 from django.urls import path, include
-from rest_framework_simplejwt.views import (TokenObtainPairView, TokenRefreshView,)
+from config.metricas import vista_metricas
 from django.views.generic import TemplateView
 
 router = routers.DefaultRouter()
@@ -57,14 +57,15 @@ reserva_aperturas_view = ReservaViewSet.as_view({'get': 'aperturas'})
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', vista_metricas, name='metricas'),
     path('api/', include(router.urls)),
     path('api/reservas/aperturas/', reserva_aperturas_view, name='reserva-aperturas'),
     path('api/reportes/aperturas/', ReporteAperturasAPIView.as_view(), name='reporte-aperturas'),
     path('api/reportes/ausencias/', ReporteAusenciasAPIView.as_view(), name='reporte-ausencias'),
     path('api/reportes/incidencias/', ReporteIncidenciasAPIView.as_view(), name='reporte-incidencias'),
     # Rutas de JWT:
-    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/', TokenConRolView.as_view(), name='token_obtain_pair'),
+    path('api/token/refresh/', TokenConRolRefreshView.as_view(), name='token_refresh'),
     # Serve React index.html at root (if build exists)
     path('', TemplateView.as_view(template_name='index.html'), name='home'),
 ]
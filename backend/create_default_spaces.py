@@ -164,38 +164,101 @@ def _build_class_observation(code: str, group: Optional[str]) -> str:
     return f"{CLASS_EVENT_PREFIX} {label}".strip()
 
 
-def _sync_class_schedule(espacio, schedule, DisponibilidadEspacio):
-    if not schedule:
-        return
-
-    DisponibilidadEspacio.objects.filter(
-        espacio=espacio,
-        es_bloqueo=True,
-        observaciones__istartswith=CLASS_EVENT_PREFIX,
-    ).delete()
-
-    entries = []
-    for slot in schedule:
-        hora_inicio = _parse_time_value(slot["hora_inicio"])
-        hora_fin = _parse_time_value(slot["hora_fin"])
-        entries.append(
-            DisponibilidadEspacio(
-                espacio=espacio,
-                dia_semana=int(slot["dia_semana"]),
-                hora_inicio=hora_inicio,
-                hora_fin=hora_fin,
-                recurrente=slot.get("recurrente", True),
-                observaciones=_build_class_observation(
-                    slot.get("codigo", ""),
-                    slot.get("grupo"),
-                ),
-                es_bloqueo=True,
-                fecha_inicio=slot.get("fecha_inicio"),
-                fecha_fin=slot.get("fecha_fin"),
-            )
-        )
-
-    DisponibilidadEspacio.objects.bulk_create(entries)
+# Fields that identify an availability row across runs; the rest is updated in place
+# so block ids (referenced by horario reservations as ``horario_id``) stay stable.
+ROW_KEY_FIELDS = ("es_bloqueo", "dia_semana", "hora_inicio", "fecha_inicio")
+ROW_UPDATE_FIELDS = ("hora_fin", "fecha_fin", "recurrente", "observaciones")
+
+
+def _base_rows(availability) -> list:
+    return [
+        {
+            "es_bloqueo": item.get("es_bloqueo", False),
+            "dia_semana": item["dia_semana"],
+            "hora_inicio": item["hora_inicio"],
+            "hora_fin": item["hora_fin"],
+            "fecha_inicio": None,
+            "fecha_fin": None,
+            "recurrente": item.get("recurrente", True),
+            "observaciones": item.get("observaciones", ""),
+        }
+        for item in availability
+    ]
+
+
+def _class_rows(schedule) -> list:
+    return [
+        {
+            "es_bloqueo": True,
+            "dia_semana": int(slot["dia_semana"]),
+            "hora_inicio": _parse_time_value(slot["hora_inicio"]),
+            "hora_fin": _parse_time_value(slot["hora_fin"]),
+            "fecha_inicio": slot.get("fecha_inicio"),
+            "fecha_fin": slot.get("fecha_fin"),
+            "recurrente": slot.get("recurrente", True),
+            "observaciones": _build_class_observation(slot.get("codigo", ""), slot.get("grupo")),
+        }
+        for slot in schedule
+    ]
+
+
+def _is_class_row(row) -> bool:
+    return bool(row.es_bloqueo) and (row.observaciones or "").lower().startswith(CLASS_EVENT_PREFIX.lower())
+
+
+def _sync_availability(desired_by_space, DisponibilidadEspacio) -> set:
+    """
+    Reconcile base hours and ``[CLASE]`` blocks with one read and bulk writes.
+
+    ``desired_by_space`` maps each space to ``(base_rows, class_rows)``;
+    ``class_rows`` is ``None`` when the definition has no schedule, leaving its
+    blocks untouched. Returns the ids of the spaces whose rows changed.
+    """
+    existing = {}
+    for row in DisponibilidadEspacio.objects.filter(espacio__in=list(desired_by_space)).order_by("creado_en", "id"):
+        existing.setdefault(row.espacio_id, []).append(row)
+
+    to_create, to_update, to_delete = [], [], []
+    changed = set()
+    for space, (base_rows, class_rows) in desired_by_space.items():
+        managed = [
+            row
+            for row in existing.get(space.pk, [])
+            if not row.es_bloqueo or (class_rows is not None and _is_class_row(row))
+        ]
+        current = {}
+        for row in managed:
+            key = tuple(getattr(row, field) for field in ROW_KEY_FIELDS)
+            if key in current:
+                to_delete.append(row.pk)
+                changed.add(space.pk)
+            else:
+                current[key] = row
+
+        for values in base_rows + (class_rows or []):
+            key = tuple(values[field] for field in ROW_KEY_FIELDS)
+            row = current.pop(key, None)
+            if row is None:
+                to_create.append(DisponibilidadEspacio(espacio=space, **values))
+                changed.add(space.pk)
+                continue
+            if any(getattr(row, field) != values[field] for field in ROW_UPDATE_FIELDS):
+                for field in ROW_UPDATE_FIELDS:
+                    setattr(row, field, values[field])
+                to_update.append(row)
+                changed.add(space.pk)
+
+        if current:
+            to_delete.extend(row.pk for row in current.values())
+            changed.add(space.pk)
+
+    if to_delete:
+        DisponibilidadEspacio.objects.filter(pk__in=to_delete).delete()
+    if to_update:
+        DisponibilidadEspacio.objects.bulk_update(to_update, ROW_UPDATE_FIELDS)
+    if to_create:
+        DisponibilidadEspacio.objects.bulk_create(to_create)
+    return changed
 
 
 def _normalize_space_definition(space_data, tipo_model, ubicacion_model):
@@ -206,6 +269,12 @@ def _normalize_space_definition(space_data, tipo_model, ubicacion_model):
 
 
 def ensure_spaces() -> Tuple[list, list]:
+    """
+    Create or update the default spaces and their availability.
+
+    Idempotent: a run where nothing changed only reads (two queries) and
+    reports no created or updated spaces.
+    """
     _ensure_django_setup()
     (
         DisponibilidadEspacio,
@@ -213,11 +282,15 @@ def ensure_spaces() -> Tuple[list, list]:
         TipoEspacio,
         UbicacionEspacio,
     ) = _get_models()
+    from espacios.plantillas import PLANTILLAS  # noqa: WPS433
+    from espacios.referencias import DISPONIBILIDAD  # noqa: WPS433
 
     created: list = []
     updated: list = []
 
     with transaction.atomic():
+        spaces = Espacio.objects.in_bulk([item["codigo"] for item in DEFAULT_SPACES], field_name="codigo")
+        desired_by_space = {}
         for definition in DEFAULT_SPACES:
             space_data = _normalize_space_definition(
                 definition,
@@ -230,37 +303,32 @@ def ensure_spaces() -> Tuple[list, list]:
             if availability is None:
                 availability = list(_default_availability())
 
-            space, was_created = Espacio.objects.update_or_create(
-                codigo=codigo,
-                defaults=space_data,
-            )
-
-            if was_created:
+            space = spaces.get(codigo)
+            if space is None:
+                space = Espacio.objects.create(codigo=codigo, **space_data)
                 created.append(codigo)
             else:
-                updated.append(codigo)
-
-            # Replace existing availability with the baseline set
-            DisponibilidadEspacio.objects.filter(
-                espacio=space,
-                es_bloqueo=False,
-            ).delete()
-            DisponibilidadEspacio.objects.bulk_create(
-                [
-                    DisponibilidadEspacio(
-                        espacio=space,
-                        dia_semana=item["dia_semana"],
-                        hora_inicio=item["hora_inicio"],
-                        hora_fin=item["hora_fin"],
-                        recurrente=item.get("recurrente", True),
-                        es_bloqueo=item.get("es_bloqueo", False),
-                        observaciones=item.get("observaciones", ""),
-                    )
-                    for item in availability
-                ]
+                changed_fields = [field for field, value in space_data.items() if getattr(space, field) != value]
+                if changed_fields:
+                    for field in changed_fields:
+                        setattr(space, field, space_data[field])
+                    space.save(update_fields=changed_fields + ["actualizado_en"])
+                    updated.append(codigo)
+
+            desired_by_space[space] = (
+                _base_rows(availability),
+                _class_rows(class_schedule) if class_schedule else None,
             )
 
-            _sync_class_schedule(space, class_schedule, DisponibilidadEspacio)
+        changed = _sync_availability(desired_by_space, DisponibilidadEspacio)
+        for space in desired_by_space:
+            if space.pk in changed and space.codigo not in created and space.codigo not in updated:
+                updated.append(space.codigo)
+
+        if changed:
+            # Bulk writes skip model signals, so invalidate the reference caches explicitly.
+            transaction.on_commit(DISPONIBILIDAD.invalidar)
+            transaction.on_commit(PLANTILLAS.invalidar)
 
     return created, updated
 
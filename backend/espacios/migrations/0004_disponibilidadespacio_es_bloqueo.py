@@ -4,39 +4,44 @@ from datetime import time
 
 from django.db import migrations, models
 
+from config.lotes import accion_sql, procesar_por_lotes
+
 
 DEFAULT_START = time(6, 0)
 DEFAULT_END = time(20, 0)
+OBSERVACION_BASE = 'Horario base (6:00 - 20:00)'
 
 
 def crear_horario_base(apps, schema_editor):
     Espacio = apps.get_model('espacios', 'Espacio')
     DisponibilidadEspacio = apps.get_model('espacios', 'DisponibilidadEspacio')
-
-    for espacio in Espacio.objects.all():
-        if DisponibilidadEspacio.objects.filter(espacio=espacio, es_bloqueo=False).exists():
-            continue
-
-        registros = [
-            DisponibilidadEspacio(
-                espacio=espacio,
-                dia_semana=dia,
-                hora_inicio=DEFAULT_START,
-                hora_fin=DEFAULT_END,
-                recurrente=True,
-                es_bloqueo=False,
-                observaciones='Horario base (6:00 - 20:00)',
-            )
-            for dia in range(7)
-        ]
-        DisponibilidadEspacio.objects.bulk_create(registros)
+    alias = schema_editor.connection.alias
+    tabla = DisponibilidadEspacio._meta.db_table
+
+    # Siete filas (una por dia) para cada espacio del lote que aun no tenga horario base.
+    procesar_por_lotes(
+        Espacio.objects.using(alias).all(),
+        accion_sql(
+            f"""
+            INSERT INTO {tabla}
+                (id, espacio_id, dia_semana, hora_inicio, hora_fin, recurrente, es_bloqueo, observaciones,
+                 creado_en, actualizado_en)
+            SELECT gen_random_uuid(), e.id, dia, %(inicio)s, %(fin)s, true, false, %(observaciones)s, now(), now()
+            FROM {Espacio._meta.db_table} e CROSS JOIN generate_series(0, 6) AS dia
+            WHERE e.id = ANY(%(ids)s)
+              AND NOT EXISTS (SELECT 1 FROM {tabla} d WHERE d.espacio_id = e.id AND NOT d.es_bloqueo)
+            """,
+            {'inicio': DEFAULT_START, 'fin': DEFAULT_END, 'observaciones': OBSERVACION_BASE},
+            using=alias,
+        ),
+    )
 
 
 def revertir_horario_base(apps, schema_editor):
     DisponibilidadEspacio = apps.get_model('espacios', 'DisponibilidadEspacio')
     DisponibilidadEspacio.objects.filter(
         es_bloqueo=False,
-        observaciones='Horario base (6:00 - 20:00)',
+        observaciones=OBSERVACION_BASE,
     ).delete()
 
 
@@ -1,5 +1,7 @@
 from rest_framework.permissions import BasePermission
 
+from usuarios.permisos import capacidades_de
+
 class IsAdminUser(BasePermission):
     """
     Custom permission to only allow admin users to create, update, or delete.
@@ -7,4 +9,4 @@ class IsAdminUser(BasePermission):
     def has_permission(self, request, view):
         if request.method in ['GET', 'HEAD', 'OPTIONS']:
             return request.user and request.user.is_authenticated
-        return request.user and request.user.is_authenticated and hasattr(request.user, 'rol') and request.user.rol and request.user.rol.nombre.lower() == 'admin'
+        return capacidades_de(request.user).es_admin
@@ -0,0 +1,141 @@
+"""
+Plantillas semanales de disponibilidad.
+
+Cada espacio se compila a dos listas ordenadas de intervalos por dia de la
+semana (minutos desde medianoche, ya fusionados): las horas base abiertas y los
+bloqueos recurrentes, como los ``[CLASE]``. Las filas con fecha
+(``recurrente=False``) quedan aparte como excepciones. Todo vive en la cache de
+referencias, asi validar una ocurrencia son dos busquedas binarias y ninguna
+consulta.
+
+Los espacios sin ninguna fila de disponibilidad no tienen plantilla y no se
+restringen; si solo tienen bloqueos, se consideran abiertos todo el dia.
+"""
+
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.utils import timezone
+
+from config.referencias import ConjuntoReferencia
+
+from .models import DisponibilidadEspacio, Espacio
+
+
+MINUTOS_DIA = 24 * 60
+FUERA_DE_HORARIO = "fuera del horario del espacio"
+HORARIO_BLOQUEADO = "horario bloqueado"
+
+
+def _minutos(hora):
+    return hora.hour * 60 + hora.minute
+
+
+def _intervalo(hora_inicio, hora_fin):
+    if hora_inicio is None:
+        return 0, MINUTOS_DIA
+    inicio = _minutos(hora_inicio)
+    if hora_fin is None:
+        # Mismo criterio que la agenda de clases: sin hora de fin dura una hora.
+        return inicio, min(inicio + 60, MINUTOS_DIA)
+    fin = _minutos(hora_fin)
+    return inicio, fin if fin > inicio else MINUTOS_DIA
+
+
+def _fusionar(intervalos):
+    fusionados = []
+    for inicio, fin in sorted(intervalos):
+        if fusionados and inicio <= fusionados[-1][1]:
+            fusionados[-1] = (fusionados[-1][0], max(fusionados[-1][1], fin))
+        else:
+            fusionados.append((inicio, fin))
+    return tuple(fusionados)
+
+
+# Los intervalos estan fusionados (ordenados y sin solaparse): el ultimo que
+# empieza en o antes de ``desde`` es el unico que puede contenerlo.
+def _contiene(intervalos, desde, hasta):
+    indice = bisect_right(intervalos, (desde, MINUTOS_DIA)) - 1
+    return indice >= 0 and intervalos[indice][1] >= hasta
+
+
+def _cruza(intervalos, desde, hasta):
+    indice = bisect_right(intervalos, (desde, MINUTOS_DIA))
+    if indice and intervalos[indice - 1][1] > desde:
+        return True
+    return indice < len(intervalos) and intervalos[indice][0] < hasta
+
+
+@dataclass(frozen=True)
+class PlantillaEspacio:
+    abierto: tuple  # por dia_semana: ((inicio, fin), ...)
+    bloqueado: tuple
+    excepciones: tuple  # ((fecha_inicio, fecha_fin, es_bloqueo, inicio, fin), ...)
+
+    def _dia(self, fecha):
+        abierto = self.abierto[fecha.weekday()]
+        bloqueado = self.bloqueado[fecha.weekday()]
+        extra_abierto, extra_bloqueado = [], []
+        for fecha_inicio, fecha_fin, es_bloqueo, inicio, fin in self.excepciones:
+            if (fecha_inicio and fecha_inicio > fecha) or (fecha_fin and fecha_fin < fecha):
+                continue
+            (extra_bloqueado if es_bloqueo else extra_abierto).append((inicio, fin))
+        if extra_abierto:
+            abierto = _fusionar(abierto + tuple(extra_abierto))
+        if extra_bloqueado:
+            bloqueado = _fusionar(bloqueado + tuple(extra_bloqueado))
+        return abierto, bloqueado
+
+    def motivo_no_disponible(self, inicio, fin):
+        """``None`` si ``[inicio, fin)`` cabe en el horario; si no, el motivo."""
+        tz = timezone.get_current_timezone()
+        inicio = timezone.localtime(inicio, tz) if timezone.is_aware(inicio) else inicio
+        fin = timezone.localtime(fin, tz) if timezone.is_aware(fin) else fin
+        dia = inicio.date()
+        while dia <= fin.date():
+            desde = _minutos(inicio) if dia == inicio.date() else 0
+            hasta = _minutos(fin) if dia == fin.date() else MINUTOS_DIA
+            if hasta > desde:
+                abierto, bloqueado = self._dia(dia)
+                if not _contiene(abierto, desde, hasta):
+                    return FUERA_DE_HORARIO
+                if _cruza(bloqueado, desde, hasta):
+                    return HORARIO_BLOQUEADO
+            dia += timedelta(days=1)
+        return None
+
+
+def compilar_plantillas():
+    filas = {}
+    for fila in DisponibilidadEspacio.objects.values(
+        'espacio_id', 'dia_semana', 'hora_inicio', 'hora_fin', 'fecha_inicio', 'fecha_fin', 'recurrente', 'es_bloqueo'
+    ):
+        filas.setdefault(str(fila['espacio_id']), []).append(fila)
+
+    plantillas = {}
+    for espacio_id, disponibilidades in filas.items():
+        abierto = [[] for _ in range(7)]
+        bloqueado = [[] for _ in range(7)]
+        excepciones = []
+        for fila in disponibilidades:
+            intervalo = _intervalo(fila['hora_inicio'], fila['hora_fin'])
+            if not fila['recurrente']:
+                excepciones.append((fila['fecha_inicio'], fila['fecha_fin'], fila['es_bloqueo']) + intervalo)
+            elif fila['dia_semana'] is not None and 0 <= fila['dia_semana'] <= 6:
+                (bloqueado if fila['es_bloqueo'] else abierto)[fila['dia_semana']].append(intervalo)
+        if not any(abierto):
+            abierto = [[(0, MINUTOS_DIA)] for _ in range(7)]
+        plantillas[espacio_id] = PlantillaEspacio(
+            abierto=tuple(_fusionar(dia) for dia in abierto),
+            bloqueado=tuple(_fusionar(dia) for dia in bloqueado),
+            excepciones=tuple(excepciones),
+        )
+    return plantillas
+
+
+PLANTILLAS = ConjuntoReferencia('plantillas', compilar_plantillas, modelos=[DisponibilidadEspacio, Espacio])
+
+
+def plantilla_de(espacio_id):
+    return PLANTILLAS.obtener().get(str(espacio_id))
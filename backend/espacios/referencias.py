@@ -0,0 +1,35 @@
+from config.referencias import ConjuntoReferencia
+
+from .models import DisponibilidadEspacio, Espacio
+
+
+def _cargar_espacios():
+    return list(Espacio.objects.order_by('codigo'))
+
+
+def _cargar_disponibilidad():
+    return list(
+        DisponibilidadEspacio.objects.select_related('espacio').order_by('dia_semana', 'fecha_inicio', 'hora_inicio')
+    )
+
+
+ESPACIOS = ConjuntoReferencia('espacios', _cargar_espacios, modelos=[Espacio])
+# Incluye los bloques de clase ([CLASE]); cambiar un espacio tambien la invalida por el select_related.
+DISPONIBILIDAD = ConjuntoReferencia('disponibilidad', _cargar_disponibilidad, modelos=[DisponibilidadEspacio, Espacio])
+
+
+def disponibilidad_del_dia(fecha):
+    """Filas de ``DISPONIBILIDAD`` que aplican a ``fecha`` (recurrentes por dia o por rango)."""
+    dia_semana = fecha.weekday()  # 0=Lunes
+    resultado = []
+    for disponibilidad in DISPONIBILIDAD.obtener():
+        if disponibilidad.recurrente:
+            if disponibilidad.dia_semana == dia_semana:
+                resultado.append(disponibilidad)
+            continue
+        if disponibilidad.fecha_inicio and disponibilidad.fecha_inicio > fecha:
+            continue
+        if disponibilidad.fecha_fin and disponibilidad.fecha_fin < fecha:
+            continue
+        resultado.append(disponibilidad)
+    return resultado
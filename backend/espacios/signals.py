@@ -4,6 +4,8 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 from .models import DisponibilidadEspacio, Espacio
+from .plantillas import PLANTILLAS
+from .referencias import DISPONIBILIDAD
 
 
 DEFAULT_START = time(6, 0)
@@ -33,3 +35,6 @@ def crear_disponibilidad_base(sender, instance, created, **kwargs):
     ]
 
     DisponibilidadEspacio.objects.bulk_create(disponibilidades)
+    # bulk_create no emite post_save.
+    DISPONIBILIDAD.invalidar()
+    PLANTILLAS.invalidar()
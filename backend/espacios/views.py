@@ -1,5 +1,7 @@
 from rest_framework import viewsets
+from rest_framework.response import Response
 from .models import Espacio, DisponibilidadEspacio
+from .referencias import DISPONIBILIDAD, ESPACIOS
 from .serializers import EspacioSerializer, DisponibilidadEspacioSerializer
 from .permissions import IsAdminUser
 
@@ -12,13 +14,21 @@ class EspacioViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         queryset = Espacio.objects.all()
-        if self.action == 'list':
-            include_param = self.request.query_params.get('incluir_inactivos')
-            include_inactive = isinstance(include_param, str) and include_param.strip().lower() in BOOLEAN_TRUE_VALUES
-            if not include_inactive:
-                queryset = queryset.filter(activo=True)
+        if self.action == 'list' and not self._incluir_inactivos():
+            queryset = queryset.filter(activo=True)
         return queryset
 
+    def _incluir_inactivos(self):
+        include_param = self.request.query_params.get('incluir_inactivos')
+        return isinstance(include_param, str) and include_param.strip().lower() in BOOLEAN_TRUE_VALUES
+
+    def list(self, request, *args, **kwargs):
+        # El listado sale de la cache de referencia; detalle y escrituras van a la base.
+        espacios = ESPACIOS.obtener()
+        if not self._incluir_inactivos():
+            espacios = [espacio for espacio in espacios if espacio.activo]
+        return Response(self.get_serializer(espacios, many=True).data)
+
 class DisponibilidadEspacioViewSet(viewsets.ModelViewSet):
     serializer_class = DisponibilidadEspacioSerializer
     permission_classes = [IsAdminUser]
@@ -39,6 +49,23 @@ class DisponibilidadEspacioViewSet(viewsets.ModelViewSet):
 
         return queryset.order_by('dia_semana', 'fecha_inicio', 'hora_inicio')
 
+    def list(self, request, *args, **kwargs):
+        # Mismos filtros que get_queryset, aplicados sobre la cache (ya viene ordenada).
+        disponibilidades = DISPONIBILIDAD.obtener()
+        espacio_id = request.query_params.get('espacio')
+        if espacio_id:
+            disponibilidades = [d for d in disponibilidades if str(d.espacio_id) == espacio_id]
+
+        bloqueo_param = request.query_params.get('bloqueo')
+        if bloqueo_param is not None:
+            value = bloqueo_param.strip().lower()
+            if value in BOOLEAN_TRUE_VALUES:
+                disponibilidades = [d for d in disponibilidades if d.es_bloqueo]
+            elif value in BOOLEAN_FALSE_VALUES:
+                disponibilidades = [d for d in disponibilidades if not d.es_bloqueo]
+
+        return Response(self.get_serializer(disponibilidades, many=True).data)
+
     def perform_create(self, serializer):
         es_bloqueo = serializer.validated_data.get('es_bloqueo')
         if es_bloqueo is None:
@@ -0,0 +1,24 @@
+"""
+Configuracion de gunicorn (se carga sola al arrancar desde ``backend/``).
+
+Solo prepara las metricas multiproceso de ``config/metricas.py``: vacia
+``PROMETHEUS_MULTIPROC_DIR`` al iniciar el maestro para no sumar valores de una
+ejecucion anterior y marca como muerto cada worker que termina.
+"""
+
+import os
+import shutil
+
+
+def on_starting(server):
+    directorio = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directorio:
+        shutil.rmtree(directorio, ignore_errors=True)
+        os.makedirs(directorio, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
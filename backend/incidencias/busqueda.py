@@ -0,0 +1,67 @@
+"""
+Busqueda de texto completo sobre incidencias.
+
+``Incidencia.busqueda`` guarda un ``tsvector`` con el ``tipo`` (peso A), la
+``descripcion`` (peso B) y los mensajes de sus respuestas (peso C). Se recalcula
+con un solo UPDATE por incidencia cuando ella o una de sus respuestas cambia
+(ver ``signals.py``), asi la consulta ``?q=`` solo lee el indice GIN.
+"""
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db.models import F, OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce, Concat
+
+from .models import Incidencia, IncidenciaRespuesta
+
+
+CONFIG = "spanish"
+
+
+def _mensajes_respuestas():
+    mensajes = (
+        IncidenciaRespuesta.objects.filter(incidencia=OuterRef("pk"))
+        .order_by()
+        .values("incidencia")
+        .annotate(texto=StringAgg("mensaje", delimiter=" ", ordering="fecha"))
+        .values("texto")
+    )
+    return Coalesce(Subquery(mensajes), Value(""), output_field=TextField())
+
+
+def vector_busqueda():
+    return (
+        SearchVector(Coalesce("tipo", Value(""), output_field=TextField()), weight="A", config=CONFIG)
+        + SearchVector(Coalesce("descripcion", Value(""), output_field=TextField()), weight="B", config=CONFIG)
+        + SearchVector(_mensajes_respuestas(), weight="C", config=CONFIG)
+    )
+
+
+def actualizar_busqueda(incidencia_ids):
+    if not incidencia_ids:
+        return 0
+    return Incidencia.objects.filter(pk__in=incidencia_ids).update(busqueda=vector_busqueda())
+
+
+def buscar(queryset, texto):
+    """Filtra por ``texto`` (sintaxis tipo buscador web) y anota relevancia y fragmento."""
+    consulta = SearchQuery(texto, search_type="websearch", config=CONFIG)
+    texto_completo = Concat(
+        Coalesce("tipo", Value(""), output_field=TextField()),
+        Value(". "),
+        Coalesce("descripcion", Value(""), output_field=TextField()),
+        Value(" "),
+        _mensajes_respuestas(),
+        output_field=TextField(),
+    )
+    return queryset.filter(busqueda=consulta).annotate(
+        relevancia=SearchRank(F("busqueda"), consulta),
+        resaltado=SearchHeadline(
+            texto_completo,
+            consulta,
+            config=CONFIG,
+            start_sel="<mark>",
+            stop_sel="</mark>",
+            max_fragments=2,
+        ),
+    )
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incidencias', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='incidencia',
+            index=models.Index(fields=['fecha_reportada', 'id'], name='incidencia_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='incidencia',
+            index=models.Index(fields=['espacio', 'fecha_reportada'], name='incidencia_espacio_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='incidencia',
+            index=models.Index(fields=['estado', 'fecha_reportada'], name='incidencia_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='incidencia',
+            index=models.Index(fields=['tipo', 'fecha_reportada'], name='incidencia_tipo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='incidenciarespuesta',
+            index=models.Index(fields=['incidencia', 'fecha'], name='incidencia_resp_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:56
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Mismo vector que incidencias/busqueda.py, calculado de una vez para las filas existentes.
+BACKFILL_SQL = """
+UPDATE incidencias_incidencia i SET busqueda =
+    setweight(to_tsvector('spanish', coalesce(i.tipo, '')), 'A')
+    || setweight(to_tsvector('spanish', coalesce(i.descripcion, '')), 'B')
+    || setweight(to_tsvector('spanish', coalesce((
+        SELECT string_agg(r.mensaje, ' ' ORDER BY r.fecha)
+        FROM incidencias_incidenciarespuesta r
+        WHERE r.incidencia_id = i.id
+    ), '')), 'C');
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incidencias', '0002_indices_listado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='incidencia',
+            name='busqueda',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='incidencia',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['busqueda'], name='incidencia_busqueda_idx'),
+        ),
+        migrations.RunSQL(BACKFILL_SQL, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -1,5 +1,7 @@
 # incidencias/models.py
 import uuid
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils import timezone
 from django.db import models
@@ -20,10 +22,20 @@ class Incidencia(models.Model):
     fecha_cierre = models.DateTimeField(null=True, blank=True)
     cerrado_por = models.ForeignKey('usuarios.Usuario', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
     metadata = models.JSONField(default=dict, blank=True)
+    # tipo + descripcion + mensajes de respuesta; lo mantiene incidencias/busqueda.py.
+    busqueda = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = "incidencia"
         verbose_name_plural = "incidencias"
+        indexes = [
+            # Listado paginado por fecha, solo o filtrado por espacio, estado o tipo.
+            models.Index(fields=['fecha_reportada', 'id'], name='incidencia_fecha_idx'),
+            models.Index(fields=['espacio', 'fecha_reportada'], name='incidencia_espacio_fecha_idx'),
+            models.Index(fields=['estado', 'fecha_reportada'], name='incidencia_estado_fecha_idx'),
+            models.Index(fields=['tipo', 'fecha_reportada'], name='incidencia_tipo_fecha_idx'),
+            GinIndex(fields=['busqueda'], name='incidencia_busqueda_idx'),
+        ]
 
 
 class IncidenciaRespuesta(models.Model):
@@ -36,3 +48,6 @@ class IncidenciaRespuesta(models.Model):
     class Meta:
         verbose_name = "incidencia_respuesta"
         verbose_name_plural = "incidencias_respuestas"
+        indexes = [
+            models.Index(fields=['incidencia', 'fecha'], name='incidencia_resp_fecha_idx'),
+        ]
@@ -0,0 +1,18 @@
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class IncidenciaCursorPagination(CursorPagination):
+    # El id desempata reportes con la misma fecha para que el cursor sea estable.
+    ordering = ('-fecha_reportada', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class IncidenciaBusquedaPagination(LimitOffsetPagination):
+    # Con ?q= el orden es por relevancia (ver busqueda.buscar). El cursor de DRF solo
+    # guarda el primer campo como texto y ts_rank es un float, asi que las busquedas
+    # se paginan por desplazamiento sobre un orden total (relevancia, fecha, id).
+    default_limit = 20
+    limit_query_param = 'page_size'
+    max_limit = 100
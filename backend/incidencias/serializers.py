@@ -9,11 +9,29 @@ class IncidenciaRespuestaSerializer(serializers.ModelSerializer):
 
 class IncidenciaSerializer(serializers.ModelSerializer):
     respuestas = IncidenciaRespuestaSerializer(many=True, read_only=True)
+    respuestas_count = serializers.SerializerMethodField()
+    relevancia = serializers.FloatField(read_only=True)
+    resaltado = serializers.CharField(read_only=True)
 
     class Meta:
         model = Incidencia
         fields = [
             'id', 'reportante', 'espacio', 'tipo', 'descripcion', 'estado',
-            'fecha_reportada', 'fecha_cierre', 'cerrado_por', 'metadata', 'respuestas'
+            'fecha_reportada', 'fecha_cierre', 'cerrado_por', 'metadata', 'respuestas',
+            'respuestas_count', 'relevancia', 'resaltado'
         ]
         read_only_fields = ['id', 'fecha_reportada', 'fecha_cierre']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.context.get('expandir_respuestas', True):
+            self.fields.pop('respuestas')
+        if not self.context.get('busqueda'):
+            self.fields.pop('relevancia')
+            self.fields.pop('resaltado')
+
+    def get_respuestas_count(self, obj):
+        anotado = getattr(obj, 'respuestas_count', None)
+        if anotado is not None:
+            return anotado
+        return len(obj.respuestas.all())
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .busqueda import actualizar_busqueda
+from .models import Incidencia, IncidenciaRespuesta
+
+
+@receiver(post_save, sender=Incidencia)
+def indexar_incidencia(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'tipo', 'descripcion'} & set(update_fields):
+        return
+    actualizar_busqueda([instance.pk])
+
+
+@receiver(post_save, sender=IncidenciaRespuesta)
+@receiver(post_delete, sender=IncidenciaRespuesta)
+def indexar_respuestas(sender, instance, **kwargs):
+    actualizar_busqueda([instance.incidencia_id])
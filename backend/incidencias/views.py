@@ -1,12 +1,102 @@
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework import viewsets
+from rest_framework.exceptions import ParseError
+from .busqueda import buscar
 from .models import Incidencia, IncidenciaRespuesta
+from .pagination import IncidenciaBusquedaPagination, IncidenciaCursorPagination
 from .serializers import IncidenciaSerializer, IncidenciaRespuestaSerializer
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 
+BOOLEAN_FALSE_VALUES = {'false', '0', 'no', 'off'}
+BOOLEAN_TRUE_VALUES = {'true', '1', 'yes', 'on'}
+
 class IncidenciaViewSet(viewsets.ModelViewSet):
     queryset = Incidencia.objects.all().order_by('-fecha_reportada')
     serializer_class = IncidenciaSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = IncidenciaCursorPagination
+
+    def _expandir_respuestas(self):
+        # El detalle trae el hilo completo; el listado solo el conteo salvo ?respuestas=1.
+        if self.action != 'list':
+            return True
+        valor = self.request.query_params.get('respuestas')
+        return isinstance(valor, str) and valor.strip().lower() in BOOLEAN_TRUE_VALUES
+
+    def _limite_dia(self, nombre):
+        valor = self.request.query_params.get(nombre)
+        if not valor:
+            return None
+        try:
+            fecha = parse_date(valor)
+        except ValueError:
+            fecha = None
+        if not fecha:
+            raise ParseError(f"Formato de fecha invalido para '{nombre}'. Usa YYYY-MM-DD.")
+        # Limites como datetime (no __date) para que el filtro use el indice.
+        return timezone.make_aware(datetime.combine(fecha, time.min), timezone.get_current_timezone())
+
+    def _texto_busqueda(self):
+        if self.action != 'list':
+            return ''
+        return (self.request.query_params.get('q') or '').strip()
+
+    def get_queryset(self):
+        queryset = Incidencia.objects.all().order_by('-fecha_reportada', '-id')
+        params = self.request.query_params
+
+        espacio_id = params.get('espacio')
+        if espacio_id:
+            queryset = queryset.filter(espacio_id=espacio_id)
+        estado = params.get('estado')
+        if estado:
+            queryset = queryset.filter(estado__in=[valor.strip() for valor in estado.split(',') if valor.strip()])
+        tipo = params.get('tipo')
+        if tipo:
+            queryset = queryset.filter(tipo=tipo)
+        desde = self._limite_dia('desde')
+        if desde:
+            queryset = queryset.filter(fecha_reportada__gte=desde)
+        hasta = self._limite_dia('hasta')
+        if hasta:
+            queryset = queryset.filter(fecha_reportada__lt=hasta + timedelta(days=1))
+        texto = self._texto_busqueda()
+        if texto:
+            queryset = buscar(queryset, texto).order_by('-relevancia', '-fecha_reportada', '-id')
+
+        if self._expandir_respuestas():
+            return queryset.prefetch_related(
+                Prefetch('respuestas', queryset=IncidenciaRespuesta.objects.order_by('fecha'))
+            )
+        # Subconsulta correlacionada: se evalua solo para las filas de la pagina.
+        conteo = (
+            IncidenciaRespuesta.objects.filter(incidencia=OuterRef('pk'))
+            .order_by()
+            .values('incidencia')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        return queryset.annotate(
+            respuestas_count=Coalesce(Subquery(conteo, output_field=IntegerField()), Value(0))
+        )
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            clase = IncidenciaBusquedaPagination if self._texto_busqueda() else self.pagination_class
+            self._paginator = clase()
+        return self._paginator
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expandir_respuestas'] = self._expandir_respuestas()
+        context['busqueda'] = bool(self._texto_busqueda())
+        return context
 
     def perform_create(self, serializer):
         user = self.request.user
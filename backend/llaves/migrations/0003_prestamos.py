@@ -0,0 +1,70 @@
+# Generated by Django 4.2.30 on 2026-10-19 16:00
+
+from django.conf import settings
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+def abrir_prestamos_existentes(apps, schema_editor):
+    # Las llaves que ya figuran como prestadas arrancan con un prestamo abierto.
+    Llave = apps.get_model('llaves', 'Llave')
+    PrestamoLlave = apps.get_model('llaves', 'PrestamoLlave')
+    for llave in Llave.objects.filter(estado='prestada', prestamo_actual__isnull=True):
+        prestamo = PrestamoLlave.objects.create(
+            llave=llave,
+            usuario_id=llave.responsable_id,
+            fecha_prestamo=llave.actualizado_en,
+            periodo=(llave.actualizado_en, None),
+        )
+        Llave.objects.filter(pk=llave.pk).update(prestamo_actual=prestamo)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('llaves', '0002_delete_llaveregistro'),
+        # La restriccion de exclusion compara un uuid con '=' dentro de GiST: necesita
+        # btree_gist, que crea reservas/0001.
+        ('reservas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrestamoLlave',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('fecha_prestamo', models.DateTimeField(default=django.utils.timezone.now)),
+                ('fecha_devolucion', models.DateTimeField(blank=True, null=True)),
+                ('periodo', django.contrib.postgres.fields.ranges.DateTimeRangeField(blank=True, null=True)),
+                ('observaciones', models.TextField(blank=True, null=True)),
+                ('entregado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('llave', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prestamos', to='llaves.llave')),
+                ('recibido_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='prestamos_llaves', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'prestamo_llave',
+                'verbose_name_plural': 'prestamos_llaves',
+            },
+        ),
+        migrations.AddField(
+            model_name='llave',
+            name='prestamo_actual',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='llaves.prestamollave'),
+        ),
+        migrations.AddIndex(
+            model_name='prestamollave',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['periodo'], name='llaves_prestamo_periodo_gist'),
+        ),
+        migrations.AddConstraint(
+            model_name='prestamollave',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(expressions=[('llave', '='), ('periodo', '&&')], name='llaves_prestamo_sin_solape'),
+        ),
+        migrations.RunPython(abrir_prestamos_existentes, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,10 @@
 # llaves/models.py
 import uuid
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeOperators
+from django.contrib.postgres.indexes import GistIndex
 from django.db import models
+from django.utils import timezone
 
 
 class EstadoLlave(models.TextChoices):
@@ -16,6 +20,10 @@ class Llave(models.Model):
     espacio = models.ForeignKey('espacios.Espacio', on_delete=models.CASCADE, related_name='llaves')
     responsable = models.ForeignKey('usuarios.Usuario', on_delete=models.SET_NULL, null=True, blank=True)
     estado = models.CharField(max_length=20, choices=EstadoLlave.choices, default=EstadoLlave.DISPONIBLE)
+    # Prestamo abierto, copiado aqui para listar llaves y portador sin consultar el historial.
+    prestamo_actual = models.ForeignKey(
+        'llaves.PrestamoLlave', on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
     creado_en = models.DateTimeField(auto_now_add=True)
     actualizado_en = models.DateTimeField(auto_now=True)
     metadata = models.JSONField(default=dict, blank=True)
@@ -27,3 +35,39 @@ class Llave(models.Model):
         verbose_name = "llave"
         verbose_name_plural = "llaves"
 
+
+class PrestamoLlave(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    llave = models.ForeignKey(Llave, on_delete=models.CASCADE, related_name='prestamos')
+    usuario = models.ForeignKey(
+        'usuarios.Usuario', on_delete=models.SET_NULL, null=True, blank=True, related_name='prestamos_llaves'
+    )
+    entregado_por = models.ForeignKey('usuarios.Usuario', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    recibido_por = models.ForeignKey('usuarios.Usuario', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    fecha_prestamo = models.DateTimeField(default=timezone.now)
+    fecha_devolucion = models.DateTimeField(null=True, blank=True)
+    # [prestamo, devolucion); sin limite superior mientras la llave no se devuelve.
+    periodo = DateTimeRangeField(blank=True, null=True)
+    observaciones = models.TextField(blank=True, null=True)
+
+    def save(self, *args, **kwargs):
+        if self.fecha_prestamo:
+            self.periodo = (self.fecha_prestamo, self.fecha_devolucion)
+        super().save(*args, **kwargs)
+
+    class Meta:
+        verbose_name = "prestamo_llave"
+        verbose_name_plural = "prestamos_llaves"
+        indexes = [
+            GistIndex(fields=['periodo'], name='llaves_prestamo_periodo_gist'),
+        ]
+        constraints = [
+            # Tambien deja un indice GiST (llave, periodo) para "quien tenia la llave X en T".
+            ExclusionConstraint(
+                name='llaves_prestamo_sin_solape',
+                expressions=[
+                    ('llave', RangeOperators.EQUAL),
+                    ('periodo', RangeOperators.OVERLAPS),
+                ],
+            ),
+        ]
@@ -1,9 +1,41 @@
 from rest_framework import serializers
-from .models import Llave
+from .models import EstadoLlave, Llave, PrestamoLlave
+
+class PrestamoLlaveSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PrestamoLlave
+        fields = [
+            'id', 'llave', 'usuario', 'entregado_por', 'recibido_por',
+            'fecha_prestamo', 'fecha_devolucion', 'observaciones'
+        ]
+        read_only_fields = fields
 
 class LlaveSerializer(serializers.ModelSerializer):
+    espacio_nombre = serializers.CharField(source='espacio.nombre', read_only=True)
+    responsable_nombre = serializers.SerializerMethodField()
+    prestamo_actual = PrestamoLlaveSerializer(read_only=True)
+
     class Meta:
         model = Llave
-        fields = ['id','codigo','espacio','responsable','estado','creado_en','actualizado_en','metadata']
-        read_only_fields = ['id','creado_en','actualizado_en']
+        fields = [
+            'id','codigo','espacio','espacio_nombre','responsable','responsable_nombre','estado',
+            'prestamo_actual','creado_en','actualizado_en','metadata'
+        ]
+        # responsable y el estado "prestada" solo cambian con prestar/devolver, que llevan el registro.
+        read_only_fields = ['id','responsable','creado_en','actualizado_en']
+
+    def validate_estado(self, value):
+        actual = self.instance.estado if self.instance else None
+        if value == actual:
+            return value
+        if value == EstadoLlave.PRESTADA:
+            raise serializers.ValidationError('Para prestar la llave usa la accion prestar.')
+        if self.instance and self.instance.prestamo_actual_id:
+            raise serializers.ValidationError('La llave tiene un prestamo abierto; registra primero la devolucion.')
+        return value
 
+    def get_responsable_nombre(self, obj):
+        responsable = obj.responsable
+        if not responsable:
+            return None
+        return responsable.get_full_name() or responsable.username
@@ -1,3 +1,134 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from espacios.models import Espacio
+from usuarios.models import Rol, Usuario
+from .models import EstadoLlave, Llave, PrestamoLlave
+
+
+class LlaveAPITests(APITestCase):
+    def setUp(self):
+        conserje = Rol.objects.create(nombre='conserje')
+        self.conserje = Usuario.objects.create_user(username='conserje', password='x', rol=conserje)
+        self.profesor = Usuario.objects.create_user(username='profesor', password='x')
+        self.espacio = Espacio.objects.create(codigo='A101', nombre='Aula 101')
+        self.llave = Llave.objects.create(codigo='L-A101', espacio=self.espacio)
+        self.client.force_authenticate(self.conserje)
+
+    def _url(self, accion=None):
+        base = f'/api/llaves/{self.llave.pk}/'
+        return f'{base}{accion}/' if accion else base
+
+    def _prestar(self):
+        return self.client.post(self._url('prestar'), {'usuario': self.profesor.pk}, format='json')
+
+    def test_prestar_llave_disponible(self):
+        respuesta = self._prestar()
+
+        self.assertEqual(respuesta.status_code, status.HTTP_200_OK)
+        self.llave.refresh_from_db()
+        self.assertEqual(self.llave.estado, EstadoLlave.PRESTADA)
+        self.assertEqual(self.llave.responsable, self.profesor)
+        prestamo = self.llave.prestamo_actual
+        self.assertEqual(prestamo.usuario, self.profesor)
+        self.assertEqual(prestamo.entregado_por, self.conserje)
+        self.assertEqual(prestamo.periodo.lower, prestamo.fecha_prestamo)
+        self.assertIsNone(prestamo.periodo.upper)
+
+    def test_prestar_llave_ya_prestada(self):
+        self._prestar()
+
+        respuesta = self._prestar()
+
+        self.assertEqual(respuesta.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(PrestamoLlave.objects.filter(llave=self.llave).count(), 1)
+
+    def test_prestar_sin_permiso(self):
+        self.client.force_authenticate(self.profesor)
+
+        respuesta = self._prestar()
+
+        self.assertEqual(respuesta.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(PrestamoLlave.objects.exists())
+
+    def test_devolver_cierra_periodo(self):
+        self._prestar()
+        prestamo = Llave.objects.get(pk=self.llave.pk).prestamo_actual
+
+        respuesta = self.client.post(self._url('devolver'), {'observaciones': 'Sin novedad'}, format='json')
+
+        self.assertEqual(respuesta.status_code, status.HTTP_200_OK)
+        prestamo.refresh_from_db()
+        self.assertIsNotNone(prestamo.fecha_devolucion)
+        self.assertEqual(prestamo.periodo.upper, prestamo.fecha_devolucion)
+        self.assertEqual(prestamo.recibido_por, self.conserje)
+        self.llave.refresh_from_db()
+        self.assertEqual(self.llave.estado, EstadoLlave.DISPONIBLE)
+        self.assertIsNone(self.llave.responsable)
+        self.assertIsNone(self.llave.prestamo_actual)
+
+    def test_devolver_sin_prestamo(self):
+        respuesta = self.client.post(self._url('devolver'), format='json')
+
+        self.assertEqual(respuesta.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_prestamos_en_instante(self):
+        inicio = timezone.now() - timedelta(days=2)
+        pasado = PrestamoLlave.objects.create(
+            llave=self.llave,
+            usuario=self.profesor,
+            fecha_prestamo=inicio,
+            fecha_devolucion=inicio + timedelta(hours=2),
+        )
+        otra = Llave.objects.create(codigo='L-A102', espacio=self.espacio)
+        abierto = PrestamoLlave.objects.create(llave=otra, usuario=self.conserje, fecha_prestamo=inicio)
+
+        respuesta = self.client.get('/api/llaves/prestamos/', {'en': (inicio + timedelta(hours=1)).isoformat()})
+        self.assertEqual(respuesta.status_code, status.HTTP_200_OK)
+        self.assertEqual({p['id'] for p in respuesta.data}, {str(pasado.pk), str(abierto.pk)})
+
+        respuesta = self.client.get('/api/llaves/prestamos/', {
+            'en': (inicio + timedelta(hours=1)).isoformat(),
+            'llave': str(self.llave.pk),
+        })
+        self.assertEqual([p['id'] for p in respuesta.data], [str(pasado.pk)])
+
+        respuesta = self.client.get('/api/llaves/prestamos/', {'en': (inicio + timedelta(hours=3)).isoformat()})
+        self.assertEqual([p['id'] for p in respuesta.data], [str(abierto.pk)])
+
+    def test_prestamos_en_invalido(self):
+        for valor in ('ayer', '2025-13-45T10:00'):
+            respuesta = self.client.get('/api/llaves/prestamos/', {'en': valor})
+            self.assertEqual(respuesta.status_code, status.HTTP_400_BAD_REQUEST, valor)
+
+    def test_cambiar_estado_fuera_de_prestamo(self):
+        respuesta = self.client.patch(self._url(), {'estado': EstadoLlave.PERDIDA}, format='json')
+        self.assertEqual(respuesta.status_code, status.HTTP_200_OK)
+        self.llave.refresh_from_db()
+        self.assertEqual(self.llave.estado, EstadoLlave.PERDIDA)
+
+        respuesta = self.client.patch(self._url(), {'estado': EstadoLlave.DISPONIBLE}, format='json')
+        self.assertEqual(respuesta.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._prestar().status_code, status.HTTP_200_OK)
+
+    def test_no_marcar_prestada_sin_prestamo(self):
+        respuesta = self.client.patch(self._url(), {'estado': EstadoLlave.PRESTADA}, format='json')
+
+        self.assertEqual(respuesta.status_code, status.HTTP_400_BAD_REQUEST)
+        self.llave.refresh_from_db()
+        self.assertEqual(self.llave.estado, EstadoLlave.DISPONIBLE)
+
+    def test_no_cambiar_estado_con_prestamo_abierto(self):
+        self._prestar()
+
+        respuesta = self.client.patch(self._url(), {'estado': EstadoLlave.MANTENIMIENTO}, format='json')
+        self.assertEqual(respuesta.status_code, status.HTTP_400_BAD_REQUEST)
+
+        respuesta = self.client.patch(self._url(), {'codigo': 'L-A101-B', 'estado': EstadoLlave.PRESTADA}, format='json')
+        self.assertEqual(respuesta.status_code, status.HTTP_200_OK)
+        self.llave.refresh_from_db()
+        self.assertEqual(self.llave.estado, EstadoLlave.PRESTADA)
+        self.assertEqual(self.llave.codigo, 'L-A101-B')
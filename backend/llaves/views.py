@@ -1,10 +1,118 @@
-from rest_framework import viewsets
-from .models import Llave
-from .serializers import LlaveSerializer
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from usuarios.models import Usuario
+from usuarios.permisos import GESTIONAR_LLAVES, capacidades_de
+from .models import EstadoLlave, Llave, PrestamoLlave
+from .serializers import LlaveSerializer, PrestamoLlaveSerializer
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 
 class LlaveViewSet(viewsets.ModelViewSet):
     queryset = Llave.objects.all()
     serializer_class = LlaveSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    def get_queryset(self):
+        # Portador y prestamo abierto estan desnormalizados: el listado es una sola consulta.
+        return Llave.objects.select_related('espacio', 'responsable', 'prestamo_actual').order_by('codigo')
+
+    def _puede_gestionar(self, user):
+        return capacidades_de(user).puede(GESTIONAR_LLAVES)
+
+    def _llave_bloqueada(self, pk):
+        # FOR UPDATE serializa prestamos y devoluciones concurrentes de la misma llave.
+        return Llave.objects.select_for_update().filter(pk=pk).first()
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def prestar(self, request, pk=None):
+        if not self._puede_gestionar(request.user):
+            return Response({'detail': 'No tienes permisos para prestar llaves.'}, status=status.HTTP_403_FORBIDDEN)
+
+        usuario_id = request.data.get('usuario')
+        if not usuario_id:
+            return Response({'detail': 'Indica el usuario que recibe la llave.'}, status=status.HTTP_400_BAD_REQUEST)
+        usuario = Usuario.objects.filter(pk=usuario_id).first() if str(usuario_id).isdigit() else None
+        if not usuario:
+            return Response({'detail': 'Usuario no encontrado.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            llave = self._llave_bloqueada(pk)
+            if not llave:
+                return Response({'detail': 'Llave no encontrada.'}, status=status.HTTP_404_NOT_FOUND)
+            if llave.estado != EstadoLlave.DISPONIBLE or llave.prestamo_actual_id:
+                return Response(
+                    {'detail': f'La llave no esta disponible (estado: {llave.estado}).'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            prestamo = PrestamoLlave.objects.create(
+                llave=llave,
+                usuario=usuario,
+                entregado_por=request.user,
+                fecha_prestamo=timezone.now(),
+                observaciones=request.data.get('observaciones') or None,
+            )
+            llave.estado = EstadoLlave.PRESTADA
+            llave.responsable = usuario
+            llave.prestamo_actual = prestamo
+            llave.save(update_fields=['estado', 'responsable', 'prestamo_actual', 'actualizado_en'])
+
+        return Response(self.get_serializer(self.get_queryset().get(pk=llave.pk)).data)
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def devolver(self, request, pk=None):
+        if not self._puede_gestionar(request.user):
+            return Response({'detail': 'No tienes permisos para recibir llaves.'}, status=status.HTTP_403_FORBIDDEN)
+
+        with transaction.atomic():
+            llave = self._llave_bloqueada(pk)
+            if not llave:
+                return Response({'detail': 'Llave no encontrada.'}, status=status.HTTP_404_NOT_FOUND)
+            if not llave.prestamo_actual_id:
+                return Response({'detail': 'La llave no tiene un prestamo abierto.'}, status=status.HTTP_400_BAD_REQUEST)
+
+            prestamo = llave.prestamo_actual
+            prestamo.fecha_devolucion = timezone.now()
+            prestamo.recibido_por = request.user
+            observaciones = request.data.get('observaciones')
+            if observaciones:
+                prestamo.observaciones = f"{prestamo.observaciones}\n{observaciones}" if prestamo.observaciones else observaciones
+            prestamo.save(update_fields=['fecha_devolucion', 'recibido_por', 'observaciones', 'periodo'])
+
+            llave.estado = EstadoLlave.DISPONIBLE
+            llave.responsable = None
+            llave.prestamo_actual = None
+            llave.save(update_fields=['estado', 'responsable', 'prestamo_actual', 'actualizado_en'])
+
+        return Response(self.get_serializer(self.get_queryset().get(pk=llave.pk)).data)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def prestamos(self, request):
+        """
+        Prestamos vigentes en el instante ``en`` (por defecto ahora).
+
+        Con ``llave`` responde "quien tenia la llave X en T"; sin ella, las llaves
+        prestadas en ese momento. Ambas consultas usan los indices GiST de ``periodo``.
+        """
+        instante = timezone.now()
+        en_param = request.query_params.get('en')
+        if en_param:
+            try:
+                instante = parse_datetime(en_param)
+            except ValueError:
+                instante = None
+            if not instante:
+                return Response(
+                    {'detail': 'Formato de "en" invalido. Usa ISO 8601.'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if timezone.is_naive(instante):
+                instante = timezone.make_aware(instante, timezone.get_current_timezone())
+
+        prestamos = PrestamoLlave.objects.filter(periodo__contains=instante).order_by('fecha_prestamo')
+        llave_id = request.query_params.get('llave')
+        if llave_id:
+            prestamos = prestamos.filter(llave_id=llave_id)
+        return Response(PrestamoLlaveSerializer(prestamos, many=True).data)
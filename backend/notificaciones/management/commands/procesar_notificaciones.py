@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from notificaciones.outbox import procesar_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        "Expande los eventos pendientes del outbox en notificaciones para sus "
+        "destinatarios. Pensado para cron o para ejecutarse en bucle con --intervalo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=500,
+            help="Eventos procesados por transaccion (por defecto 500).",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=int,
+            default=0,
+            help="Segundos entre ejecuciones. 0 procesa una sola vez.",
+        )
+
+    def handle(self, *args, **options):
+        lote = options["lote"]
+        intervalo = options["intervalo"]
+        if lote < 1:
+            raise CommandError("--lote debe ser mayor que cero.")
+        if intervalo < 0:
+            raise CommandError("--intervalo no puede ser negativo.")
+
+        while True:
+            eventos, notificaciones = procesar_pendientes(lote=lote)
+            if eventos or not intervalo:
+                self.stdout.write(
+                    f"Eventos procesados: {eventos}. Notificaciones creadas: {notificaciones}."
+                )
+            if not intervalo:
+                break
+            try:
+                time.sleep(intervalo)
+            except KeyboardInterrupt:
+                break
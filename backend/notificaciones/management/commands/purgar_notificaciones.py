@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from notificaciones.retencion import politica, purgar, purgar_eventos, retencion_eventos
+
+
+class Command(BaseCommand):
+    help = (
+        "Elimina las notificaciones que superan la retencion configurada por tipo "
+        "(NOTIFICACIONES_RETENCION) y los eventos del outbox ya procesados "
+        "(NOTIFICACIONES_EVENTOS_RETENCION). Borra en lotes cortos y puede "
+        "archivar las notificaciones antes en un NDJSON comprimido."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=500,
+            help="Filas eliminadas por transaccion (por defecto 500).",
+        )
+        parser.add_argument(
+            "--archivo",
+            help="Ruta .ndjson.gz donde se agregan las filas antes de borrarlas.",
+        )
+        parser.add_argument(
+            "--pausa",
+            type=float,
+            default=0,
+            help="Segundos de espera entre lotes para repartir la carga.",
+        )
+        parser.add_argument(
+            "--simular",
+            action="store_true",
+            help="Solo cuenta las filas vencidas, sin borrar ni archivar.",
+        )
+
+    def handle(self, *args, **options):
+        lote = options["lote"]
+        pausa = options["pausa"]
+        if lote < 1:
+            raise CommandError("--lote debe ser mayor que cero.")
+        if pausa < 0:
+            raise CommandError("--pausa no puede ser negativa.")
+        if not politica() and retencion_eventos() is None:
+            self.stdout.write("No hay reglas de retencion configuradas.")
+            return
+
+        resultado = purgar(
+            lote=lote,
+            archivo=options["archivo"],
+            simular=options["simular"],
+            pausa=pausa,
+        )
+        verbo = "Vencidas" if options["simular"] else "Eliminadas"
+        for tipo, total in resultado.items():
+            self.stdout.write(f"{verbo} ({tipo}): {total}.")
+
+        if retencion_eventos() is not None:
+            eventos = purgar_eventos(lote=lote, simular=options["simular"], pausa=pausa)
+            verbo = "vencidos" if options["simular"] else "eliminados"
+            self.stdout.write(f"Eventos procesados {verbo}: {eventos}.")
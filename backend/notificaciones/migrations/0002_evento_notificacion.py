@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notificaciones', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoNotificacion',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('tipo', models.CharField(choices=[('agenda', 'Agenda'), ('reserva', 'Reserva'), ('sistema', 'Sistema'), ('incidencia', 'Incidencia')], default='sistema', max_length=30)),
+                ('audiencia', models.CharField(choices=[('usuario', 'Usuario'), ('admins', 'Administradores')], default='usuario', max_length=20)),
+                ('mensaje', models.TextField()),
+                ('metadata', models.JSONField(blank=True, default=dict)),
+                ('procesado', models.BooleanField(default=False)),
+                ('procesado_en', models.DateTimeField(blank=True, null=True)),
+                ('creado_en', models.DateTimeField(auto_now_add=True)),
+                ('destinatario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('remitente', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'evento_notificacion',
+                'verbose_name_plural': 'eventos_notificacion',
+                'indexes': [models.Index(condition=models.Q(('procesado', False)), fields=['creado_en'], name='notif_evento_pendiente_idx')],
+            },
+        ),
+    ]
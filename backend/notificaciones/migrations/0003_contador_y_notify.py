@@ -0,0 +1,112 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:51
+
+from django.db import migrations, models
+
+
+# Los triggers son de sentencia (tablas de transicion): un bulk_create o un
+# UPDATE masivo ajusta el contador una vez por destinatario, no por fila.
+TRIGGERS_SQL = """
+CREATE OR REPLACE FUNCTION notificaciones_ajustar_contador(p_usuario bigint, p_delta integer)
+RETURNS void AS $$
+BEGIN
+    INSERT INTO notificaciones_contadornotificaciones AS c (usuario_id, no_leidas)
+    VALUES (p_usuario, GREATEST(p_delta, 0))
+    ON CONFLICT (usuario_id) DO UPDATE SET no_leidas = GREATEST(c.no_leidas + p_delta, 0);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notificaciones_tras_insertar() RETURNS trigger AS $$
+BEGIN
+    PERFORM notificaciones_ajustar_contador(destinatario_id, total)
+    FROM (
+        SELECT destinatario_id, count(*)::integer AS total
+        FROM nuevas WHERE NOT leido GROUP BY destinatario_id
+    ) t;
+    PERFORM pg_notify(
+        'notificaciones',
+        json_build_object('id', id, 'destinatario_id', destinatario_id)::text
+    )
+    FROM nuevas;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notificaciones_tras_actualizar() RETURNS trigger AS $$
+BEGIN
+    PERFORM notificaciones_ajustar_contador(destinatario_id, delta)
+    FROM (
+        SELECT destinatario_id, sum(delta)::integer AS delta
+        FROM (
+            SELECT destinatario_id, 1 AS delta FROM nuevas WHERE NOT leido
+            UNION ALL
+            SELECT destinatario_id, -1 AS delta FROM anteriores WHERE NOT leido
+        ) cambios
+        GROUP BY destinatario_id
+        HAVING sum(delta) <> 0
+    ) t;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notificaciones_tras_eliminar() RETURNS trigger AS $$
+BEGIN
+    PERFORM notificaciones_ajustar_contador(destinatario_id, -total)
+    FROM (
+        SELECT destinatario_id, count(*)::integer AS total
+        FROM anteriores WHERE NOT leido GROUP BY destinatario_id
+    ) t;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER notificaciones_tras_insertar
+    AFTER INSERT ON notificaciones_notificacion
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION notificaciones_tras_insertar();
+
+CREATE TRIGGER notificaciones_tras_actualizar
+    AFTER UPDATE ON notificaciones_notificacion
+    REFERENCING OLD TABLE AS anteriores NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION notificaciones_tras_actualizar();
+
+CREATE TRIGGER notificaciones_tras_eliminar
+    AFTER DELETE ON notificaciones_notificacion
+    REFERENCING OLD TABLE AS anteriores
+    FOR EACH STATEMENT EXECUTE FUNCTION notificaciones_tras_eliminar();
+
+INSERT INTO notificaciones_contadornotificaciones (usuario_id, no_leidas)
+SELECT destinatario_id, count(*) FROM notificaciones_notificacion
+WHERE NOT leido GROUP BY destinatario_id;
+"""
+
+DROP_TRIGGERS_SQL = """
+DROP TRIGGER IF EXISTS notificaciones_tras_insertar ON notificaciones_notificacion;
+DROP TRIGGER IF EXISTS notificaciones_tras_actualizar ON notificaciones_notificacion;
+DROP TRIGGER IF EXISTS notificaciones_tras_eliminar ON notificaciones_notificacion;
+DROP FUNCTION IF EXISTS notificaciones_tras_insertar();
+DROP FUNCTION IF EXISTS notificaciones_tras_actualizar();
+DROP FUNCTION IF EXISTS notificaciones_tras_eliminar();
+DROP FUNCTION IF EXISTS notificaciones_ajustar_contador(bigint, integer);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificaciones', '0002_evento_notificacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorNotificaciones',
+            fields=[
+                ('usuario_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('no_leidas', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'contador_notificaciones',
+                'verbose_name_plural': 'contadores_notificaciones',
+            },
+        ),
+        migrations.RunSQL(TRIGGERS_SQL, reverse_sql=DROP_TRIGGERS_SQL),
+    ]
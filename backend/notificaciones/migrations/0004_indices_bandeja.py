@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificaciones', '0003_contador_y_notify'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notificacion',
+            name='notificacio_destina_46d4a0_idx',
+        ),
+        migrations.AddIndex(
+            model_name='notificacion',
+            index=models.Index(fields=['destinatario', 'creado_en'], name='notif_bandeja_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacion',
+            index=models.Index(fields=['destinatario', 'leido', 'creado_en'], name='notif_bandeja_leido_idx'),
+        ),
+    ]
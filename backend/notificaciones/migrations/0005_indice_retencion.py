@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificaciones', '0004_indices_bandeja'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notificacion',
+            index=models.Index(fields=['tipo', 'creado_en', 'id'], name='notif_retencion_idx'),
+        ),
+    ]
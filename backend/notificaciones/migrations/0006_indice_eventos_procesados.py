@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 17:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificaciones', '0005_indice_retencion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='eventonotificacion',
+            index=models.Index(condition=models.Q(('procesado', True)), fields=['procesado_en', 'id'], name='notif_evento_procesado_idx'),
+        ),
+    ]
@@ -2,6 +2,7 @@
 import uuid
 from django.db import models
 from django.db import models
+from django.db.models import Q
 
 class TipoNotificacion(models.TextChoices):
     AGENDA = 'agenda', 'Agenda'
@@ -25,5 +26,57 @@ class Notificacion(models.Model):
         verbose_name = "notificacion"
         verbose_name_plural = "notificaciones"
         indexes = [
-            models.Index(fields=['destinatario']),
+            # Bandeja completa y bandeja de no leidas, ambas ordenadas por fecha.
+            models.Index(fields=['destinatario', 'creado_en'], name='notif_bandeja_idx'),
+            models.Index(fields=['destinatario', 'leido', 'creado_en'], name='notif_bandeja_leido_idx'),
+            # Barrido de retencion por tipo en orden de antiguedad.
+            models.Index(fields=['tipo', 'creado_en', 'id'], name='notif_retencion_idx'),
         ]
+
+
+class AudienciaNotificacion(models.TextChoices):
+    USUARIO = 'usuario', 'Usuario'
+    ADMINS = 'admins', 'Administradores'
+
+
+class EventoNotificacion(models.Model):
+    """Evento encolado por una peticion; el worker lo expande en `Notificacion`."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    tipo = models.CharField(max_length=30, choices=TipoNotificacion.choices, default=TipoNotificacion.SISTEMA)
+    audiencia = models.CharField(max_length=20, choices=AudienciaNotificacion.choices, default=AudienciaNotificacion.USUARIO)
+    destinatario = models.ForeignKey('usuarios.Usuario', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    remitente = models.ForeignKey('usuarios.Usuario', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    mensaje = models.TextField()
+    metadata = models.JSONField(default=dict, blank=True)
+    procesado = models.BooleanField(default=False)
+    procesado_en = models.DateTimeField(null=True, blank=True)
+    creado_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "evento_notificacion"
+        verbose_name_plural = "eventos_notificacion"
+        indexes = [
+            models.Index(fields=['creado_en'], name='notif_evento_pendiente_idx', condition=Q(procesado=False)),
+            # Purga de los ya procesados (retencion.purgar_eventos).
+            models.Index(fields=['procesado_en', 'id'], name='notif_evento_procesado_idx', condition=Q(procesado=True)),
+        ]
+
+
+class ContadorNotificaciones(models.Model):
+    """
+    Notificaciones no leidas por usuario.
+
+    Lo mantienen triggers de Postgres sobre `Notificacion` (migracion 0003), por
+    lo que refleja tambien los `bulk_create`/`update` que no emiten senales.
+    """
+    usuario_id = models.BigIntegerField(primary_key=True)
+    no_leidas = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "contador_notificaciones"
+        verbose_name_plural = "contadores_notificaciones"
+
+    @classmethod
+    def no_leidas_de(cls, usuario_id):
+        valor = cls.objects.filter(usuario_id=usuario_id).values_list('no_leidas', flat=True).first()
+        return valor or 0
@@ -0,0 +1,133 @@
+"""
+Outbox de notificaciones.
+
+Las peticiones solo encolan un ``EventoNotificacion``; el worker
+(``python manage.py procesar_notificaciones``) lo expande a sus destinatarios
+con ``bulk_create`` y marca la entrega en bloque. Asi la latencia de la
+peticion no depende de cuantos administradores o destinatarios existan. Los
+eventos procesados los borra ``purgar_notificaciones`` (ver ``retencion.py``).
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from usuarios.models import Usuario
+from .models import AudienciaNotificacion, EventoNotificacion, Notificacion, TipoNotificacion
+
+
+logger = logging.getLogger(__name__)
+
+
+def destinatarios_admin():
+    return (
+        Usuario.objects.filter(
+            Q(is_superuser=True) | Q(rol__nombre__iexact="admin")
+        )
+        .distinct()
+    )
+
+
+def _remitente(user):
+    return user if getattr(user, "is_authenticated", False) else None
+
+
+def evento(mensaje, metadata=None, destinatario=None, audiencia=None, remitente=None, tipo=TipoNotificacion.AGENDA):
+    """Construye (sin guardar) un evento; util para encolar varios con ``encolar_lote``."""
+    if audiencia is None:
+        audiencia = AudienciaNotificacion.USUARIO
+    return EventoNotificacion(
+        tipo=tipo,
+        audiencia=audiencia,
+        destinatario=destinatario,
+        remitente=_remitente(remitente),
+        mensaje=mensaje,
+        metadata=metadata or {},
+    )
+
+
+def encolar(mensaje, metadata=None, destinatario=None, audiencia=None, remitente=None, tipo=TipoNotificacion.AGENDA):
+    nuevo = evento(
+        mensaje,
+        metadata=metadata,
+        destinatario=destinatario,
+        audiencia=audiencia,
+        remitente=remitente,
+        tipo=tipo,
+    )
+    if nuevo.audiencia == AudienciaNotificacion.USUARIO and not nuevo.destinatario:
+        return None
+    nuevo.save()
+    return nuevo
+
+
+def encolar_lote(eventos):
+    return EventoNotificacion.objects.bulk_create(eventos)
+
+
+def _destinos(evento_pendiente, admins):
+    if evento_pendiente.audiencia == AudienciaNotificacion.ADMINS:
+        return admins
+    if evento_pendiente.destinatario_id:
+        return [evento_pendiente.destinatario_id]
+    return []
+
+
+def procesar_lote(lote=500):
+    """
+    Expande hasta ``lote`` eventos pendientes. Devuelve ``(eventos, notificaciones)``.
+
+    Los eventos se toman con ``SKIP LOCKED`` para que varios workers puedan
+    correr a la vez sin duplicar notificaciones.
+    """
+    with transaction.atomic():
+        eventos = list(
+            EventoNotificacion.objects.select_for_update(skip_locked=True)
+            .filter(procesado=False)
+            .order_by("creado_en")[:lote]
+        )
+        if not eventos:
+            return 0, 0
+
+        admins = None
+        if any(e.audiencia == AudienciaNotificacion.ADMINS for e in eventos):
+            admins = list(destinatarios_admin().values_list("id", flat=True))
+
+        ahora = timezone.now()
+        notificaciones = [
+            Notificacion(
+                tipo=pendiente.tipo,
+                destinatario_id=destinatario_id,
+                remitente_id=pendiente.remitente_id,
+                mensaje=pendiente.mensaje,
+                metadata=dict(pendiente.metadata or {}),
+                enviado=True,
+                enviado_en=ahora,
+            )
+            for pendiente in eventos
+            for destinatario_id in _destinos(pendiente, admins)
+        ]
+        Notificacion.objects.bulk_create(notificaciones, batch_size=1000)
+        EventoNotificacion.objects.filter(
+            pk__in=[pendiente.pk for pendiente in eventos]
+        ).update(procesado=True, procesado_en=ahora)
+    return len(eventos), len(notificaciones)
+
+
+def procesar_pendientes(lote=500):
+    total_eventos = total_notificaciones = 0
+    while True:
+        eventos, notificaciones = procesar_lote(lote)
+        total_eventos += eventos
+        total_notificaciones += notificaciones
+        if eventos < lote:
+            break
+    if total_eventos:
+        logger.info(
+            "Outbox: %s eventos expandidos en %s notificaciones.",
+            total_eventos,
+            total_notificaciones,
+        )
+    return total_eventos, total_notificaciones
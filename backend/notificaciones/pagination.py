@@ -0,0 +1,10 @@
+from rest_framework.pagination import CursorPagination
+
+
+class NotificacionCursorPagination(CursorPagination):
+    # Paginacion por cursor: cada pagina es un rango del indice
+    # (destinatario, creado_en), sin OFFSET ni COUNT(*).
+    ordering = '-creado_en'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,149 @@
+"""
+Retencion de notificaciones.
+
+``settings.NOTIFICACIONES_RETENCION`` define cuantos dias se conserva cada
+``TipoNotificacion``. ``purgar`` borra lo vencido en lotes pequenos recorridos
+por clave (``creado_en``, ``id``) para que cada DELETE sea corto y no bloquee la
+bandeja; opcionalmente escribe antes cada lote en un NDJSON comprimido.
+
+``purgar_eventos`` borra del outbox los ``EventoNotificacion`` que el worker ya
+expandio hace mas de ``NOTIFICACIONES_EVENTOS_RETENCION`` dias; sin eso la tabla
+crece con cada evento encolado.
+"""
+
+import gzip
+import json
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import EventoNotificacion, Notificacion
+
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_ARCHIVO = (
+    "id",
+    "tipo",
+    "destinatario_id",
+    "remitente_id",
+    "mensaje",
+    "metadata",
+    "enviado",
+    "leido",
+    "enviado_en",
+    "creado_en",
+)
+
+
+def politica():
+    """Devuelve ``{tipo: timedelta}``; los tipos sin regla no se purgan."""
+    reglas = getattr(settings, "NOTIFICACIONES_RETENCION", {}) or {}
+    return {tipo: timedelta(days=int(dias)) for tipo, dias in reglas.items() if int(dias) > 0}
+
+
+def retencion_eventos():
+    """Antiguedad a partir de la cual se borran los eventos procesados, o ``None``."""
+    dias = int(getattr(settings, "NOTIFICACIONES_EVENTOS_RETENCION", 0) or 0)
+    return timedelta(days=dias) if dias > 0 else None
+
+
+def _siguiente_lote(tipo, limite, cursor, lote):
+    filtros = Q(tipo=tipo, creado_en__lt=limite)
+    if cursor is not None:
+        creado_en, pk = cursor
+        filtros &= Q(creado_en__gt=creado_en) | Q(creado_en=creado_en, id__gt=pk)
+    return list(
+        Notificacion.objects.filter(filtros)
+        .order_by("creado_en", "id")
+        .values(*CAMPOS_ARCHIVO)[:lote]
+    )
+
+
+def _archivar(archivo, filas):
+    for fila in filas:
+        archivo.write(json.dumps(fila, default=str, ensure_ascii=False))
+        archivo.write("\n")
+    archivo.flush()
+
+
+def purgar_tipo(tipo, limite, lote=500, archivo=None, simular=False, pausa=0):
+    total = 0
+    cursor = None
+    while True:
+        filas = _siguiente_lote(tipo, limite, cursor, lote)
+        if not filas:
+            break
+        cursor = (filas[-1]["creado_en"], filas[-1]["id"])
+        if not simular:
+            if archivo is not None:
+                _archivar(archivo, filas)
+            with transaction.atomic():
+                Notificacion.objects.filter(pk__in=[fila["id"] for fila in filas]).delete()
+        total += len(filas)
+        if len(filas) < lote:
+            break
+        if pausa:
+            time.sleep(pausa)
+    return total
+
+
+def purgar(ahora=None, lote=500, archivo=None, simular=False, pausa=0):
+    """
+    Aplica la politica de retencion. Devuelve ``{tipo: filas}``.
+
+    ``archivo`` es una ruta a un ``.ndjson.gz``; las filas se agregan al final,
+    asi varias ejecuciones pueden compartir el mismo archivo.
+    """
+    ahora = ahora or timezone.now()
+    resultado = {}
+    salida = gzip.open(archivo, "at", encoding="utf-8") if archivo and not simular else None
+    try:
+        for tipo, antiguedad in politica().items():
+            resultado[tipo] = purgar_tipo(
+                tipo,
+                ahora - antiguedad,
+                lote=lote,
+                archivo=salida,
+                simular=simular,
+                pausa=pausa,
+            )
+    finally:
+        if salida is not None:
+            salida.close()
+    if not simular and any(resultado.values()):
+        logger.info("Retencion: notificaciones eliminadas %s.", resultado)
+    return resultado
+
+
+def purgar_eventos(ahora=None, lote=500, simular=False, pausa=0):
+    """Borra en lotes los eventos del outbox procesados antes del limite. Devuelve las filas."""
+    antiguedad = retencion_eventos()
+    if antiguedad is None:
+        return 0
+    vencidos = EventoNotificacion.objects.filter(
+        procesado=True, procesado_en__lt=(ahora or timezone.now()) - antiguedad
+    )
+    if simular:
+        return vencidos.count()
+
+    total = 0
+    while True:
+        ids = list(vencidos.order_by("procesado_en", "id").values_list("id", flat=True)[:lote])
+        if not ids:
+            break
+        with transaction.atomic():
+            EventoNotificacion.objects.filter(pk__in=ids).delete()
+        total += len(ids)
+        if len(ids) < lote:
+            break
+        if pausa:
+            time.sleep(pausa)
+    if total:
+        logger.info("Retencion: %s eventos de notificacion procesados eliminados.", total)
+    return total
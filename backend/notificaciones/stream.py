@@ -0,0 +1,255 @@
+"""
+Stream de notificaciones en vivo (Server-Sent Events) para ``config/asgi.py``.
+
+Un hilo por proceso mantiene una conexion dedicada con ``LISTEN notificaciones``
+(el canal lo alimenta el trigger de la migracion 0003) y reparte cada aviso a
+las colas asyncio de los clientes conectados de ese destinatario. No hay
+consultas periodicas: el hilo duerme en ``select()`` hasta que Postgres avisa.
+
+El navegador no puede enviar cabeceras con ``EventSource``, asi que el token de
+acceso JWT se acepta tambien como ``?token=``.
+"""
+
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from urllib.parse import parse_qs
+
+import psycopg2
+import psycopg2.extensions
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from usuarios.tokens import CLAIM_VERSION, estado_token
+
+
+logger = logging.getLogger(__name__)
+
+STREAM_PATH = "/api/notificaciones/stream/"
+CANAL = "notificaciones"
+HEARTBEAT_SEGUNDOS = 20
+
+
+class EscuchaNotificaciones:
+    """Reparte los NOTIFY de Postgres entre los suscriptores del proceso."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._suscriptores = {}
+        self._hilo = None
+
+    def suscribir(self, usuario_id, cola, loop):
+        with self._lock:
+            self._suscriptores.setdefault(str(usuario_id), set()).add((cola, loop))
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(
+                    target=self._escuchar, name="notificaciones-listen", daemon=True
+                )
+                self._hilo.start()
+
+    def cancelar(self, usuario_id, cola, loop):
+        with self._lock:
+            colas = self._suscriptores.get(str(usuario_id))
+            if colas:
+                colas.discard((cola, loop))
+                if not colas:
+                    del self._suscriptores[str(usuario_id)]
+
+    def _despachar(self, payload):
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            return
+        with self._lock:
+            destinos = list(self._suscriptores.get(str(data.get("destinatario_id")), ()))
+        for cola, loop in destinos:
+            loop.call_soon_threadsafe(cola.put_nowait, data)
+
+    def _conectar(self):
+        params = connections["default"].get_connection_params()
+        conn = psycopg2.connect(**params)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {CANAL};")
+        return conn
+
+    def _escuchar(self):
+        espera = 1
+        while True:
+            conn = None
+            try:
+                conn = self._conectar()
+                espera = 1
+                while True:
+                    if select.select([conn], [], [], 60) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._despachar(conn.notifies.pop(0).payload)
+            except Exception:
+                logger.exception("Se perdio la conexion LISTEN de notificaciones; reintentando.")
+                if conn is not None:
+                    conn.close()
+                time.sleep(espera)
+                espera = min(espera * 2, 30)
+
+
+escucha = EscuchaNotificaciones()
+
+
+def _token(scope):
+    for nombre, valor in scope.get("headers", []):
+        if nombre == b"authorization":
+            partes = valor.decode("latin-1").split()
+            if len(partes) == 2 and partes[0] in jwt_settings.AUTH_HEADER_TYPES:
+                return partes[1]
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return (query.get("token") or [None])[0]
+
+
+@sync_to_async
+def _usuario_desde_token(scope):
+    """
+    Id del usuario del token, o ``None`` si no sirve. Aplica las mismas reglas
+    que ``JWTRolAuthentication``: un token firmado de un usuario inactivo o con
+    una ``version_token`` anterior (cierre de sesion, cambio de contrasena o de
+    rol) no abre el stream.
+    """
+    token = _token(scope)
+    if not token:
+        return None
+    try:
+        validado = AccessToken(token)
+    except TokenError:
+        return None
+    usuario_id = validado.get(jwt_settings.USER_ID_CLAIM)
+    if usuario_id is None:
+        return None
+    estado = estado_token(usuario_id)
+    if estado is None:
+        return None
+    version, activo = estado
+    if not activo:
+        return None
+    if validado.get(CLAIM_VERSION) is not None and validado[CLAIM_VERSION] != version:
+        return None
+    return usuario_id
+
+
+@sync_to_async
+def _contador(usuario_id):
+    from .models import ContadorNotificaciones
+
+    return ContadorNotificaciones.no_leidas_de(usuario_id)
+
+
+@sync_to_async
+def _serializar(notificacion_id, usuario_id):
+    from .models import Notificacion
+    from .serializers import NotificacionSerializer
+
+    notificacion = Notificacion.objects.filter(
+        pk=notificacion_id, destinatario_id=usuario_id
+    ).first()
+    return NotificacionSerializer(notificacion).data if notificacion else None
+
+
+def _cabeceras_cors(scope):
+    # El stream no pasa por corsheaders; replicamos su configuracion.
+    origen = dict(scope.get("headers", [])).get(b"origin")
+    if not origen:
+        return []
+    if getattr(settings, "CORS_ALLOW_ALL_ORIGINS", False):
+        return [(b"access-control-allow-origin", b"*")]
+    if origen.decode("latin-1") in getattr(settings, "CORS_ALLOWED_ORIGINS", []):
+        return [(b"access-control-allow-origin", origen), (b"vary", b"Origin")]
+    return []
+
+
+def _evento(nombre, data, evento_id=None):
+    lineas = []
+    if evento_id:
+        lineas.append(f"id: {evento_id}")
+    lineas.append(f"event: {nombre}")
+    lineas.append(f"data: {json.dumps(data, default=str)}")
+    return ("\n".join(lineas) + "\n\n").encode("utf-8")
+
+
+async def _responder_401(scope, send):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 401,
+            "headers": [(b"content-type", b"application/json")] + _cabeceras_cors(scope),
+        }
+    )
+    await send(
+        {
+            "type": "http.response.body",
+            "body": b'{"detail": "Token invalido o ausente."}',
+        }
+    )
+
+
+async def stream_notificaciones(scope, receive, send):
+    usuario_id = await _usuario_desde_token(scope)
+    if usuario_id is None:
+        await _responder_401(scope, send)
+        return
+
+    loop = asyncio.get_running_loop()
+    cola = asyncio.Queue()
+    escucha.suscribir(usuario_id, cola, loop)
+
+    desconectado = asyncio.Event()
+
+    async def _esperar_desconexion():
+        while True:
+            mensaje = await receive()
+            if mensaje["type"] == "http.disconnect":
+                desconectado.set()
+                return
+
+    vigilante = asyncio.ensure_future(_esperar_desconexion())
+    try:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ]
+                + _cabeceras_cors(scope),
+            }
+        )
+        await send(
+            {
+                "type": "http.response.body",
+                "body": _evento("contador", {"no_leidas": await _contador(usuario_id)}),
+                "more_body": True,
+            }
+        )
+        while not desconectado.is_set():
+            try:
+                aviso = await asyncio.wait_for(cola.get(), timeout=HEARTBEAT_SEGUNDOS)
+            except asyncio.TimeoutError:
+                await send({"type": "http.response.body", "body": b": ping\n\n", "more_body": True})
+                continue
+            data = await _serializar(aviso.get("id"), usuario_id)
+            if data is None:
+                continue
+            cuerpo = _evento("notificacion", data, evento_id=data.get("id"))
+            cuerpo += _evento("contador", {"no_leidas": await _contador(usuario_id)})
+            await send({"type": "http.response.body", "body": cuerpo, "more_body": True})
+    finally:
+        escucha.cancelar(usuario_id, cola, loop)
+        vigilante.cancel()
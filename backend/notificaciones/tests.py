@@ -1,3 +1,215 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from config.referencias import ALIAS as CACHE_REFERENCIAS
+from usuarios.models import Rol, Usuario
+from usuarios.tokens import agregar_claims
+from . import outbox
+from .models import AudienciaNotificacion, ContadorNotificaciones, EventoNotificacion, Notificacion
+from .retencion import purgar_eventos
+from .stream import _usuario_desde_token, stream_notificaciones
+
+
+class StreamTokenTests(TestCase):
+    def setUp(self):
+        caches[CACHE_REFERENCIAS].clear()
+        self.usuario = Usuario.objects.create_user(username='docente', password='x')
+
+    def _token(self):
+        return str(agregar_claims(AccessToken.for_user(self.usuario), self.usuario))
+
+    def _usuario(self, token, cabecera=False):
+        if cabecera:
+            scope = {'type': 'http', 'headers': [(b'authorization', f'Bearer {token}'.encode())]}
+        else:
+            scope = {'type': 'http', 'headers': [], 'query_string': f'token={token}'.encode()}
+        return async_to_sync(_usuario_desde_token)(scope)
+
+    def _estado_respuesta(self, token):
+        enviados = []
+
+        async def recibir():
+            return {'type': 'http.disconnect'}
+
+        async def enviar(mensaje):
+            enviados.append(mensaje)
+
+        scope = {'type': 'http', 'headers': [], 'query_string': f'token={token}'.encode()}
+        async_to_sync(stream_notificaciones)(scope, recibir, enviar)
+        return enviados[0]['status']
+
+    def test_token_vigente(self):
+        token = self._token()
+
+        self.assertEqual(self._usuario(token), str(self.usuario.pk))
+        self.assertEqual(self._usuario(token, cabecera=True), str(self.usuario.pk))
+
+    def test_token_invalido(self):
+        self.assertIsNone(self._usuario('basura'))
+        self.assertIsNone(self._usuario(''))
+        self.assertEqual(self._estado_respuesta('basura'), 401)
+
+    def test_token_de_version_anterior(self):
+        token = self._token()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.usuario.rol = Rol.objects.create(nombre='secretaria')
+            self.usuario.save()
+
+        self.assertIsNone(self._usuario(token))
+        self.assertEqual(self._estado_respuesta(token), 401)
+        self.assertEqual(self._usuario(self._token()), str(self.usuario.pk))
+
+    def test_usuario_inactivo(self):
+        token = self._token()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.usuario.is_active = False
+            self.usuario.save()
+
+        self.assertIsNone(self._usuario(token))
+        self.assertIsNone(self._usuario(self._token()))
+
+    def test_usuario_borrado(self):
+        token = self._token()
+        self.usuario.delete()
+
+        self.assertIsNone(self._usuario(token))
+
+
+class BandejaTests(APITestCase):
+    def setUp(self):
+        self.yo = Usuario.objects.create_user(username='docente', password='x')
+        self.otro = Usuario.objects.create_user(username='otro', password='x')
+        self.ahora = timezone.now()
+        self.mias = [self._notificacion(self.yo, dias) for dias in (3, 2, 1)]
+        self.ajenas = [self._notificacion(self.otro, dias) for dias in (3, 1)]
+        self.client.force_authenticate(self.yo)
+
+    def _notificacion(self, usuario, dias):
+        notificacion = Notificacion.objects.create(destinatario=usuario, mensaje=f'Aviso de hace {dias} dias')
+        Notificacion.objects.filter(pk=notificacion.pk).update(creado_en=self.ahora - timedelta(days=dias))
+        return notificacion
+
+    def _no_leidas(self, usuario):
+        return ContadorNotificaciones.no_leidas_de(usuario.pk)
+
+    def _sin_leer(self, usuario):
+        return Notificacion.objects.filter(destinatario=usuario, leido=False).count()
+
+    def _post(self, accion, datos):
+        return self.client.post(f'/api/notificaciones/{accion}/', datos, format='json')
+
+    def test_marcar_leidas_por_ids_solo_propias(self):
+        ids = [str(self.mias[0].pk), str(self.ajenas[0].pk)]
+
+        respuesta = self._post('marcar-leidas', {'ids': ids})
+
+        self.assertEqual(respuesta.status_code, status.HTTP_200_OK)
+        self.assertEqual(respuesta.data, {'actualizadas': 1})
+        self.mias[0].refresh_from_db()
+        self.ajenas[0].refresh_from_db()
+        self.assertTrue(self.mias[0].leido)
+        self.assertFalse(self.ajenas[0].leido)
+        self.assertEqual(self._no_leidas(self.yo), 2)
+        self.assertEqual(self._no_leidas(self.otro), 2)
+
+    def test_marcar_leidas_antes_de(self):
+        antes = (self.ahora - timedelta(days=1, hours=12)).isoformat()
+
+        respuesta = self._post('marcar-leidas', {'antes': antes})
+
+        self.assertEqual(respuesta.data, {'actualizadas': 2})
+        self.assertEqual(self._no_leidas(self.yo), self._sin_leer(self.yo))
+        self.assertEqual(self._no_leidas(self.yo), 1)
+        self.assertEqual(self._no_leidas(self.otro), 2)
+
+        respuesta = self.client.get('/api/notificaciones/no-leidas/')
+        self.assertEqual(respuesta.data, {'no_leidas': 1})
+
+        self.assertEqual(self._post('marcar-leidas', {'antes': antes}).data, {'actualizadas': 0})
+
+    def test_eliminar_solo_propias(self):
+        self._post('marcar-leidas', {'ids': [str(self.mias[1].pk)]})
+        ids = [str(self.mias[0].pk), str(self.mias[1].pk), str(self.ajenas[1].pk)]
+
+        respuesta = self._post('eliminar', {'ids': ids})
+
+        self.assertEqual(respuesta.data, {'eliminadas': 2})
+        self.assertEqual(list(Notificacion.objects.filter(destinatario=self.yo)), [self.mias[2]])
+        self.assertEqual(Notificacion.objects.filter(destinatario=self.otro).count(), 2)
+        self.assertEqual(self._no_leidas(self.yo), 1)
+        self.assertEqual(self._no_leidas(self.otro), 2)
+
+    def test_filtro_leido(self):
+        self._post('marcar-leidas', {'ids': [str(self.mias[0].pk)]})
+
+        leidas = self.client.get('/api/notificaciones/', {'leido': 'true'}).data['results']
+        sin_leer = self.client.get('/api/notificaciones/', {'leido': 'false'}).data['results']
+
+        self.assertEqual([n['id'] for n in leidas], [str(self.mias[0].pk)])
+        self.assertEqual([n['id'] for n in sin_leer], [str(self.mias[2].pk), str(self.mias[1].pk)])
+
+    def test_seleccion_invalida(self):
+        casos = [
+            {'antes': '2025-13-45T10:00:00'},
+            {'antes': 'ayer'},
+            {'ids': []},
+            {'ids': ['no-es-uuid']},
+            {},
+        ]
+        for accion in ('marcar-leidas', 'eliminar'):
+            for datos in casos:
+                respuesta = self._post(accion, datos)
+                self.assertEqual(respuesta.status_code, status.HTTP_400_BAD_REQUEST, (accion, datos))
+        self.assertEqual(self._no_leidas(self.yo), 3)
+        self.assertEqual(Notificacion.objects.count(), 5)
+
+
+@override_settings(NOTIFICACIONES_EVENTOS_RETENCION=7)
+class RetencionEventosTests(TestCase):
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser(username='admin', password='x')
+        self.ahora = timezone.now()
+
+    def _evento(self, procesado_hace=None):
+        evento = outbox.encolar('Aviso', audiencia=AudienciaNotificacion.ADMINS)
+        if procesado_hace is not None:
+            EventoNotificacion.objects.filter(pk=evento.pk).update(
+                procesado=True, procesado_en=self.ahora - procesado_hace
+            )
+        return evento
+
+    def test_purga_solo_eventos_procesados_vencidos(self):
+        viejos = [self._evento(timedelta(days=8)) for _ in range(3)]
+        reciente = self._evento(timedelta(days=6))
+        pendiente = self._evento()
+
+        self.assertEqual(purgar_eventos(ahora=self.ahora, simular=True), 3)
+        self.assertEqual(EventoNotificacion.objects.count(), 5)
+
+        self.assertEqual(purgar_eventos(ahora=self.ahora, lote=2), 3)
+
+        self.assertFalse(EventoNotificacion.objects.filter(pk__in=[e.pk for e in viejos]).exists())
+        self.assertEqual(set(EventoNotificacion.objects.values_list('pk', flat=True)), {reciente.pk, pendiente.pk})
+
+    def test_procesar_y_purgar(self):
+        self._evento()
+        self.assertEqual(outbox.procesar_pendientes(), (1, 1))
+        self.assertEqual(Notificacion.objects.filter(destinatario=self.admin).count(), 1)
+
+        self.assertEqual(purgar_eventos(ahora=self.ahora + timedelta(days=8)), 1)
+        self.assertFalse(EventoNotificacion.objects.exists())
+        self.assertEqual(Notificacion.objects.count(), 1)
+
+    @override_settings(NOTIFICACIONES_EVENTOS_RETENCION=0)
+    def test_sin_retencion_no_purga(self):
+        self._evento(timedelta(days=400))
+
+        self.assertEqual(purgar_eventos(ahora=self.ahora), 0)
+        self.assertEqual(EventoNotificacion.objects.count(), 1)
@@ -1,15 +1,98 @@
-from rest_framework import viewsets
-from .models import Notificacion
+import uuid
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from .models import ContadorNotificaciones, Notificacion
+from .pagination import NotificacionCursorPagination
 from .serializers import NotificacionSerializer
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+
+BOOLEAN_FALSE_VALUES = {'false', '0', 'no', 'off'}
+BOOLEAN_TRUE_VALUES = {'true', '1', 'yes', 'on'}
 
 class NotificacionViewSet(viewsets.ModelViewSet):
     queryset = Notificacion.objects.all().order_by('-creado_en')
     serializer_class = NotificacionSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = NotificacionCursorPagination
 
     def get_queryset(self):
         user = self.request.user
-        if user.is_authenticated:
-            return Notificacion.objects.filter(destinatario=user).order_by('-creado_en')
-        return Notificacion.objects.none()
+        if not user.is_authenticated:
+            return Notificacion.objects.none()
+        queryset = Notificacion.objects.filter(destinatario=user).order_by('-creado_en')
+
+        leido_param = self.request.query_params.get('leido')
+        if leido_param is not None:
+            value = leido_param.strip().lower()
+            if value in BOOLEAN_TRUE_VALUES:
+                queryset = queryset.filter(leido=True)
+            elif value in BOOLEAN_FALSE_VALUES:
+                queryset = queryset.filter(leido=False)
+        return queryset
+
+    def _seleccion_masiva(self, request):
+        """Notificaciones del usuario indicadas por ``ids`` o por ``antes`` (timestamp)."""
+        queryset = self.get_queryset()
+        ids = request.data.get('ids')
+        antes = request.data.get('antes')
+
+        if ids is not None:
+            if not isinstance(ids, list) or not ids:
+                return None, Response(
+                    {'detail': '"ids" debe ser una lista no vacia.'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            try:
+                ids = [uuid.UUID(str(valor)) for valor in ids]
+            except ValueError:
+                return None, Response(
+                    {'detail': '"ids" contiene identificadores invalidos.'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            return queryset.filter(pk__in=ids), None
+
+        if antes:
+            try:
+                limite = parse_datetime(str(antes))
+            except ValueError:
+                # Bien formada pero imposible (por ejemplo mes 13).
+                limite = None
+            if not limite:
+                return None, Response(
+                    {'detail': 'Formato de "antes" invalido. Usa ISO 8601.'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if timezone.is_naive(limite):
+                limite = timezone.make_aware(limite, timezone.get_current_timezone())
+            return queryset.filter(creado_en__lt=limite), None
+
+        return None, Response(
+            {'detail': 'Indica "ids" o "antes".'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    @action(detail=False, methods=['get'], url_path='no-leidas', permission_classes=[IsAuthenticated])
+    def no_leidas(self, request):
+        # Contador mantenido por triggers: una lectura por clave primaria.
+        return Response({'no_leidas': ContadorNotificaciones.no_leidas_de(request.user.id)})
+
+    @action(detail=False, methods=['post'], url_path='marcar-leidas', permission_classes=[IsAuthenticated])
+    def marcar_leidas(self, request):
+        queryset, error = self._seleccion_masiva(request)
+        if error:
+            return error
+        actualizadas = queryset.filter(leido=False).update(leido=True)
+        return Response({'actualizadas': actualizadas})
+
+    @action(detail=False, methods=['post'], url_path='eliminar', permission_classes=[IsAuthenticated])
+    def eliminar(self, request):
+        queryset, error = self._seleccion_masiva(request)
+        if error:
+            return error
+        # Notificacion no tiene relaciones inversas ni senales: Django emite un solo DELETE.
+        eliminadas, _ = queryset.delete()
+        return Response({'eliminadas': eliminadas})
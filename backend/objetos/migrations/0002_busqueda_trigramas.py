@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:59
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objetos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+            reverse_sql="DROP EXTENSION IF EXISTS pg_trgm;"
+        ),
+        migrations.AddIndex(
+            model_name='objetoperdido',
+            index=django.contrib.postgres.indexes.GinIndex(condition=models.Q(('estado', 'encontrado')), fields=['descripcion'], name='objeto_desc_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='objetoperdido',
+            index=django.contrib.postgres.indexes.GinIndex(condition=models.Q(('estado', 'encontrado')), fields=['observaciones'], name='objeto_obs_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='objetoperdido',
+            index=models.Index(condition=models.Q(('estado', 'encontrado')), fields=['espacio', 'fecha_encontrado'], name='objeto_pendiente_espacio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='objetoperdido',
+            index=models.Index(condition=models.Q(('estado', 'encontrado')), fields=['fecha_encontrado'], name='objeto_pendiente_fecha_idx'),
+        ),
+    ]
@@ -1,7 +1,9 @@
 # objetos/models.py
 import uuid
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.db import models
+from django.db.models import Q
 
 class TipoObjetoPerdido(models.TextChoices):
     DOCUMENTO = 'documento', 'Documento'
@@ -24,3 +26,28 @@ class ObjetoPerdido(models.Model):
     class Meta:
         verbose_name = "objeto_perdido"
         verbose_name_plural = "objetos_perdidos"
+        # Solo los objetos sin reclamar entran en la busqueda (`buscar/`).
+        indexes = [
+            GinIndex(
+                fields=['descripcion'],
+                opclasses=['gin_trgm_ops'],
+                condition=Q(estado='encontrado'),
+                name='objeto_desc_trgm_idx',
+            ),
+            GinIndex(
+                fields=['observaciones'],
+                opclasses=['gin_trgm_ops'],
+                condition=Q(estado='encontrado'),
+                name='objeto_obs_trgm_idx',
+            ),
+            models.Index(
+                fields=['espacio', 'fecha_encontrado'],
+                condition=Q(estado='encontrado'),
+                name='objeto_pendiente_espacio_idx',
+            ),
+            models.Index(
+                fields=['fecha_encontrado'],
+                condition=Q(estado='encontrado'),
+                name='objeto_pendiente_fecha_idx',
+            ),
+        ]
@@ -1,8 +1,24 @@
-from rest_framework import viewsets
+from datetime import datetime, time, timedelta
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from .models import ObjetoPerdido
 from .serializers import ObjetoPerdidoSerializer
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 
+# Umbral de pg_trgm para `%>`; por defecto es 0.6, demasiado estricto para
+# descripciones vagas como "celular negro".
+UMBRAL_SIMILITUD = 0.3
+LIMITE_RESULTADOS = 20
+LIMITE_MAXIMO = 50
+
 class ObjetoPerdidoViewSet(viewsets.ModelViewSet):
     queryset = ObjetoPerdido.objects.all().order_by('-fecha_encontrado')
     serializer_class = ObjetoPerdidoSerializer
@@ -12,3 +28,70 @@ class ObjetoPerdidoViewSet(viewsets.ModelViewSet):
         user = self.request.user
         if user.is_authenticated:
             serializer.save(encontrado_por=user)
+
+    def _inicio_dia(self, valor):
+        try:
+            fecha = parse_date(valor)
+        except ValueError:
+            fecha = None
+        if not fecha:
+            return None
+        return timezone.make_aware(datetime.combine(fecha, time.min), timezone.get_current_timezone())
+
+    @action(detail=False, methods=['get'], url_path='buscar')
+    def buscar(self, request):
+        """Objetos sin reclamar parecidos a ``q``, del mas al menos similar."""
+        texto = (request.query_params.get('q') or '').strip()
+        if not texto:
+            return Response({'detail': 'Indica el texto a buscar en "q".'}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = ObjetoPerdido.objects.filter(estado='encontrado')
+
+        espacio_id = request.query_params.get('espacio')
+        if espacio_id:
+            queryset = queryset.filter(espacio_id=espacio_id)
+        for nombre, lookup in (('desde', 'fecha_encontrado__gte'), ('hasta', 'fecha_encontrado__lt')):
+            valor = request.query_params.get(nombre)
+            if not valor:
+                continue
+            limite = self._inicio_dia(valor)
+            if not limite:
+                return Response(
+                    {'detail': f"Formato de fecha invalido para '{nombre}'. Usa YYYY-MM-DD."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if nombre == 'hasta':
+                limite += timedelta(days=1)
+            queryset = queryset.filter(**{lookup: limite})
+
+        try:
+            cantidad = min(int(request.query_params.get('limite', LIMITE_RESULTADOS)), LIMITE_MAXIMO)
+        except (TypeError, ValueError):
+            cantidad = LIMITE_RESULTADOS
+        cantidad = max(cantidad, 1)
+
+        # `%>` filtra con los indices GIN parciales; la similitud solo ordena.
+        queryset = (
+            queryset.filter(
+                Q(descripcion__trigram_word_similar=texto) | Q(observaciones__trigram_word_similar=texto)
+            )
+            .annotate(
+                similitud=Greatest(
+                    TrigramWordSimilarity(texto, 'descripcion'),
+                    TrigramWordSimilarity(texto, 'observaciones'),
+                )
+            )
+            .order_by('-similitud', '-fecha_encontrado')[:cantidad]
+        )
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL pg_trgm.word_similarity_threshold = %s', [UMBRAL_SIMILITUD])
+            objetos = list(queryset)
+
+        resultados = []
+        for objeto in objetos:
+            data = ObjetoPerdidoSerializer(objeto).data
+            data['similitud'] = round(objeto.similitud or 0, 3)
+            resultados.append(data)
+        return Response(resultados)
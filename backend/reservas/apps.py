@@ -1,4 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def _asegurar_particiones(sender, using, **kwargs):
+    from .particiones import asegurar_particiones
+
+    asegurar_particiones(using=using)
 
 
 class ReservasConfig(AppConfig):
@@ -7,3 +14,5 @@ class ReservasConfig(AppConfig):
 
     def ready(self):
         from . import signals  # noqa: F401
+
+        post_migrate.connect(_asegurar_particiones, sender=self)
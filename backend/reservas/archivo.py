@@ -0,0 +1,299 @@
+"""
+Archivo frio de semestres cerrados.
+
+Las reservas, su historial de estados y los registros de apertura de semestres
+pasados solo los leen los reportes de administracion. ``archivar_semestre``
+los saca de las tablas vivas:
+
+- el historial de las reservas del semestre se mueve en lotes a
+  ``reservas_reservaestadohistorial_archivo`` (``DELETE ... RETURNING`` e
+  ``INSERT`` en la misma sentencia, con ``procesar_por_lotes``);
+- las particiones del semestre (ver ``particiones.py``) se desprenden de
+  ``reservas_reserva`` y ``reservas_registroapertura`` y se adjuntan, sin
+  copiar filas, a ``reservas_reserva_archivo`` y
+  ``reservas_registroapertura_archivo``. Al pasar al archivo pierden sus
+  indices y llaves; solo quedan indices BRIN por fecha, que ocupan muy poco.
+
+Las tablas de archivo se crean en la migracion 0014. Como una migracion
+posterior podria cambiar las columnas de las tablas vivas, antes de adjuntar
+una particion se agregan a cada lado las columnas que le falten al otro.
+
+``ReservaArchivada`` y ``RegistroAperturaArchivado`` son modelos no
+administrados sobre el archivo con las columnas que usan los reportes;
+``frontera`` indica desde que fecha los datos siguen vivos para que
+``ReporteAdminMixin`` sepa cuando debe consultar el archivo. Se archiva siempre
+del semestre mas viejo al mas nuevo y ``restaurar_semestre`` solo devuelve el
+mas reciente, asi el archivo cubre un rango continuo hasta ``frontera``.
+"""
+
+import re
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from config.lotes import accion_sql, procesar_por_lotes
+
+from .models import ReservaEstadoHistorial
+from .particiones import (
+    TABLAS,
+    limites_semestre,
+    nombre_defecto,
+    nombre_particion,
+    particiones,
+    semestre_anterior,
+    semestre_de,
+)
+
+
+HISTORIAL = "reservas_reservaestadohistorial"
+SEMESTRES_VIVOS = 2
+# Columnas de registros de apertura por las que filtran los reportes (ver
+# ``ReporteAdminMixin._con_archivo``); pueden caer despues de ``frontera``.
+COLUMNAS_REPORTES = ("completado_en", "asistencia_registrada_en")
+
+_SUFIJO_SEMESTRE = re.compile(r"_(\d{4})_([12])$")
+
+
+class ErrorArchivo(Exception):
+    pass
+
+
+def nombre_archivo(tabla):
+    return f"{tabla}_archivo"
+
+
+def _semestres(nombres):
+    semestres = set()
+    for nombre in nombres:
+        coincidencia = _SUFIJO_SEMESTRE.search(nombre)
+        if coincidencia:
+            semestres.add((int(coincidencia.group(1)), int(coincidencia.group(2))))
+    return sorted(semestres)
+
+
+def semestres_archivados(cursor):
+    tabla, _ = TABLAS[0]
+    return _semestres(particiones(cursor, nombre_archivo(tabla)))
+
+
+def semestres_archivables(cursor, conservar=SEMESTRES_VIVOS):
+    """Semestres con particion viva anteriores a los ``conservar`` previos al actual."""
+    limite = semestre_de(timezone.now())
+    for _ in range(conservar):
+        limite = semestre_anterior(*limite)
+    tabla, _ = TABLAS[0]
+    return [semestre for semestre in _semestres(particiones(cursor, tabla)) if semestre < limite]
+
+
+def frontera(using="default"):
+    """Inicio de los datos vivos, o ``None`` si no hay nada archivado."""
+    with connections[using].cursor() as cursor:
+        archivados = semestres_archivados(cursor)
+    if not archivados:
+        return None
+    return limites_semestre(*archivados[-1])[1]
+
+
+# Tablas de archivo (migracion 0014) ----------------------------------------------
+
+def crear_tablas(cursor):
+    for tabla, columna in TABLAS:
+        archivo = nombre_archivo(tabla)
+        cursor.execute(
+            f"CREATE TABLE {archivo} (LIKE {tabla} INCLUDING DEFAULTS) PARTITION BY RANGE ({columna})"
+        )
+        cursor.execute(f"CREATE INDEX {archivo}_{columna}_brin ON {archivo} USING brin ({columna})")
+    archivo = nombre_archivo(HISTORIAL)
+    cursor.execute(f"CREATE TABLE {archivo} (LIKE {HISTORIAL} INCLUDING DEFAULTS)")
+    cursor.execute(f"CREATE INDEX {archivo}_reserva_id ON {archivo} (reserva_id)")
+
+
+def crear_indices_reportes(cursor):
+    """Indices BRIN (migracion 0016) para las columnas que filtran los reportes."""
+    archivo = nombre_archivo(TABLAS[1][0])
+    for columna in COLUMNAS_REPORTES:
+        cursor.execute(f"CREATE INDEX {archivo}_{columna}_brin ON {archivo} USING brin ({columna})")
+
+
+def borrar_indices_reportes(cursor):
+    archivo = nombre_archivo(TABLAS[1][0])
+    for columna in COLUMNAS_REPORTES:
+        cursor.execute(f"DROP INDEX IF EXISTS {archivo}_{columna}_brin")
+
+
+def borrar_tablas(cursor):
+    for tabla in [nombre_archivo(tabla) for tabla, _ in TABLAS] + [nombre_archivo(HISTORIAL)]:
+        cursor.execute(f"DROP TABLE IF EXISTS {tabla}")
+
+
+# Movimiento -------------------------------------------------------------------
+
+def _columnas(cursor, tabla):
+    cursor.execute(
+        """
+        SELECT attname, format_type(atttypid, atttypmod) FROM pg_attribute
+        WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+        ORDER BY attnum
+        """,
+        [tabla],
+    )
+    return dict(cursor.fetchall())
+
+
+def _igualar_columnas(cursor, origen, destino):
+    """Agrega a ``destino`` (como nulables) las columnas de ``origen`` que no tiene."""
+    existentes = _columnas(cursor, destino)
+    for nombre, tipo in _columnas(cursor, origen).items():
+        if nombre not in existentes:
+            cursor.execute(f'ALTER TABLE {destino} ADD COLUMN "{nombre}" {tipo}')
+
+
+def _quitar_indices(cursor, tabla):
+    cursor.execute(
+        "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f', 'x')",
+        [tabla],
+    )
+    for (nombre,) in cursor.fetchall():
+        cursor.execute(f"ALTER TABLE {tabla} DROP CONSTRAINT {nombre}")
+    cursor.execute("SELECT indexrelid::regclass::text FROM pg_index WHERE indrelid = %s::regclass", [tabla])
+    for (nombre,) in cursor.fetchall():
+        cursor.execute(f"DROP INDEX {nombre}")
+
+
+def _copiar_checks(cursor, tabla, particion):
+    """Agrega a ``particion`` las restricciones CHECK de ``tabla`` que se crearon mientras estuvo archivada."""
+    consulta = "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'c'"
+    cursor.execute(consulta, [particion])
+    existentes = {nombre for nombre, _ in cursor.fetchall()}
+    cursor.execute(consulta, [tabla])
+    for nombre, definicion in cursor.fetchall():
+        if nombre not in existentes:
+            cursor.execute(f"ALTER TABLE {particion} ADD CONSTRAINT {nombre} {definicion}")
+
+
+def _sql_mover(cursor, origen, destino, condicion):
+    _igualar_columnas(cursor, origen, destino)
+    columnas = ", ".join(f'"{nombre}"' for nombre in _columnas(cursor, origen))
+    return (
+        f"WITH movidas AS (DELETE FROM {origen} WHERE {condicion} RETURNING *) "
+        f"INSERT INTO {destino} ({columnas}) SELECT {columnas} FROM movidas"
+    )
+
+
+def _limpiar_referencias(cursor, tabla, particion):
+    """
+    Aplica a ``particion`` lo que hizo el ORM mientras estuvo archivada: si se
+    borro un usuario o un espacio, la columna queda en ``NULL`` o la fila se
+    borra (segun admita nulos), para que las llaves de ``tabla`` validen.
+    """
+    cursor.execute(
+        """
+        SELECT a.attname, a.attnotnull, c.confrelid::regclass::text, r.attname
+        FROM pg_constraint c
+        JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+        JOIN pg_attribute r ON r.attrelid = c.confrelid AND r.attnum = c.confkey[1]
+        WHERE c.conrelid = %s::regclass AND c.contype = 'f'
+        """,
+        [tabla],
+    )
+    for columna, obligatoria, referida, clave in cursor.fetchall():
+        huerfana = f"{columna} IS NOT NULL AND NOT EXISTS (SELECT 1 FROM {referida} x WHERE x.{clave} = {columna})"
+        if obligatoria:
+            cursor.execute(f"DELETE FROM {particion} WHERE {huerfana}")
+        else:
+            cursor.execute(f"UPDATE {particion} SET {columna} = NULL WHERE {huerfana}")
+
+
+def archivar_semestre(anio, numero, lote=None, pausa=None, using="default"):
+    """
+    Pasa al archivo el semestre indicado. Devuelve ``(reservas, registros,
+    historial)`` movidos. Si se interrumpe, volver a llamarla termina el trabajo.
+    """
+    inicio, fin = limites_semestre(anio, numero)
+    with connections[using].cursor() as cursor:
+        if nombre_particion(TABLAS[0][0], anio, numero) not in particiones(cursor, TABLAS[0][0]):
+            raise ErrorArchivo(f"El semestre {anio}-{numero} no tiene particion viva.")
+        anteriores = [s for s in _semestres(particiones(cursor, TABLAS[0][0])) if s < (anio, numero)]
+        if anteriores:
+            raise ErrorArchivo(f"Primero hay que archivar {anteriores[0][0]}-{anteriores[0][1]}.")
+        archivados = semestres_archivados(cursor)
+        if archivados and archivados[-1] > (anio, numero):
+            raise ErrorArchivo(f"Ya hay semestres posteriores a {anio}-{numero} en el archivo.")
+        mover = _sql_mover(cursor, HISTORIAL, nombre_archivo(HISTORIAL), "id = ANY(%(ids)s)")
+
+    historial = procesar_por_lotes(
+        ReservaEstadoHistorial.objects.using(using).filter(
+            reserva__fecha_inicio__gte=inicio, reserva__fecha_inicio__lt=fin
+        ),
+        accion_sql(mover, using=using),
+        lote=lote,
+        pausa=pausa,
+        punto_control=f"archivo:{anio}_{numero}",
+    )
+
+    movidas = []
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        # Lo que se haya agregado al historial mientras corrian los lotes.
+        tabla_reservas = nombre_particion(TABLAS[0][0], anio, numero)
+        cursor.execute(
+            _sql_mover(
+                cursor,
+                HISTORIAL,
+                nombre_archivo(HISTORIAL),
+                f"reserva_id IN (SELECT id FROM {tabla_reservas})",
+            )
+        )
+        historial += cursor.rowcount
+
+        for tabla, _ in TABLAS:
+            particion = nombre_particion(tabla, anio, numero)
+            archivo = nombre_archivo(tabla)
+            cursor.execute(f"ALTER TABLE {tabla} DETACH PARTITION {particion}")
+            _quitar_indices(cursor, particion)
+            _igualar_columnas(cursor, particion, archivo)
+            _igualar_columnas(cursor, archivo, particion)
+            cursor.execute(
+                f"ALTER TABLE {archivo} ATTACH PARTITION {particion} FOR VALUES FROM (%s) TO (%s)",
+                [inicio, fin],
+            )
+            cursor.execute(f"SELECT count(*) FROM {particion}")
+            movidas.append(cursor.fetchone()[0])
+    return movidas[0], movidas[1], historial
+
+
+def restaurar_semestre(anio, numero, using="default"):
+    """Devuelve a las tablas vivas el semestre archivado mas reciente."""
+    inicio, fin = limites_semestre(anio, numero)
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        archivados = semestres_archivados(cursor)
+        if not archivados or archivados[-1] != (anio, numero):
+            raise ErrorArchivo("Solo se puede restaurar el semestre archivado mas reciente.")
+
+        # Los indices vuelven solos: al adjuntar, Postgres crea los de la tabla padre.
+        for tabla, columna in TABLAS:
+            particion = nombre_particion(tabla, anio, numero)
+            archivo = nombre_archivo(tabla)
+            cursor.execute(f"ALTER TABLE {archivo} DETACH PARTITION {particion}")
+            _quitar_indices(cursor, particion)
+            _igualar_columnas(cursor, tabla, particion)
+            _copiar_checks(cursor, tabla, particion)
+            _limpiar_referencias(cursor, tabla, particion)
+            # Filas de esas fechas que se crearon despues de archivar cayeron en la particion por defecto.
+            cursor.execute(
+                _sql_mover(cursor, nombre_defecto(tabla), particion, f"{columna} >= %(inicio)s AND {columna} < %(fin)s"),
+                {"inicio": inicio, "fin": fin},
+            )
+            cursor.execute(
+                f"ALTER TABLE {tabla} ATTACH PARTITION {particion} FOR VALUES FROM (%s) TO (%s)",
+                [inicio, fin],
+            )
+
+        tabla_reservas = nombre_particion(TABLAS[0][0], anio, numero)
+        cursor.execute(
+            _sql_mover(
+                cursor,
+                nombre_archivo(HISTORIAL),
+                HISTORIAL,
+                f"reserva_id IN (SELECT id FROM {tabla_reservas})",
+            )
+        )
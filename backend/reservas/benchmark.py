@@ -0,0 +1,333 @@
+"""
+Benchmark de los caminos criticos de reservas.
+
+``ejecutar(espacios, semanas, clases, ...)`` arma un conjunto de datos sintetico
+dentro de una transaccion, mide cada operacion llamando a las vistas reales
+(con serializacion y render incluidos) y al final revierte todo: la base queda
+como estaba. Cada repeticion corre en su propio savepoint, asi todas parten del
+mismo estado; la primera se descarta como calentamiento.
+
+Forma de los datos, por espacio: horario base de 6:00 a 20:00 toda la semana,
+``clases`` bloques ``[CLASE]`` semanales en franjas de dos horas de lunes a
+viernes y, por cada una de las ``semanas``, tres reservas aprobadas en las
+franjas libres con su registro de apertura y una incidencia.
+"""
+
+import math
+import statistics
+import time
+import uuid
+from datetime import datetime, time as dtime, timedelta
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from espacios.models import DisponibilidadEspacio, Espacio, TipoEspacio
+from espacios.plantillas import PLANTILLAS
+from espacios.referencias import DISPONIBILIDAD, ESPACIOS
+from incidencias.models import Incidencia
+from usuarios.models import Usuario
+
+from .models import EstadoAsistencia, EstadoReserva, RegistroApertura, Reserva
+from .serializer import SEMESTER_START
+from .views import (
+    ReporteAperturasAPIView,
+    ReporteAusenciasAPIView,
+    ReporteIncidenciasAPIView,
+    ReservaViewSet,
+)
+
+
+FRANJAS = [(6, 8), (8, 10), (10, 12), (12, 14), (14, 16), (16, 18), (18, 20)]
+DIAS_HABILES = 5
+SEMANAS_RECURRENCIA = 17
+RESERVAS_POR_SEMANA = 3
+# La ultima franja (viernes 18-20) queda libre para la reserva recurrente.
+FRANJA_RECURRENTE = DIAS_HABILES * len(FRANJAS) - 1
+MAX_CLASES = FRANJA_RECURRENTE - RESERVAS_POR_SEMANA
+PREFIJO_CODIGO = "BENCH-"
+
+OPERACIONES = (
+    "crear_recurrente",
+    "aprobar",
+    "aperturas",
+    "reporte_aperturas",
+    "reporte_ausencias",
+    "reporte_incidencias",
+    "disponibilidad",
+)
+
+
+class ErrorBenchmark(Exception):
+    pass
+
+
+def _franja(indice):
+    """Indice 0..34 -> (dia_semana, hora_inicio, hora_fin), llenando lunes a viernes por franja."""
+    dia = indice % DIAS_HABILES
+    inicio, fin = FRANJAS[indice // DIAS_HABILES]
+    return dia, inicio, fin
+
+
+def _momento(fecha, hora):
+    return timezone.make_aware(datetime.combine(fecha, dtime(hora)), timezone.get_current_timezone())
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return None
+    rango = max(math.ceil(p / 100 * len(ordenados)) - 1, 0)
+    return ordenados[rango]
+
+
+def resumir(muestras_ms, consultas):
+    return {
+        "repeticiones": len(muestras_ms),
+        "ms": {
+            "min": round(min(muestras_ms), 3),
+            "p50": round(percentil(muestras_ms, 50), 3),
+            "p95": round(percentil(muestras_ms, 95), 3),
+            "max": round(max(muestras_ms), 3),
+            "media": round(statistics.fmean(muestras_ms), 3),
+            "desviacion": round(statistics.pstdev(muestras_ms), 3),
+        },
+        "consultas": {"min": min(consultas), "max": max(consultas)},
+    }
+
+
+class Benchmark:
+    def __init__(self, espacios, semanas, clases, conflictos=10, repeticiones=10):
+        if clases > MAX_CLASES:
+            raise ErrorBenchmark(f"clases no puede superar {MAX_CLASES} por espacio.")
+        self.espacios = espacios
+        self.semanas = semanas
+        self.clases = clases
+        self.conflictos = conflictos
+        self.repeticiones = repeticiones
+        self.inicio = SEMESTER_START
+        self.factory = APIRequestFactory()
+
+    # Datos -----------------------------------------------------------------
+
+    def preparar(self):
+        sufijo = uuid.uuid4().hex[:8]
+        self.admin = Usuario.objects.create(
+            username=f"bench_admin_{sufijo}", is_superuser=True, is_staff=True, first_name="Bench"
+        )
+        self.solicitante = Usuario.objects.create(username=f"bench_user_{sufijo}", first_name="Bench")
+
+        tipos = [TipoEspacio.AULA, TipoEspacio.LABORATORIO, TipoEspacio.SALA]
+        self.lista_espacios = Espacio.objects.bulk_create(
+            [
+                Espacio(
+                    codigo=f"{PREFIJO_CODIGO}{sufijo}-{i:04d}",
+                    nombre=f"Espacio benchmark {i}",
+                    tipo=tipos[i % len(tipos)],
+                    capacidad=30,
+                )
+                for i in range(self.espacios)
+            ]
+        )
+
+        disponibilidades = []
+        for espacio in self.lista_espacios:
+            disponibilidades.extend(
+                DisponibilidadEspacio(
+                    espacio=espacio, dia_semana=dia, hora_inicio=dtime(6), hora_fin=dtime(20), recurrente=True
+                )
+                for dia in range(7)
+            )
+            for indice in range(self.clases):
+                dia, desde, hasta = _franja(indice)
+                disponibilidades.append(
+                    DisponibilidadEspacio(
+                        espacio=espacio,
+                        dia_semana=dia,
+                        hora_inicio=dtime(desde),
+                        hora_fin=dtime(hasta),
+                        recurrente=True,
+                        es_bloqueo=True,
+                        observaciones=f"[CLASE] {20000 + indice} | Grupo B{indice}",
+                    )
+                )
+        DisponibilidadEspacio.objects.bulk_create(disponibilidades, batch_size=2000)
+
+        reservas = []
+        libres = range(self.clases, self.clases + RESERVAS_POR_SEMANA)
+        for semana in range(self.semanas):
+            lunes = self.inicio + timedelta(weeks=semana)
+            for espacio in self.lista_espacios:
+                for indice in libres:
+                    dia, desde, hasta = _franja(indice)
+                    fecha = lunes + timedelta(days=dia)
+                    inicio, fin = _momento(fecha, desde), _momento(fecha, hasta)
+                    reservas.append(
+                        Reserva(
+                            usuario=self.solicitante,
+                            creado_por=self.solicitante,
+                            espacio=espacio,
+                            fecha_inicio=inicio,
+                            fecha_fin=fin,
+                            periodo=(inicio, fin),
+                            estado=EstadoReserva.APROBADO,
+                            motivo="Benchmark",
+                        )
+                    )
+        Reserva.objects.bulk_create(reservas, batch_size=2000)
+
+        estados = [EstadoAsistencia.PRESENTE, EstadoAsistencia.TARDE, EstadoAsistencia.AUSENTE]
+        RegistroApertura.objects.bulk_create(
+            [
+                RegistroApertura(
+                    reserva=reserva,
+                    espacio=reserva.espacio,
+                    registrado_por=self.admin,
+                    fecha_programada=reserva.fecha_inicio,
+                    completado=True,
+                    completado_en=reserva.fecha_inicio,
+                    asistencia_estado=estados[i % len(estados)],
+                    asistencia_registrada_en=reserva.fecha_inicio,
+                )
+                for i, reserva in enumerate(reservas)
+            ],
+            batch_size=2000,
+        )
+        Incidencia.objects.bulk_create(
+            [
+                Incidencia(
+                    reportante=self.solicitante,
+                    espacio=espacio,
+                    tipo="Equipo",
+                    descripcion=f"Falla reportada en la semana {semana + 1}",
+                    fecha_reportada=_momento(self.inicio + timedelta(weeks=semana), 9),
+                )
+                for semana in range(self.semanas)
+                for espacio in self.lista_espacios
+            ],
+            batch_size=2000,
+        )
+        # Los datos no se confirman, asi que las senales de la cache de referencia no corren.
+        _invalidar_referencias()
+
+    # Operaciones -------------------------------------------------------------
+
+    def _llamar(self, vista, metodo, ruta, datos=None, **kwargs):
+        peticion = getattr(self.factory, metodo)(ruta, datos, format="json")
+        force_authenticate(peticion, user=self.admin)
+        respuesta = vista(peticion, **kwargs)
+        respuesta.render()
+        if respuesta.status_code >= 400:
+            raise ErrorBenchmark(f"{metodo.upper()} {ruta} respondio {respuesta.status_code}: {respuesta.data}")
+        return respuesta
+
+    def _rango(self):
+        fin = self.inicio + timedelta(weeks=max(self.semanas, 1)) - timedelta(days=1)
+        return {"inicio": self.inicio.isoformat(), "fin": fin.isoformat()}
+
+    def op_crear_recurrente(self, _):
+        dia, desde, hasta = _franja(FRANJA_RECURRENTE)
+        fecha = self.inicio + timedelta(days=dia)
+        datos = {
+            "espacio": str(self.lista_espacios[0].pk),
+            "fecha_inicio": _momento(fecha, desde).isoformat(),
+            "fecha_fin": _momento(fecha, hasta).isoformat(),
+            "motivo": "Benchmark recurrente",
+            "recurrente": True,
+            "metadata": {"recurrencia": {"semanas": SEMANAS_RECURRENCIA}},
+        }
+        return self._llamar(ReservaViewSet.as_view({"post": "create"}), "post", "/api/reservas/", datos)
+
+    def preparar_aprobar(self):
+        domingo = self.inicio + timedelta(days=6)
+        inicio, fin = _momento(domingo, 10), _momento(domingo, 12)
+        pendientes = Reserva.objects.bulk_create(
+            [
+                Reserva(
+                    usuario=self.solicitante,
+                    espacio=self.lista_espacios[0],
+                    fecha_inicio=inicio,
+                    fecha_fin=fin,
+                    periodo=(inicio, fin),
+                    estado=EstadoReserva.PENDIENTE,
+                    motivo="Benchmark pendiente",
+                )
+                for _ in range(self.conflictos + 1)
+            ]
+        )
+        return pendientes[0].pk
+
+    def op_aprobar(self, pk):
+        vista = ReservaViewSet.as_view({"post": "aprobar"})
+        return self._llamar(vista, "post", f"/api/reservas/{pk}/aprobar/", {}, pk=pk)
+
+    def op_aperturas(self, _):
+        martes = self.inicio + timedelta(days=1)
+        vista = ReservaViewSet.as_view({"get": "aperturas"})
+        return self._llamar(vista, "get", "/api/reservas/aperturas/", {"fecha": martes.isoformat()})
+
+    def op_reporte_aperturas(self, _):
+        return self._llamar(ReporteAperturasAPIView.as_view(), "get", "/api/reportes/aperturas/", self._rango())
+
+    def op_reporte_ausencias(self, _):
+        return self._llamar(ReporteAusenciasAPIView.as_view(), "get", "/api/reportes/ausencias/", self._rango())
+
+    def op_reporte_incidencias(self, _):
+        return self._llamar(ReporteIncidenciasAPIView.as_view(), "get", "/api/reportes/incidencias/", self._rango())
+
+    def op_disponibilidad(self, _):
+        vista = ReservaViewSet.as_view({"get": "list"})
+        return self._llamar(vista, "get", "/api/reservas/", {"modo": "disponibilidad"})
+
+    # Medicion ----------------------------------------------------------------
+
+    def medir(self, nombre):
+        preparar = getattr(self, f"preparar_{nombre}", None)
+        operacion = getattr(self, f"op_{nombre}")
+        muestras, consultas = [], []
+        for repeticion in range(self.repeticiones + 1):
+            punto = transaction.savepoint()
+            try:
+                argumento = preparar() if preparar else None
+                with CaptureQueriesContext(connection) as capturadas:
+                    comienzo = time.perf_counter()
+                    operacion(argumento)
+                    duracion = time.perf_counter() - comienzo
+            finally:
+                transaction.savepoint_rollback(punto)
+                _invalidar_referencias()
+            if repeticion:
+                muestras.append(duracion * 1000)
+                consultas.append(len(capturadas))
+        return resumir(muestras, consultas)
+
+    def ejecutar(self, operaciones=OPERACIONES):
+        resultado = {
+            "tamano": {
+                "espacios": self.espacios,
+                "semanas": self.semanas,
+                "clases": self.clases,
+                "conflictos": self.conflictos,
+            },
+            "operaciones": {},
+        }
+        with transaction.atomic():
+            comienzo = time.perf_counter()
+            self.preparar()
+            resultado["preparacion_s"] = round(time.perf_counter() - comienzo, 3)
+            resultado["filas"] = {
+                "reservas": Reserva.objects.filter(espacio__in=self.lista_espacios).count(),
+                "bloques_clase": self.espacios * self.clases,
+            }
+            for nombre in operaciones:
+                resultado["operaciones"][nombre] = self.medir(nombre)
+            transaction.set_rollback(True)
+        _invalidar_referencias()
+        return resultado
+
+
+def _invalidar_referencias():
+    for conjunto in (ESPACIOS, DISPONIBILIDAD, PLANTILLAS):
+        conjunto.invalidar()
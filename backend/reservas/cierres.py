@@ -0,0 +1,262 @@
+"""
+Reglas compartidas para el cierre de aulas y la deteccion de ausencias.
+
+Las usan tanto las acciones del conserje en ``ReservaViewSet`` como el barrido
+periodico (``python manage.py barrer_aperturas``), de modo que un cierre
+automatico deja exactamente la misma huella que uno registrado a mano.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from config import metricas
+from notificaciones import outbox
+from notificaciones.models import AudienciaNotificacion
+from .models import EstadoAsistencia, MotivoCierre, RegistroApertura, Reserva
+
+
+logger = logging.getLogger(__name__)
+
+# Ventanas operativas (relativas a la hora programada / fin de la reserva).
+VENTANA_APERTURA_ANTES = timedelta(minutes=20)
+VENTANA_APERTURA_DESPUES = timedelta(minutes=5)
+VENTANA_ASISTENCIA = timedelta(minutes=30)
+VENTANA_CIERRE = timedelta(minutes=5)
+
+CIERRE_UPDATE_FIELDS = [
+    "cierre_registrado",
+    "cierre_registrado_en",
+    "cierre_registrado_por",
+    "cierre_motivo",
+    "cierre_observaciones",
+    "metadata",
+]
+
+ASISTENCIA_UPDATE_FIELDS = [
+    "asistencia_estado",
+    "asistencia_registrada_en",
+    "hora_llegada_real",
+    "ausencia_notificada",
+    "metadata",
+]
+
+
+def nombre_solicitante(reserva):
+    usuario = getattr(reserva, "usuario", None)
+    if not usuario:
+        return None
+    nombre = f"{usuario.first_name} {usuario.last_name}".strip()
+    return nombre or usuario.username
+
+
+def datos_ausencia(reserva, profesor_solicitante):
+    """Mensaje y metadata de la notificacion de ausencia para administradores."""
+    aula = reserva.espacio.nombre if reserva.espacio else "Espacio sin nombre"
+    mensaje = (
+        f"Ausencia detectada en {aula}. "
+        "El profesor o responsable no se presento a la hora programada."
+    )
+    metadata = {
+        "reserva_id": str(reserva.id),
+        "espacio_id": str(reserva.espacio_id) if reserva.espacio_id else None,
+        "aula": aula,
+        "hora_programada": reserva.fecha_inicio.isoformat()
+        if reserva.fecha_inicio
+        else None,
+        "profesor": profesor_solicitante,
+        "evento": "ausencia",
+    }
+    return mensaje, metadata
+
+
+def aplicar_cierre(registro, motivo, observaciones, user, hora_cierre, automatico=False):
+    """
+    Marca ``registro`` (y la metadata de su reserva) como cerrado sin guardar.
+
+    Quien llama decide como persistir: ``save`` individual desde la vista o
+    ``bulk_update`` desde el barrido.
+    """
+    registro.cierre_registrado = True
+    registro.cierre_registrado_en = hora_cierre
+    registro.cierre_registrado_por = (
+        user if getattr(user, "is_authenticated", False) else None
+    )
+    registro.cierre_motivo = motivo
+    registro.cierre_observaciones = observaciones or ""
+
+    metadata_registro = registro.metadata or {}
+    cierre_meta = metadata_registro.setdefault("cierre", {})
+    cierre_meta.update(
+        {
+            "motivo": motivo,
+            "motivo_display": registro.get_cierre_motivo_display(),
+            "registrado_en": hora_cierre.isoformat(),
+            "registrado_por": getattr(registro.cierre_registrado_por, "id", None),
+            "observaciones": registro.cierre_observaciones,
+            "automatico": automatico,
+        }
+    )
+    metadata_registro["estado_aula"] = "cerrada"
+    registro.metadata = metadata_registro
+
+    reserva = registro.reserva
+    reserva_metadata = reserva.metadata or {}
+    reserva_metadata.update(
+        {
+            "estado_aula": "cerrada",
+            "cierre_registrado_en": hora_cierre.isoformat(),
+            "cierre_motivo": motivo,
+        }
+    )
+    reserva.metadata = reserva_metadata
+
+
+def _registros_bloqueados(filtros, lote):
+    # SKIP LOCKED: dos barridos simultaneos (o un barrido y un conserje que
+    # esta guardando ese registro) nunca procesan la misma fila.
+    return list(
+        RegistroApertura.objects.select_for_update(skip_locked=True, of=("self",))
+        .filter(filtros)
+        .select_related("reserva__espacio", "reserva__usuario")
+        .order_by("fecha_programada")[:lote]
+    )
+
+
+def _guardar_lote(registros, campos_registro, ahora):
+    RegistroApertura.objects.bulk_update(registros, campos_registro)
+    reservas = {registro.reserva_id: registro.reserva for registro in registros}
+    for reserva in reservas.values():
+        reserva.actualizado_en = ahora
+    Reserva.objects.bulk_update(
+        list(reservas.values()), ["metadata", "actualizado_en"]
+    )
+
+
+def _marcar_ausencias(ahora, lote):
+    filtros = Q(
+        completado=True,
+        cierre_registrado=False,
+        asistencia_estado__isnull=True,
+        fecha_programada__lt=ahora - VENTANA_ASISTENCIA,
+    )
+    with transaction.atomic():
+        registros = _registros_bloqueados(filtros, lote)
+        if not registros:
+            return 0
+
+        eventos = []
+        observaciones = "Cierre automatico: no se registro asistencia en la ventana."
+        for registro in registros:
+            reserva = registro.reserva
+            registro.asistencia_estado = EstadoAsistencia.AUSENTE
+            registro.asistencia_registrada_en = ahora
+            registro.hora_llegada_real = None
+            metadata_registro = registro.metadata or {}
+            asistencia_meta = metadata_registro.setdefault("asistencia", {})
+            asistencia_meta.update(
+                {
+                    "estado": EstadoAsistencia.AUSENTE,
+                    "registrado_en": ahora.isoformat(),
+                    "llegada_real": None,
+                    "observaciones": asistencia_meta.get("observaciones") or observaciones,
+                    "ausencia": True,
+                    "aula_cerrada": True,
+                    "automatico": True,
+                }
+            )
+            registro.metadata = metadata_registro
+
+            if not registro.ausencia_notificada:
+                profesor = (
+                    (registro.metadata or {}).get("profesor_solicitante")
+                    or nombre_solicitante(reserva)
+                )
+                mensaje, metadata_detalle = datos_ausencia(reserva, profesor)
+                eventos.append(
+                    outbox.evento(
+                        mensaje,
+                        metadata=metadata_detalle,
+                        audiencia=AudienciaNotificacion.ADMINS,
+                    )
+                )
+                registro.ausencia_notificada = True
+
+            aplicar_cierre(
+                registro,
+                MotivoCierre.AUSENCIA,
+                observaciones,
+                None,
+                hora_cierre=ahora,
+                automatico=True,
+            )
+
+        _guardar_lote(
+            registros,
+            ASISTENCIA_UPDATE_FIELDS
+            + [campo for campo in CIERRE_UPDATE_FIELDS if campo != "metadata"],
+            ahora,
+        )
+        outbox.encolar_lote(eventos)
+        metricas.contar_evento("ausencia_automatica", len(registros))
+    return len(registros)
+
+
+def _cerrar_vencidos(ahora, lote):
+    filtros = Q(
+        completado=True,
+        cierre_registrado=False,
+        reserva__fecha_fin__lt=ahora - VENTANA_CIERRE,
+    )
+    with transaction.atomic():
+        registros = _registros_bloqueados(filtros, lote)
+        if not registros:
+            return 0
+        for registro in registros:
+            aplicar_cierre(
+                registro,
+                MotivoCierre.FIN_CLASE,
+                "Cierre automatico al finalizar la reserva.",
+                None,
+                hora_cierre=ahora,
+                automatico=True,
+            )
+        _guardar_lote(registros, CIERRE_UPDATE_FIELDS, ahora)
+        metricas.contar_evento("cierre_automatico", len(registros))
+    return len(registros)
+
+
+def barrer_registros_vencidos(ahora=None, lote=200):
+    """
+    Cierra aulas y marca ausencias que quedaron pendientes en ``RegistroApertura``.
+
+    Procesa lotes de ``lote`` filas hasta agotar los pendientes y devuelve
+    ``(ausencias, cierres)``. Es idempotente: cada fila procesada deja de
+    cumplir los filtros, asi que repetir el barrido no vuelve a tocarla.
+    """
+    ahora = ahora or timezone.now()
+
+    ausencias = 0
+    while True:
+        procesados = _marcar_ausencias(ahora, lote)
+        ausencias += procesados
+        if procesados < lote:
+            break
+
+    cierres = 0
+    while True:
+        procesados = _cerrar_vencidos(ahora, lote)
+        cierres += procesados
+        if procesados < lote:
+            break
+
+    if ausencias or cierres:
+        logger.info(
+            "Barrido de aperturas: %s ausencias marcadas, %s aulas cerradas.",
+            ausencias,
+            cierres,
+        )
+    return ausencias, cierres
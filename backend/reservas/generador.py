@@ -0,0 +1,430 @@
+"""
+Generador de datos sinteticos para pruebas de escala.
+
+Todo sale de un ``random.Random(semilla)``: con la misma semilla y los mismos
+parametros se obtienen las mismas filas (incluidos los UUID). Los roles son los
+de ``scripts/create_role_users.py``; los espacios, su horario base y los
+bloques ``[CLASE]`` siguen la forma de ``create_default_spaces.py``.
+
+Usuarios, espacios y disponibilidad se cargan con ``bulk_create``; las tablas
+grandes (reservas, aperturas, incidencias y notificaciones) con ``COPY``, que
+ademas permite fijar ``creado_en`` (``auto_now_add`` lo pisaria). Nada de esto
+emite senales, asi que al final se recalcula la busqueda de incidencias y se
+invalidan las caches de referencia.
+
+Las filas generadas se reconocen por el prefijo ``gen<semilla>`` en el codigo
+de espacio y el nombre de usuario, y por ``metadata.generado`` en reservas,
+incidencias y notificaciones.
+"""
+
+import csv
+import io
+import json
+import random
+import uuid
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from config.lotes import procesar_por_lotes
+from espacios.models import DisponibilidadEspacio, Espacio, TipoEspacio, UbicacionEspacio
+from espacios.plantillas import PLANTILLAS
+from espacios.referencias import DISPONIBILIDAD, ESPACIOS
+from incidencias.busqueda import actualizar_busqueda
+from incidencias.models import EstadoIncidencia, Incidencia, IncidenciaRespuesta
+from notificaciones.models import Notificacion, TipoNotificacion
+from usuarios.models import Rol, Usuario
+from usuarios.referencias import ROLES
+
+from .models import EstadoAsistencia, EstadoReserva, RegistroApertura, Reserva
+from .serializer import SEMESTER_START
+
+
+FRANJAS = [(6, 8), (8, 10), (10, 12), (12, 14), (14, 16), (16, 18), (18, 20)]
+# Probabilidad relativa de uso por dia (lunes..domingo) y por franja (hora de inicio).
+PESO_DIA = [1.0, 1.0, 1.0, 1.0, 0.85, 0.3, 0.05]
+PESO_HORA = {6: 0.35, 8: 1.0, 10: 1.0, 12: 0.45, 14: 0.9, 16: 0.8, 18: 0.55}
+OCUPACION_BASE = 0.55
+
+PESO_ROL = {"profesor": 85, "conserje": 5, "secretaria": 4, "laboratorista": 4, "admin": 2}
+PESO_TIPO_ESPACIO = {TipoEspacio.AULA: 6, TipoEspacio.LABORATORIO: 3, TipoEspacio.SALA: 1}
+PESO_ESTADO_RESERVA = {EstadoReserva.APROBADO: 75, EstadoReserva.PENDIENTE: 15, EstadoReserva.RECHAZADO: 10}
+PESO_ASISTENCIA = {EstadoAsistencia.PRESENTE: 80, EstadoAsistencia.TARDE: 12, EstadoAsistencia.AUSENTE: 8}
+PESO_TIPO_NOTIFICACION = {
+    TipoNotificacion.RESERVA: 45,
+    TipoNotificacion.AGENDA: 30,
+    TipoNotificacion.INCIDENCIA: 15,
+    TipoNotificacion.SISTEMA: 10,
+}
+
+NOMBRES = ["Ana", "Luis", "Maria", "Carlos", "Laura", "Andres", "Diana", "Jorge", "Paula", "Felipe", "Sofia", "Juan"]
+APELLIDOS = ["Diaz", "Gomez", "Rodriguez", "Martinez", "Lopez", "Garcia", "Perez", "Sanchez", "Ramirez", "Torres"]
+TIPOS_INCIDENCIA = ["Proyector", "Aire acondicionado", "Conectividad", "Mobiliario", "Limpieza", "Equipo de computo"]
+FALLAS = [
+    "no enciende",
+    "hace ruido",
+    "funciona de forma intermitente",
+    "esta danado",
+    "no responde",
+    "presenta olor a quemado",
+]
+DETALLES = [
+    "desde la primera hora",
+    "durante la clase",
+    "despues del cambio de grupo",
+    "al conectar el portatil",
+    "en la zona del fondo",
+]
+MOTIVOS = ["Clase extra", "Tutoria", "Sustentacion", "Reunion de grupo", "Practica de laboratorio", "Taller"]
+
+CAMPOS_RESERVA = (
+    "id", "usuario_id", "espacio_id", "fecha_inicio", "fecha_fin", "periodo", "estado", "motivo",
+    "cantidad_asistentes", "requiere_llaves", "recurrente", "creado_por_id", "creado_en", "actualizado_en", "metadata",
+)
+CAMPOS_REGISTRO = (
+    "id", "reserva_id", "espacio_id", "registrado_por_id", "fecha_programada", "registrado_en", "completado",
+    "completado_en", "asistencia_estado", "asistencia_registrada_en", "hora_llegada_real", "ausencia_notificada",
+    "cierre_registrado", "metadata",
+)
+CAMPOS_INCIDENCIA = (
+    "id", "reportante_id", "espacio_id", "tipo", "descripcion", "estado", "fecha_reportada", "fecha_cierre", "metadata",
+)
+CAMPOS_NOTIFICACION = (
+    "id", "tipo", "destinatario_id", "remitente_id", "mensaje", "metadata", "enviado", "leido", "enviado_en",
+    "creado_en",
+)
+
+
+class ErrorGeneracion(Exception):
+    pass
+
+
+def _elegir(rng, pesos):
+    return rng.choices(list(pesos), weights=list(pesos.values()))[0]
+
+
+def _copiar(modelo, campos, filas, lote):
+    """Carga ``filas`` (tuplas en el orden de ``campos``) con COPY, de ``lote`` en ``lote``."""
+    sql = f"COPY {modelo._meta.db_table} ({', '.join(campos)}) FROM STDIN WITH (FORMAT csv)"
+    total = 0
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    pendientes = 0
+
+    def volcar():
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.cursor.copy_expert(sql, buffer)
+        buffer.seek(0)
+        buffer.truncate()
+
+    for fila in filas:
+        # En CSV, COPY lee un campo vacio sin comillas como NULL; el generador no produce textos vacios.
+        escritor.writerow(fila)
+        pendientes += 1
+        total += 1
+        if pendientes >= lote:
+            volcar()
+            pendientes = 0
+    if pendientes:
+        volcar()
+    return total
+
+
+def _rango(inicio, fin):
+    return f'["{inicio.isoformat()}","{fin.isoformat()}")'
+
+
+class GeneradorDatos:
+    def __init__(
+        self,
+        semilla=1,
+        espacios=300,
+        clases=12,
+        usuarios=3000,
+        reservas=200000,
+        incidencias=100000,
+        notificaciones=200000,
+        desde=SEMESTER_START,
+        lote=5000,
+        salida=None,
+    ):
+        self.rng = random.Random(semilla)
+        self.semilla = semilla
+        self.prefijo = f"gen{semilla}"
+        self.n_espacios = espacios
+        self.n_clases = clases
+        self.n_usuarios = usuarios
+        self.n_reservas = reservas
+        self.n_incidencias = incidencias
+        self.n_notificaciones = notificaciones
+        self.desde = desde
+        self.lote = lote
+        self.salida = salida
+        self.tz = timezone.get_current_timezone()
+        self.marca = json.dumps({"generado": semilla})
+
+    def _uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _momento(self, fecha, hora, minuto=0):
+        return timezone.make_aware(datetime.combine(fecha, time(hora, minuto)), self.tz)
+
+    def _informar(self, mensaje):
+        if self.salida:
+            self.salida(mensaje)
+
+    # Pasos -------------------------------------------------------------------
+
+    def roles(self):
+        from scripts.create_role_users import ROLE_DEFINITIONS
+
+        self.roles_por_nombre = {}
+        for definicion in ROLE_DEFINITIONS:
+            rol, _ = Rol.objects.get_or_create(
+                nombre=definicion["name"],
+                defaults={"descripcion": definicion["descripcion"], "permisos": definicion["permisos"]},
+            )
+            self.roles_por_nombre[rol.nombre] = rol
+        return len(self.roles_por_nombre)
+
+    def usuarios(self):
+        contrasena = make_password(None)
+        nombres_rol = list(PESO_ROL)
+        pesos_rol = list(PESO_ROL.values())
+        filas = []
+        for i in range(self.n_usuarios):
+            rol = self.roles_por_nombre.get(self.rng.choices(nombres_rol, weights=pesos_rol)[0])
+            nombre, apellido = self.rng.choice(NOMBRES), self.rng.choice(APELLIDOS)
+            filas.append(
+                Usuario(
+                    username=f"{self.prefijo}_{i:06d}",
+                    email=f"{self.prefijo}_{i:06d}@uisrooms.test",
+                    first_name=nombre,
+                    last_name=apellido,
+                    password=contrasena,
+                    rol=rol,
+                    cargo=rol.nombre.capitalize() if rol else "",
+                    date_joined=self._momento(self.desde - timedelta(days=self.rng.randint(0, 720)), 8),
+                )
+            )
+        Usuario.objects.bulk_create(filas, batch_size=self.lote)
+        self.usuarios_ids = list(
+            Usuario.objects.filter(username__startswith=f"{self.prefijo}_").order_by("username").values_list("id", "rol__nombre")
+        )
+        self.solicitantes = [pk for pk, rol in self.usuarios_ids if rol in (None, "profesor")] or [
+            pk for pk, _ in self.usuarios_ids
+        ]
+        self.gestores = [pk for pk, rol in self.usuarios_ids if rol in ("admin", "conserje", "secretaria", "laboratorista")]
+        self.gestores = self.gestores or self.solicitantes
+        return len(self.usuarios_ids)
+
+    def espacios(self):
+        from create_default_spaces import DEFAULT_SPACES
+
+        espacios = []
+        for i in range(self.n_espacios):
+            modelo = DEFAULT_SPACES[i % len(DEFAULT_SPACES)]
+            tipo = _elegir(self.rng, PESO_TIPO_ESPACIO)
+            espacios.append(
+                Espacio(
+                    id=self._uuid(),
+                    codigo=f"{self.prefijo}-{i:04d}",
+                    nombre=f"{self.prefijo}-{i:04d} - {TipoEspacio(tipo).label[:-1]}",
+                    descripcion=modelo["descripcion"],
+                    tipo=tipo,
+                    capacidad=self.rng.choice([20, 25, 30, 35, 40, 60]),
+                    ubicacion=self.rng.choice(UbicacionEspacio.values),
+                    recursos=list(modelo["recursos"]),
+                )
+            )
+        Espacio.objects.bulk_create(espacios, batch_size=self.lote)
+        self.espacios_ids = [espacio.id for espacio in espacios]
+        return len(espacios)
+
+    def disponibilidades(self):
+        """Horario base de cada espacio mas sus bloques ``[CLASE]`` semanales."""
+        from create_default_spaces import _build_class_observation, _default_availability
+
+        base = list(_default_availability())
+        franjas_semana = [(dia, desde, hasta) for dia in range(5) for desde, hasta in FRANJAS]
+        pesos_franja = [PESO_DIA[dia] * PESO_HORA[desde] for dia, desde, _ in franjas_semana]
+        disponibilidades = []
+        self.clases_por_espacio = {}
+        for espacio_id in self.espacios_ids:
+            disponibilidades.extend(DisponibilidadEspacio(id=self._uuid(), espacio_id=espacio_id, **item) for item in base)
+            cantidad = min(max(self.rng.randint(self.n_clases // 2, self.n_clases * 3 // 2), 0), len(franjas_semana))
+            ocupadas = set()
+            while len(ocupadas) < cantidad:
+                ocupadas.add(self.rng.choices(franjas_semana, weights=pesos_franja)[0])
+            self.clases_por_espacio[espacio_id] = {(dia, desde) for dia, desde, _ in ocupadas}
+            for dia, desde, hasta in sorted(ocupadas):
+                disponibilidades.append(
+                    DisponibilidadEspacio(
+                        id=self._uuid(),
+                        espacio_id=espacio_id,
+                        dia_semana=dia,
+                        hora_inicio=time(desde),
+                        hora_fin=time(hasta),
+                        recurrente=True,
+                        es_bloqueo=True,
+                        observaciones=_build_class_observation(
+                            str(self.rng.randint(20000, 41999)),
+                            f"{self.rng.choice('ABCDEFG')}{self.rng.randint(1, 9)}",
+                        ),
+                    )
+                )
+        DisponibilidadEspacio.objects.bulk_create(disponibilidades, batch_size=self.lote)
+        return len(disponibilidades)
+
+    def _franjas_reservadas(self):
+        """Recorre semana a semana las franjas libres y decide cuales se reservan."""
+        semana = 0
+        while True:
+            lunes = self.desde + timedelta(weeks=semana)
+            for dia in range(7):
+                fecha = lunes + timedelta(days=dia)
+                for espacio_id in self.espacios_ids:
+                    clases = self.clases_por_espacio[espacio_id]
+                    for desde, hasta in FRANJAS:
+                        if (dia, desde) in clases:
+                            continue
+                        if self.rng.random() < OCUPACION_BASE * PESO_DIA[dia] * PESO_HORA[desde]:
+                            yield espacio_id, fecha, desde, hasta
+            semana += 1
+
+    def reservas(self):
+        filas = []
+        self.aprobadas = []
+        self.ultima_fecha = self.desde
+        for espacio_id, fecha, desde, hasta in self._franjas_reservadas():
+            if len(filas) >= self.n_reservas:
+                break
+            inicio = self._momento(fecha, desde)
+            fin = self._momento(fecha, hasta if self.rng.random() < 0.7 else desde + 1)
+            estado = _elegir(self.rng, PESO_ESTADO_RESERVA)
+            usuario_id = self.rng.choice(self.solicitantes)
+            creado = inicio - timedelta(days=self.rng.randint(1, 21), minutes=self.rng.randint(0, 600))
+            pk = self._uuid()
+            filas.append(
+                (
+                    pk, usuario_id, espacio_id, inicio, fin, _rango(inicio, fin), estado, self.rng.choice(MOTIVOS),
+                    self.rng.randint(5, 40), self.rng.random() < 0.3, False, usuario_id, creado, creado, self.marca,
+                )
+            )
+            if estado == EstadoReserva.APROBADO:
+                self.aprobadas.append((pk, espacio_id, inicio, fin))
+            self.ultima_fecha = fecha
+        # Las aperturas con asistencia llegan hasta dos tercios del periodo generado.
+        self.corte = self._momento(self.desde + (self.ultima_fecha - self.desde) * 2 / 3, 0)
+        return _copiar(Reserva, CAMPOS_RESERVA, filas, self.lote)
+
+    def _filas_registros(self):
+        for reserva_id, espacio_id, inicio, fin in self.aprobadas:
+            pasada = inicio < self.corte
+            asistencia = _elegir(self.rng, PESO_ASISTENCIA) if pasada else None
+            llegada = None
+            if asistencia == EstadoAsistencia.PRESENTE:
+                llegada = inicio + timedelta(minutes=self.rng.randint(-10, 5))
+            elif asistencia == EstadoAsistencia.TARDE:
+                llegada = inicio + timedelta(minutes=self.rng.randint(16, 40))
+            yield (
+                self._uuid(), reserva_id, espacio_id, self.rng.choice(self.gestores) if pasada else None, inicio,
+                inicio - timedelta(days=1), pasada, inicio - timedelta(minutes=self.rng.randint(0, 15)) if pasada else None,
+                asistencia, llegada or (inicio + timedelta(minutes=30) if pasada else None), llegada,
+                asistencia == EstadoAsistencia.AUSENTE, pasada, self.marca,
+            )
+
+    def registros(self):
+        return _copiar(RegistroApertura, CAMPOS_REGISTRO, self._filas_registros(), self.lote)
+
+    def _momento_aleatorio(self):
+        dias = max((self.ultima_fecha - self.desde).days, 1)
+        while True:
+            fecha = self.desde + timedelta(days=self.rng.randrange(dias))
+            if self.rng.random() < PESO_DIA[fecha.weekday()]:
+                desde = self.rng.choices(list(PESO_HORA), weights=list(PESO_HORA.values()))[0]
+                return self._momento(fecha, desde + self.rng.randint(0, 1), self.rng.randint(0, 59))
+
+    def _filas_incidencias(self, ids):
+        for pk in ids:
+            tipo = self.rng.choice(TIPOS_INCIDENCIA)
+            reportada = self._momento_aleatorio()
+            estado = EstadoIncidencia.CERRADA if reportada < self.corte and self.rng.random() < 0.85 else self.rng.choice(
+                [EstadoIncidencia.ABIERTA, EstadoIncidencia.EN_PROCESO]
+            )
+            cierre = reportada + timedelta(hours=self.rng.randint(2, 96)) if estado == EstadoIncidencia.CERRADA else None
+            yield (
+                pk, self.rng.choice(self.solicitantes), self.rng.choice(self.espacios_ids), tipo,
+                f"El {tipo.lower()} {self.rng.choice(FALLAS)} {self.rng.choice(DETALLES)}.", estado, reportada, cierre,
+                self.marca,
+            )
+
+    def incidencias(self):
+        ids = [self._uuid() for _ in range(self.n_incidencias)]
+        total = _copiar(Incidencia, CAMPOS_INCIDENCIA, self._filas_incidencias(ids), self.lote)
+        # Un tercio recibe respuesta del personal; pocas filas, bulk_create basta.
+        respuestas = [
+            IncidenciaRespuesta(
+                id=self._uuid(),
+                incidencia_id=pk,
+                autor_id=self.rng.choice(self.gestores),
+                mensaje=f"Se reviso el equipo: {self.rng.choice(['se reemplazo', 'se reinicio', 'se escalo a mantenimiento'])}.",
+                fecha=self._momento_aleatorio(),
+            )
+            for pk in ids
+            if self.rng.random() < 0.33
+        ]
+        IncidenciaRespuesta.objects.bulk_create(respuestas, batch_size=self.lote)
+        procesar_por_lotes(
+            Incidencia.objects.filter(metadata__generado=self.semilla), actualizar_busqueda, lote=self.lote, pausa=0
+        )
+        return total
+
+    def _filas_notificaciones(self):
+        tipos = list(PESO_TIPO_NOTIFICACION)
+        pesos = list(PESO_TIPO_NOTIFICACION.values())
+        mensajes = {
+            TipoNotificacion.RESERVA: "Tu reserva fue actualizada.",
+            TipoNotificacion.AGENDA: "Se registro la apertura de tu aula.",
+            TipoNotificacion.INCIDENCIA: "Hay una novedad en una incidencia que reportaste.",
+            TipoNotificacion.SISTEMA: "Mantenimiento programado de la plataforma.",
+        }
+        for _ in range(self.n_notificaciones):
+            tipo = self.rng.choices(tipos, weights=pesos)[0]
+            creado = self._momento_aleatorio()
+            yield (
+                self._uuid(), tipo, self.rng.choice(self.solicitantes), self.rng.choice(self.gestores),
+                mensajes[tipo], self.marca, True, creado < self.corte and self.rng.random() < 0.8, creado, creado,
+            )
+
+    def notificaciones(self):
+        return _copiar(Notificacion, CAMPOS_NOTIFICACION, self._filas_notificaciones(), self.lote)
+
+    # Orquestacion ------------------------------------------------------------
+
+    def ejecutar(self):
+        if Espacio.objects.filter(codigo__startswith=f"{self.prefijo}-").exists():
+            raise ErrorGeneracion(
+                f"Ya hay datos generados con la semilla {self.semilla}; usa otra semilla o una base limpia."
+            )
+        pasos = (
+            ("roles", self.roles),
+            ("usuarios", self.usuarios),
+            ("espacios", self.espacios),
+            ("disponibilidades", self.disponibilidades),
+            ("reservas", self.reservas),
+            ("registros_apertura", self.registros),
+            ("incidencias", self.incidencias),
+            ("notificaciones", self.notificaciones),
+        )
+        resumen = {}
+        with transaction.atomic():
+            for nombre, paso in pasos:
+                resumen[nombre] = paso()
+                self._informar(f"{nombre}: {resumen[nombre]}")
+        for conjunto in (ESPACIOS, DISPONIBILIDAD, PLANTILLAS, ROLES):
+            conjunto.invalidar()
+        return resumen
@@ -0,0 +1,94 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from reservas.archivo import (
+    SEMESTRES_VIVOS,
+    ErrorArchivo,
+    archivar_semestre,
+    restaurar_semestre,
+    semestres_archivables,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Pasa al archivo las reservas, registros de apertura e historial de los "
+        "semestres cerrados. Los reportes de administracion los siguen leyendo "
+        "desde alli. Pensado para correr al inicio de cada semestre."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--conservar",
+            type=int,
+            default=SEMESTRES_VIVOS,
+            help=(
+                "Semestres anteriores al actual que se mantienen vivos "
+                f"(por defecto {SEMESTRES_VIVOS})."
+            ),
+        )
+        parser.add_argument(
+            "--restaurar",
+            metavar="AAAA-N",
+            help="Devuelve a las tablas vivas el semestre archivado mas reciente (por ejemplo 2025-2).",
+        )
+        parser.add_argument(
+            "--simular",
+            action="store_true",
+            help="Solo lista los semestres que se archivarian.",
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=1000,
+            help="Filas de historial movidas por transaccion (por defecto 1000).",
+        )
+        parser.add_argument(
+            "--pausa",
+            type=float,
+            default=0,
+            help="Segundos de espera entre lotes para repartir la carga.",
+        )
+
+    def handle(self, *args, **options):
+        lote = options["lote"]
+        pausa = options["pausa"]
+        if lote < 1:
+            raise CommandError("--lote debe ser mayor que cero.")
+        if pausa < 0:
+            raise CommandError("--pausa no puede ser negativa.")
+        if options["conservar"] < 0:
+            raise CommandError("--conservar no puede ser negativo.")
+
+        if options["restaurar"]:
+            coincidencia = re.fullmatch(r"(\d{4})-([12])", options["restaurar"])
+            if not coincidencia:
+                raise CommandError("--restaurar espera un semestre con formato AAAA-N (por ejemplo 2025-2).")
+            anio, numero = int(coincidencia.group(1)), int(coincidencia.group(2))
+            try:
+                restaurar_semestre(anio, numero)
+            except ErrorArchivo as exc:
+                raise CommandError(str(exc)) from exc
+            self.stdout.write(f"Semestre {anio}-{numero} restaurado.")
+            return
+
+        with connection.cursor() as cursor:
+            semestres = semestres_archivables(cursor, conservar=options["conservar"])
+        if not semestres:
+            self.stdout.write("No hay semestres para archivar.")
+            return
+
+        for anio, numero in semestres:
+            if options["simular"]:
+                self.stdout.write(f"Se archivaria el semestre {anio}-{numero}.")
+                continue
+            try:
+                reservas, registros, historial = archivar_semestre(anio, numero, lote=lote, pausa=pausa)
+            except ErrorArchivo as exc:
+                raise CommandError(str(exc)) from exc
+            self.stdout.write(
+                f"Semestre {anio}-{numero} archivado: {reservas} reservas, "
+                f"{registros} registros de apertura, {historial} cambios de estado."
+            )
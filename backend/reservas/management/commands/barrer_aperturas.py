@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reservas.cierres import barrer_registros_vencidos
+
+
+class Command(BaseCommand):
+    help = (
+        "Cierra automaticamente las aulas cuya ventana de cierre vencio y marca "
+        "como ausencia las aperturas sin asistencia registrada. Pensado para "
+        "cron o para ejecutarse en bucle con --intervalo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=200,
+            help="Registros procesados por transaccion (por defecto 200).",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=int,
+            default=0,
+            help="Segundos entre barridos. 0 ejecuta un unico barrido.",
+        )
+
+    def handle(self, *args, **options):
+        lote = options["lote"]
+        intervalo = options["intervalo"]
+        if lote < 1:
+            raise CommandError("--lote debe ser mayor que cero.")
+        if intervalo < 0:
+            raise CommandError("--intervalo no puede ser negativo.")
+
+        while True:
+            ausencias, cierres = barrer_registros_vencidos(lote=lote)
+            self.stdout.write(
+                f"Ausencias marcadas: {ausencias}. Aulas cerradas: {cierres}."
+            )
+            if not intervalo:
+                break
+            try:
+                time.sleep(intervalo)
+            except KeyboardInterrupt:
+                break
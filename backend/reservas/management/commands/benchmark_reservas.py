@@ -0,0 +1,106 @@
+import json
+import platform
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from reservas.benchmark import OPERACIONES, Benchmark, ErrorBenchmark
+
+
+def _tamanos(valor):
+    tamanos = []
+    for parte in filter(None, valor.split(",")):
+        try:
+            espacios, semanas, clases = (int(numero) for numero in parte.lower().split("x"))
+        except ValueError:
+            raise CommandError(f"Tamano invalido '{parte}'. Usa ESPACIOSxSEMANASxCLASES, por ejemplo 20x17x10.")
+        if espacios < 1 or semanas < 1 or clases < 0:
+            raise CommandError(f"Tamano invalido '{parte}': espacios y semanas deben ser mayores que cero.")
+        tamanos.append((espacios, semanas, clases))
+    if not tamanos:
+        raise CommandError("Indica al menos un tamano en --tamanos.")
+    return tamanos
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide latencia y numero de consultas de los caminos criticos de reservas "
+        "(recurrente de 17 semanas, aprobar con conflictos, aperturas, reportes y "
+        "disponibilidad) sobre datos sinteticos. Todo corre en una transaccion que "
+        "se revierte al final; pensado para un Postgres local."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tamanos",
+            default="10x4x5",
+            help="Lista de ESPACIOSxSEMANASxCLASES separada por comas (por defecto 10x4x5).",
+        )
+        parser.add_argument(
+            "--repeticiones",
+            type=int,
+            default=10,
+            help="Mediciones por operacion, sin contar el calentamiento (por defecto 10).",
+        )
+        parser.add_argument(
+            "--conflictos",
+            type=int,
+            default=10,
+            help="Reservas pendientes que se cruzan con la que se aprueba (por defecto 10).",
+        )
+        parser.add_argument(
+            "--operaciones",
+            help=f"Subconjunto separado por comas de: {', '.join(OPERACIONES)}.",
+        )
+        parser.add_argument(
+            "--salida",
+            default="benchmark_reservas.json",
+            help="Archivo JSON con los resultados (por defecto benchmark_reservas.json).",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("El benchmark necesita PostgreSQL.")
+        repeticiones = options["repeticiones"]
+        conflictos = options["conflictos"]
+        if repeticiones < 1:
+            raise CommandError("--repeticiones debe ser mayor que cero.")
+        if conflictos < 0:
+            raise CommandError("--conflictos no puede ser negativo.")
+        operaciones = OPERACIONES
+        if options["operaciones"]:
+            operaciones = tuple(nombre.strip() for nombre in options["operaciones"].split(",") if nombre.strip())
+            desconocidas = set(operaciones) - set(OPERACIONES)
+            if desconocidas:
+                raise CommandError(f"Operaciones desconocidas: {', '.join(sorted(desconocidas))}.")
+
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW server_version")
+            version_postgres = cursor.fetchone()[0]
+
+        informe = {
+            "generado_en": datetime.now().astimezone().isoformat(timespec="seconds"),
+            "entorno": {"python": platform.python_version(), "postgres": version_postgres},
+            "repeticiones": repeticiones,
+            "resultados": [],
+        }
+        for espacios, semanas, clases in _tamanos(options["tamanos"]):
+            self.stdout.write(f"Tamano {espacios}x{semanas}x{clases}...")
+            try:
+                resultado = Benchmark(
+                    espacios, semanas, clases, conflictos=conflictos, repeticiones=repeticiones
+                ).ejecutar(operaciones)
+            except ErrorBenchmark as exc:
+                raise CommandError(str(exc))
+            informe["resultados"].append(resultado)
+            for nombre, medida in resultado["operaciones"].items():
+                ms = medida["ms"]
+                self.stdout.write(
+                    f"  {nombre:<22} p50 {ms['p50']:>9.2f} ms  p95 {ms['p95']:>9.2f} ms  "
+                    f"consultas {medida['consultas']['max']}"
+                )
+
+        with open(options["salida"], "w", encoding="utf-8") as archivo:
+            json.dump(informe, archivo, indent=2, ensure_ascii=False)
+        self.stdout.write(f"Resultados en {options['salida']}.")
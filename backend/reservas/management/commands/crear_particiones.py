@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reservas.particiones import SEMESTRES_ADELANTE, asegurar_particiones
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea las particiones semestrales de reservas y registros de apertura "
+        "para el semestre actual y los siguientes. Es idempotente; pensado para "
+        "cron (por ejemplo una vez al mes)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--semestres-adelante",
+            type=int,
+            default=SEMESTRES_ADELANTE,
+            help=f"Semestres futuros a preparar (por defecto {SEMESTRES_ADELANTE}).",
+        )
+
+    def handle(self, *args, **options):
+        adelante = options["semestres_adelante"]
+        if adelante < 0:
+            raise CommandError("--semestres-adelante no puede ser negativo.")
+
+        creadas = asegurar_particiones(adelante=adelante)
+        for nombre in creadas:
+            self.stdout.write(f"Particion creada: {nombre}")
+        self.stdout.write(f"Particiones creadas: {len(creadas)}.")
@@ -0,0 +1,70 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from reservas.generador import ErrorGeneracion, GeneradorDatos
+from reservas.serializer import SEMESTER_START
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos sinteticos de volumen (espacios, clases, usuarios, reservas, "
+        "aperturas, incidencias y notificaciones) a partir de una semilla. La misma "
+        "semilla produce siempre los mismos datos. Usar en una base de pruebas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--semilla", type=int, default=1, help="Semilla del generador (por defecto 1).")
+        parser.add_argument("--espacios", type=int, default=300, help="Espacios a crear (por defecto 300).")
+        parser.add_argument(
+            "--clases",
+            type=int,
+            default=12,
+            help="Bloques [CLASE] semanales promedio por espacio (por defecto 12).",
+        )
+        parser.add_argument("--usuarios", type=int, default=3000, help="Usuarios a crear (por defecto 3000).")
+        parser.add_argument("--reservas", type=int, default=200000, help="Reservas a crear (por defecto 200000).")
+        parser.add_argument(
+            "--incidencias", type=int, default=100000, help="Incidencias a crear (por defecto 100000)."
+        )
+        parser.add_argument(
+            "--notificaciones", type=int, default=200000, help="Notificaciones a crear (por defecto 200000)."
+        )
+        parser.add_argument(
+            "--desde",
+            type=date.fromisoformat,
+            default=SEMESTER_START,
+            help=f"Lunes desde el que se reparten las reservas (por defecto {SEMESTER_START.isoformat()}).",
+        )
+        parser.add_argument("--lote", type=int, default=5000, help="Filas por COPY o bulk_create (por defecto 5000).")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("generar_datos necesita PostgreSQL (usa COPY).")
+        cantidades = ("espacios", "usuarios", "reservas", "incidencias", "notificaciones", "clases")
+        for nombre in cantidades:
+            if options[nombre] < 0:
+                raise CommandError(f"--{nombre} no puede ser negativo.")
+        if options["espacios"] < 1 or options["usuarios"] < 1:
+            raise CommandError("Se necesita al menos un espacio y un usuario.")
+        if options["lote"] < 1:
+            raise CommandError("--lote debe ser mayor que cero.")
+
+        generador = GeneradorDatos(
+            semilla=options["semilla"],
+            espacios=options["espacios"],
+            clases=options["clases"],
+            usuarios=options["usuarios"],
+            reservas=options["reservas"],
+            incidencias=options["incidencias"],
+            notificaciones=options["notificaciones"],
+            desde=options["desde"],
+            lote=options["lote"],
+            salida=self.stdout.write,
+        )
+        try:
+            generador.ejecutar()
+        except ErrorGeneracion as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(f"Datos generados con la semilla {options['semilla']}.")
@@ -1,28 +1,40 @@
 from django.db import migrations
 
+from config.lotes import accion_sql, procesar_por_lotes
+
 
 def mark_horario_reservas(apps, schema_editor):
     Reserva = apps.get_model('reservas', 'Reserva')
-    queryset = Reserva.objects.filter(metadata__horario_id__isnull=False)
-    for reserva in queryset.iterator():
-        metadata = reserva.metadata or {}
-        if metadata.get('es_horario'):
-            continue
-        metadata['es_horario'] = True
-        Reserva.objects.filter(pk=reserva.pk).update(metadata=metadata)
+    tabla = Reserva._meta.db_table
+    procesar_por_lotes(
+        Reserva.objects.using(schema_editor.connection.alias).filter(metadata__horario_id__isnull=False),
+        accion_sql(
+            f"""
+            UPDATE {tabla} SET metadata = coalesce(metadata, '{{}}'::jsonb) || '{{"es_horario": true}}'::jsonb
+            WHERE id = ANY(%(ids)s) AND NOT coalesce(metadata @> '{{"es_horario": true}}'::jsonb, false)
+            """,
+            using=schema_editor.connection.alias,
+        ),
+        punto_control='reservas.0009.marcar_horario',
+    )
 
 
 def unmark_horario_reservas(apps, schema_editor):
     Reserva = apps.get_model('reservas', 'Reserva')
-    queryset = Reserva.objects.filter(metadata__es_horario=True)
-    for reserva in queryset.iterator():
-        metadata = reserva.metadata or {}
-        if 'es_horario' in metadata:
-            metadata.pop('es_horario', None)
-            Reserva.objects.filter(pk=reserva.pk).update(metadata=metadata)
+    tabla = Reserva._meta.db_table
+    procesar_por_lotes(
+        Reserva.objects.using(schema_editor.connection.alias).filter(metadata__has_key='es_horario'),
+        accion_sql(
+            f"UPDATE {tabla} SET metadata = metadata - 'es_horario' WHERE id = ANY(%(ids)s)",
+            using=schema_editor.connection.alias,
+        ),
+        punto_control='reservas.0009.desmarcar_horario',
+    )
 
 
 class Migration(migrations.Migration):
+    # Cada lote se confirma por separado (ver config/lotes.py).
+    atomic = False
 
     dependencies = [
         ('reservas', '0008_alter_reserva_reservas_no_solapamiento'),
@@ -1,28 +1,46 @@
 from django.db import migrations
 
+from config.lotes import accion_sql, procesar_por_lotes
+
+
+COMENTARIO_BACKFILL = 'Solicitud creada (backfill)'
+
 
 def backfill_historial(apps, schema_editor):
     Reserva = apps.get_model('reservas', 'Reserva')
     ReservaHistorial = apps.get_model('reservas', 'ReservaEstadoHistorial')
-
-    for reserva in Reserva.objects.all():
-        if ReservaHistorial.objects.filter(reserva=reserva).exists():
-            continue
-        ReservaHistorial.objects.create(
-            reserva=reserva,
-            estado_anterior=None,
-            estado_nuevo=reserva.estado,
-            cambiado_por=reserva.creado_por,
-            comentario='Solicitud creada (backfill)',
-        )
+    alias = schema_editor.connection.alias
+    procesar_por_lotes(
+        Reserva.objects.using(alias).all(),
+        accion_sql(
+            f"""
+            INSERT INTO {ReservaHistorial._meta.db_table}
+                (id, reserva_id, estado_anterior, estado_nuevo, cambiado_por_id, comentario, fecha)
+            SELECT gen_random_uuid(), r.id, NULL, r.estado, r.creado_por_id, %(comentario)s, now()
+            FROM {Reserva._meta.db_table} r
+            WHERE r.id = ANY(%(ids)s)
+              AND NOT EXISTS (SELECT 1 FROM {ReservaHistorial._meta.db_table} h WHERE h.reserva_id = r.id)
+            """,
+            {'comentario': COMENTARIO_BACKFILL},
+            using=alias,
+        ),
+        punto_control='reservas.0012.historial',
+    )
 
 
 def reverse_backfill(apps, schema_editor):
     ReservaHistorial = apps.get_model('reservas', 'ReservaEstadoHistorial')
-    ReservaHistorial.objects.filter(comentario='Solicitud creada (backfill)').delete()
+    alias = schema_editor.connection.alias
+    procesar_por_lotes(
+        ReservaHistorial.objects.using(alias).filter(comentario=COMENTARIO_BACKFILL),
+        lambda ids: ReservaHistorial.objects.using(alias).filter(pk__in=ids).delete()[0],
+        punto_control='reservas.0012.revertir_historial',
+    )
 
 
 class Migration(migrations.Migration):
+    # Cada lote se confirma por separado (ver config/lotes.py).
+    atomic = False
 
     dependencies = [
         ('reservas', '0011_remove_reserva_reservas_no_solapamiento'),
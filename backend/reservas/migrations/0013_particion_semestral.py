@@ -0,0 +1,78 @@
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from reservas.particiones import TABLAS, desparticionar, particionar
+
+# Copia fija de models.DURACION_MAXIMA_RESERVA al momento de esta migracion.
+DURACION_MAXIMA = datetime.timedelta(days=31)
+
+
+def verificar_duraciones(apps, schema_editor):
+    # solapa() acota fecha_inicio suponiendo este maximo; una reserva mas larga dejaria
+    # de contar en los choques, asi que hay que corregirla antes de migrar.
+    Reserva = apps.get_model('reservas', 'Reserva')
+    largas = Reserva.objects.filter(
+        fecha_fin__gt=models.F('fecha_inicio') + DURACION_MAXIMA
+    ).order_by('fecha_inicio')
+    total = largas.count()
+    if total:
+        ejemplos = ", ".join(str(pk) for pk in largas.values_list('pk', flat=True)[:10])
+        raise RuntimeError(
+            f"{total} reservas duran mas de {DURACION_MAXIMA.days} dias (por ejemplo: {ejemplos}). "
+            "Dividelas o acorta su fecha_fin antes de aplicar reservas.0013."
+        )
+
+
+def particionar_tablas(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for tabla, columna in TABLAS:
+            particionar(cursor, tabla, columna)
+
+
+def desparticionar_tablas(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for tabla, _ in TABLAS:
+            desparticionar(cursor, tabla)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservas', '0012_backfill_historial'),
+    ]
+
+    operations = [
+        migrations.RunPython(verificar_duraciones, migrations.RunPython.noop),
+        # Postgres no admite llaves foraneas hacia una tabla particionada por otra columna
+        # que la de particion; la cascada la sigue haciendo el ORM.
+        migrations.AlterField(
+            model_name='reservaestadohistorial',
+            name='reserva',
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name='historial_estados',
+                to='reservas.reserva',
+            ),
+        ),
+        migrations.AlterField(
+            model_name='registroapertura',
+            name='reserva',
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name='registros_apertura',
+                to='reservas.reserva',
+            ),
+        ),
+        migrations.RunPython(particionar_tablas, desparticionar_tablas),
+        migrations.AddConstraint(
+            model_name='reserva',
+            constraint=models.CheckConstraint(
+                check=models.Q(fecha_fin__lte=models.F('fecha_inicio') + DURACION_MAXIMA),
+                name='reserva_duracion_maxima',
+            ),
+        ),
+    ]
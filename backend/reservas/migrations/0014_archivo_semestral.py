@@ -0,0 +1,59 @@
+from django.db import migrations, models
+
+from reservas.archivo import borrar_tablas, crear_tablas, restaurar_semestre, semestres_archivados
+
+
+def crear_archivo(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        crear_tablas(cursor)
+
+
+def borrar_archivo(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    with schema_editor.connection.cursor() as cursor:
+        archivados = semestres_archivados(cursor)
+    for anio, numero in reversed(archivados):
+        restaurar_semestre(anio, numero, using=alias)
+    with schema_editor.connection.cursor() as cursor:
+        borrar_tablas(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservas', '0013_particion_semestral'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservaArchivada',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, serialize=False)),
+                ('fecha_inicio', models.DateTimeField()),
+                ('fecha_fin', models.DateTimeField()),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('aprobado', 'Aprobada'), ('rechazado', 'Rechazada')], max_length=20)),
+                ('metadata', models.JSONField(default=dict)),
+            ],
+            options={
+                'db_table': 'reservas_reserva_archivo',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='RegistroAperturaArchivado',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, serialize=False)),
+                ('fecha_programada', models.DateTimeField()),
+                ('completado', models.BooleanField()),
+                ('completado_en', models.DateTimeField(null=True)),
+                ('asistencia_estado', models.CharField(choices=[('presente', 'Presente'), ('tarde', 'Llegada tarde'), ('ausente', 'Ausente')], max_length=20, null=True)),
+                ('asistencia_registrada_en', models.DateTimeField(null=True)),
+                ('metadata', models.JSONField(default=dict)),
+            ],
+            options={
+                'db_table': 'reservas_registroapertura_archivo',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(crear_archivo, borrar_archivo),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservas', '0014_archivo_semestral'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservaestadohistorial',
+            index=models.Index(fields=['fecha', 'id'], name='historial_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservaestadohistorial',
+            index=models.Index(fields=['reserva', 'fecha'], name='historial_reserva_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservaestadohistorial',
+            index=models.Index(fields=['cambiado_por', 'fecha'], name='historial_usuario_fecha_idx'),
+        ),
+    ]
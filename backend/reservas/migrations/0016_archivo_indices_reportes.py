@@ -0,0 +1,24 @@
+from django.db import migrations
+
+from reservas.archivo import borrar_indices_reportes, crear_indices_reportes
+
+
+def crear_indices(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        crear_indices_reportes(cursor)
+
+
+def borrar_indices(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        borrar_indices_reportes(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reservas', '0015_indices_historial'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, borrar_indices),
+    ]
@@ -1,5 +1,7 @@
 # reservas/models.py
 import uuid
+from datetime import timedelta
+
 from django.db import models
 from django.db.models import F, Q
 from django.utils import timezone
@@ -12,15 +14,25 @@ class EstadoReserva(models.TextChoices):
     APROBADO = 'aprobado', 'Aprobada'
     RECHAZADO = 'rechazado', 'Rechazada'
 
+# Ninguna reserva dura mas que esto (restriccion reserva_duracion_maxima; el serializer
+# lo explica antes de llegar a la base). Acotar ``fecha_inicio`` con ese margen deja que
+# Postgres descarte las particiones de otros semestres.
+DURACION_MAXIMA_RESERVA = timedelta(days=31)
+
+
 class ReservaManager(models.Manager):
     def solapa(self, espacio, inicio, fin, estados=None):
         estados = estados or [EstadoReserva.APROBADO]
         periodo = (inicio, fin)
+        # ``metadata @>``: con ``metadata__es_horario`` la clave ausente da NULL y el
+        # NOT descartaba todas las reservas que no son de horario.
         return self.get_queryset().exclude(
-            metadata__es_horario=True
+            metadata__contains={"es_horario": True}
         ).filter(
             espacio=espacio,
-            estado__in=estados
+            estado__in=estados,
+            fecha_inicio__lt=fin,
+            fecha_inicio__gt=inicio - DURACION_MAXIMA_RESERVA,
         ).filter(periodo__overlap=periodo)
 
     def disponible(self, espacio, inicio, fin):
@@ -65,11 +77,19 @@ class Reserva(models.Model):
             models.Index(fields=['estado']),
             GistIndex(fields=['periodo']),
         ]
+        constraints = [
+            # ReservaManager.solapa depende de este limite para no perder choques.
+            models.CheckConstraint(
+                check=Q(fecha_fin__lte=F('fecha_inicio') + DURACION_MAXIMA_RESERVA),
+                name='reserva_duracion_maxima',
+            ),
+        ]
 
 
 class ReservaEstadoHistorial(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    reserva = models.ForeignKey(Reserva, on_delete=models.CASCADE, related_name='historial_estados')
+    # Sin llave foranea en la base: reservas_reserva esta particionada (ver particiones.py).
+    reserva = models.ForeignKey(Reserva, on_delete=models.CASCADE, related_name='historial_estados', db_constraint=False)
     estado_anterior = models.CharField(max_length=20, choices=EstadoReserva.choices, null=True, blank=True)
     estado_nuevo = models.CharField(max_length=20, choices=EstadoReserva.choices)
     cambiado_por = models.ForeignKey('usuarios.Usuario', on_delete=models.SET_NULL, null=True, blank=True)
@@ -79,6 +99,12 @@ class ReservaEstadoHistorial(models.Model):
     class Meta:
         verbose_name = "reserva_estado_historial"
         verbose_name_plural = "reservas_estado_historial"
+        indexes = [
+            # Historial paginado por fecha, completo o de una reserva o un usuario.
+            models.Index(fields=['fecha', 'id'], name='historial_fecha_idx'),
+            models.Index(fields=['reserva', 'fecha'], name='historial_reserva_fecha_idx'),
+            models.Index(fields=['cambiado_por', 'fecha'], name='historial_usuario_fecha_idx'),
+        ]
 
 
 class EstadoAsistencia(models.TextChoices):
@@ -95,7 +121,9 @@ class MotivoCierre(models.TextChoices):
 
 class RegistroApertura(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    reserva = models.ForeignKey(Reserva, on_delete=models.CASCADE, related_name='registros_apertura')
+    reserva = models.ForeignKey(
+        Reserva, on_delete=models.CASCADE, related_name='registros_apertura', db_constraint=False
+    )
     espacio = models.ForeignKey('espacios.Espacio', on_delete=models.CASCADE, related_name='registros_apertura')
     registrado_por = models.ForeignKey(
         'usuarios.Usuario',
@@ -151,3 +179,44 @@ class RegistroApertura(models.Model):
         ]
 
 
+
+
+# Archivo de semestres cerrados (ver archivo.py). Solo lectura, con las columnas que usan
+# los reportes; las llaves admiten nulos para que un usuario o espacio borrado despues de
+# archivar no esconda la fila (select_related usa LEFT JOIN).
+class ReservaArchivada(models.Model):
+    id = models.UUIDField(primary_key=True)
+    usuario = models.ForeignKey(
+        'usuarios.Usuario', on_delete=models.DO_NOTHING, null=True, db_constraint=False, related_name='+'
+    )
+    espacio = models.ForeignKey(
+        'espacios.Espacio', on_delete=models.DO_NOTHING, null=True, db_constraint=False, related_name='+'
+    )
+    fecha_inicio = models.DateTimeField()
+    fecha_fin = models.DateTimeField()
+    estado = models.CharField(max_length=20, choices=EstadoReserva.choices)
+    metadata = models.JSONField(default=dict)
+
+    class Meta:
+        managed = False
+        db_table = 'reservas_reserva_archivo'
+
+
+class RegistroAperturaArchivado(models.Model):
+    id = models.UUIDField(primary_key=True)
+    reserva = models.ForeignKey(
+        ReservaArchivada, on_delete=models.DO_NOTHING, null=True, db_constraint=False, related_name='+'
+    )
+    espacio = models.ForeignKey(
+        'espacios.Espacio', on_delete=models.DO_NOTHING, null=True, db_constraint=False, related_name='+'
+    )
+    fecha_programada = models.DateTimeField()
+    completado = models.BooleanField()
+    completado_en = models.DateTimeField(null=True)
+    asistencia_estado = models.CharField(max_length=20, choices=EstadoAsistencia.choices, null=True)
+    asistencia_registrada_en = models.DateTimeField(null=True)
+    metadata = models.JSONField(default=dict)
+
+    class Meta:
+        managed = False
+        db_table = 'reservas_registroapertura_archivo'
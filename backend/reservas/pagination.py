@@ -0,0 +1,9 @@
+from rest_framework.pagination import CursorPagination
+
+
+class HistorialCursorPagination(CursorPagination):
+    # El id desempata cambios con la misma fecha para que el cursor sea estable.
+    ordering = ('-fecha', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,196 @@
+"""
+Particionado por semestre de reservas y registros de apertura.
+
+``reservas_reserva`` (por ``fecha_inicio``) y ``reservas_registroapertura``
+(por ``fecha_programada``) son tablas particionadas por rango de Postgres con
+una particion por semestre (enero-junio y julio-diciembre, hora local), mas una
+particion ``_otros`` por defecto para que ninguna insercion falle. Las
+consultas que acotan la fecha (agenda del dia, choques de horario, reportes)
+solo leen las particiones del periodo, y un semestre viejo se puede
+desprender con ``ALTER TABLE ... DETACH PARTITION`` sin reescribir nada.
+
+La clave primaria pasa a ser ``(id, columna_de_particion)`` porque Postgres
+exige que incluya la clave de particion; por lo mismo las llaves foraneas hacia
+``Reserva`` quedan sin restriccion en la base (``db_constraint=False``) y el
+borrado en cascada lo hace el ORM.
+
+``crear_particiones`` (o ``asegurar_particiones``) crea por adelantado las
+particiones de los semestres siguientes. Si alguna fila ya habia caido en la
+particion por defecto, se mueve a la nueva antes de adjuntarla.
+"""
+
+from datetime import datetime
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+
+TABLAS = (
+    ("reservas_reserva", "fecha_inicio"),
+    ("reservas_registroapertura", "fecha_programada"),
+)
+SEMESTRES_ADELANTE = 2
+
+
+def semestre_de(momento):
+    fecha = timezone.localtime(momento).date() if isinstance(momento, datetime) else momento
+    return fecha.year, 1 if fecha.month <= 6 else 2
+
+
+def siguiente_semestre(anio, numero):
+    return (anio, 2) if numero == 1 else (anio + 1, 1)
+
+
+def semestre_anterior(anio, numero):
+    return (anio, 1) if numero == 2 else (anio - 1, 2)
+
+
+def limites_semestre(anio, numero):
+    tz = timezone.get_current_timezone()
+    inicio = datetime(anio, 1, 1) if numero == 1 else datetime(anio, 7, 1)
+    fin = datetime(anio, 7, 1) if numero == 1 else datetime(anio + 1, 1, 1)
+    return timezone.make_aware(inicio, tz), timezone.make_aware(fin, tz)
+
+
+def semestres_entre(desde, hasta):
+    semestres = [desde]
+    while semestres[-1] < hasta:
+        semestres.append(siguiente_semestre(*semestres[-1]))
+    return semestres
+
+
+def nombre_particion(tabla, anio, numero):
+    return f"{tabla}_{anio}_{numero}"
+
+
+def nombre_defecto(tabla):
+    return f"{tabla}_otros"
+
+
+def es_particionada(cursor, tabla):
+    cursor.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(%s)", [tabla])
+    fila = cursor.fetchone()
+    return bool(fila and fila[0])
+
+
+def particiones(cursor, tabla):
+    cursor.execute(
+        """
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        """,
+        [tabla],
+    )
+    return {fila[0] for fila in cursor.fetchall()}
+
+
+def crear_particion(cursor, tabla, columna, anio, numero):
+    """Crea y adjunta la particion del semestre; devuelve ``False`` si ya existia."""
+    nombre = nombre_particion(tabla, anio, numero)
+    if nombre in particiones(cursor, tabla):
+        return False
+    inicio, fin = limites_semestre(anio, numero)
+    cursor.execute(f"CREATE TABLE {nombre} (LIKE {tabla} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    cursor.execute(
+        f"""
+        WITH movidas AS (
+            DELETE FROM {nombre_defecto(tabla)} WHERE {columna} >= %s AND {columna} < %s RETURNING *
+        )
+        INSERT INTO {nombre} SELECT * FROM movidas
+        """,
+        [inicio, fin],
+    )
+    cursor.execute(f"ALTER TABLE {tabla} ATTACH PARTITION {nombre} FOR VALUES FROM (%s) TO (%s)", [inicio, fin])
+    return True
+
+
+def asegurar_particiones(adelante=SEMESTRES_ADELANTE, using="default"):
+    """Crea las particiones del semestre actual y de los ``adelante`` siguientes."""
+    actual = semestre_de(timezone.now())
+    hasta = actual
+    for _ in range(adelante):
+        hasta = siguiente_semestre(*hasta)
+
+    creadas = []
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        for tabla, columna in TABLAS:
+            if not es_particionada(cursor, tabla):
+                continue
+            for anio, numero in semestres_entre(actual, hasta):
+                if crear_particion(cursor, tabla, columna, anio, numero):
+                    creadas.append(nombre_particion(tabla, anio, numero))
+    return creadas
+
+
+# Conversion (migracion 0013) --------------------------------------------------
+
+def _definiciones(cursor, tabla):
+    """Restricciones (PK, unicas, foraneas) e indices sueltos de ``tabla``, para recrearlos."""
+    cursor.execute(
+        """
+        SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f')
+        ORDER BY contype DESC, conname
+        """,
+        [tabla],
+    )
+    restricciones = cursor.fetchall()
+    cursor.execute(
+        """
+        SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i
+        WHERE i.indrelid = %s::regclass
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+        """,
+        [tabla],
+    )
+    return restricciones, [fila[0] for fila in cursor.fetchall()]
+
+
+def _recrear(cursor, tabla, definiciones, clave_primaria):
+    restricciones, indices = definiciones
+    for nombre, tipo, definicion in restricciones:
+        if tipo == "p":
+            definicion = f"PRIMARY KEY ({clave_primaria})"
+        cursor.execute(f"ALTER TABLE {tabla} ADD CONSTRAINT {nombre} {definicion}")
+    for definicion in indices:
+        # Los indices de una tabla particionada se describen "ON ONLY"; al recrearlos deben propagarse.
+        cursor.execute(definicion.replace(" ON ONLY ", " ON ", 1))
+
+
+def particionar(cursor, tabla, columna, adelante=SEMESTRES_ADELANTE):
+    definiciones = _definiciones(cursor, tabla)
+    anterior = f"{tabla}_sin_particionar"
+    cursor.execute(f"SELECT min({columna}), max({columna}) FROM {tabla}")
+    minimo, maximo = cursor.fetchone()
+
+    hasta = semestre_de(timezone.now())
+    for _ in range(adelante):
+        hasta = siguiente_semestre(*hasta)
+    desde = min(semestre_de(minimo), hasta) if minimo else semestre_de(timezone.now())
+    hasta = max(semestre_de(maximo), hasta) if maximo else hasta
+
+    cursor.execute(f"ALTER TABLE {tabla} RENAME TO {anterior}")
+    cursor.execute(
+        f"CREATE TABLE {tabla} (LIKE {anterior} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        f"PARTITION BY RANGE ({columna})"
+    )
+    cursor.execute(f"CREATE TABLE {nombre_defecto(tabla)} PARTITION OF {tabla} DEFAULT")
+    for anio, numero in semestres_entre(desde, hasta):
+        inicio, fin = limites_semestre(anio, numero)
+        cursor.execute(
+            f"CREATE TABLE {nombre_particion(tabla, anio, numero)} PARTITION OF {tabla} FOR VALUES FROM (%s) TO (%s)",
+            [inicio, fin],
+        )
+    cursor.execute(f"INSERT INTO {tabla} SELECT * FROM {anterior}")
+    cursor.execute(f"DROP TABLE {anterior}")
+    _recrear(cursor, tabla, definiciones, f"id, {columna}")
+
+
+def desparticionar(cursor, tabla):
+    definiciones = _definiciones(cursor, tabla)
+    anterior = f"{tabla}_particionada"
+    cursor.execute(f"ALTER TABLE {tabla} RENAME TO {anterior}")
+    cursor.execute(f"CREATE TABLE {tabla} (LIKE {anterior} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    cursor.execute(f"INSERT INTO {tabla} SELECT * FROM {anterior}")
+    cursor.execute(f"DROP TABLE {anterior} CASCADE")
+    _recrear(cursor, tabla, definiciones, "id")
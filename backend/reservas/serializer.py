@@ -4,7 +4,9 @@ from datetime import date, timedelta
 from django.db import transaction
 
 from rest_framework import serializers
-from .models import Reserva, ReservaEstadoHistorial, EstadoReserva, RegistroApertura
+from config.trazas import trazar
+from espacios.plantillas import plantilla_de
+from .models import DURACION_MAXIMA_RESERVA, Reserva, ReservaEstadoHistorial, EstadoReserva, RegistroApertura
 
 SEMESTER_START = date(2025, 8, 4)
 SEMESTER_END = date(2025, 11, 28)
@@ -80,6 +82,7 @@ class ReservaSerializer(serializers.ModelSerializer):
                         continue
         return None
 
+    @trazar()
     def validate(self, data):
         inicio = data.get('fecha_inicio') or getattr(self.instance, 'fecha_inicio', None)
         fin = data.get('fecha_fin') or getattr(self.instance, 'fecha_fin', None)
@@ -90,6 +93,10 @@ class ReservaSerializer(serializers.ModelSerializer):
 
         if inicio and fin and inicio >= fin:
             raise serializers.ValidationError("fecha_inicio debe ser anterior a fecha_fin.")
+        if inicio and fin and fin - inicio > DURACION_MAXIMA_RESERVA:
+            raise serializers.ValidationError(
+                f"Una reserva no puede durar mas de {DURACION_MAXIMA_RESERVA.days} dias."
+            )
 
         recurrence_weeks = 1
         if recurrente:
@@ -147,12 +154,35 @@ class ReservaSerializer(serializers.ModelSerializer):
                         "El espacio no esta disponible en al menos una de las ocurrencias recurrentes."
                     )
 
+        if inicio and fin and espacio and self._horario_modificado(data):
+            self._validar_plantilla(espacio, inicio, fin, recurrence_weeks if not self.instance else 1)
+
         metadata = data.get('metadata')
         if metadata is not None and not isinstance(metadata, dict):
             raise serializers.ValidationError("metadata debe ser un objeto JSON valido.")
 
         return data
 
+    def _horario_modificado(self, data):
+        if not self.instance:
+            return True
+        return any(
+            campo in data and data[campo] != getattr(self.instance, campo)
+            for campo in ('fecha_inicio', 'fecha_fin', 'espacio')
+        )
+
+    @trazar()
+    def _validar_plantilla(self, espacio, inicio, fin, semanas):
+        # Horas base y bloqueos del espacio, compilados y en cache: no consulta la base.
+        plantilla = plantilla_de(espacio.pk)
+        if not plantilla:
+            return
+        for offset in range(semanas):
+            motivo = plantilla.motivo_no_disponible(inicio + timedelta(weeks=offset), fin + timedelta(weeks=offset))
+            if motivo:
+                raise serializers.ValidationError(f"El espacio no esta disponible en ese horario ({motivo}).")
+
+    @trazar()
     def create(self, validated_data):
         is_recurrent = validated_data.get('recurrente', False)
         recurrence_weeks = getattr(self, '_recurrence_weeks', 1) or 1
@@ -1,3 +1,325 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import IntegrityError, connection, connections, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from espacios.models import Espacio
+from notificaciones.models import AudienciaNotificacion, EventoNotificacion
+from usuarios.models import Usuario
+from . import archivo
+from .cierres import VENTANA_ASISTENCIA, VENTANA_CIERRE, barrer_registros_vencidos
+from .models import (
+    DURACION_MAXIMA_RESERVA,
+    EstadoAsistencia,
+    EstadoReserva,
+    MotivoCierre,
+    RegistroApertura,
+    RegistroAperturaArchivado,
+    Reserva,
+    ReservaArchivada,
+    ReservaEstadoHistorial,
+)
+from .particiones import (
+    SEMESTRES_ADELANTE,
+    asegurar_particiones,
+    limites_semestre,
+    nombre_defecto,
+    nombre_particion,
+    particiones,
+    semestre_de,
+    siguiente_semestre,
+)
+
+
+def _particion_de(tabla, pk):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT tableoid::regclass::text FROM {tabla} WHERE id = %s", [pk])
+        fila = cursor.fetchone()
+    return fila[0] if fila else None
+
+
+class ParticionesTests(TestCase):
+    def setUp(self):
+        self.usuario = Usuario.objects.create_user(username='docente', password='x')
+        self.espacio = Espacio.objects.create(codigo='A101', nombre='Aula 101')
+
+    def _reserva(self, inicio, fin, **extra):
+        extra.setdefault('estado', EstadoReserva.APROBADO)
+        return Reserva.objects.create(
+            usuario=self.usuario, espacio=self.espacio, fecha_inicio=inicio, fecha_fin=fin, **extra
+        )
+
+    def test_solapa_encuentra_reserva_del_semestre_anterior(self):
+        actual = semestre_de(timezone.now())
+        frontera, _ = limites_semestre(*siguiente_semestre(*actual))
+        larga = self._reserva(frontera - timedelta(days=20), frontera + timedelta(days=11))
+        self.assertEqual(_particion_de('reservas_reserva', larga.pk), nombre_particion('reservas_reserva', *actual))
+
+        inicio = frontera + timedelta(days=10)
+        self.assertEqual(list(Reserva.objects.solapa(self.espacio, inicio, inicio + timedelta(hours=1))), [larga])
+        self.assertTrue(
+            Reserva.objects.disponible(self.espacio, frontera + timedelta(days=11), frontera + timedelta(days=12))
+        )
+
+    def test_solapa_con_reserva_de_duracion_maxima(self):
+        inicio = timezone.now().replace(microsecond=0) + timedelta(days=60)
+        maxima = self._reserva(
+            inicio - DURACION_MAXIMA_RESERVA + timedelta(minutes=1),
+            inicio + timedelta(minutes=1),
+        )
+        self._reserva(inicio - DURACION_MAXIMA_RESERVA, inicio)
+
+        self.assertEqual(list(Reserva.objects.solapa(self.espacio, inicio, inicio + timedelta(hours=1))), [maxima])
+
+    def test_solapa_ignora_reservas_de_horario(self):
+        inicio = timezone.now().replace(microsecond=0) + timedelta(days=7)
+        self._reserva(inicio, inicio + timedelta(hours=2), metadata={'es_horario': True})
+        self.assertTrue(Reserva.objects.disponible(self.espacio, inicio, inicio + timedelta(hours=1)))
+
+        normal = self._reserva(inicio, inicio + timedelta(hours=2), metadata={'es_horario': False})
+        self.assertEqual(list(Reserva.objects.solapa(self.espacio, inicio, inicio + timedelta(hours=1))), [normal])
+
+    def test_reserva_mas_larga_que_el_maximo(self):
+        inicio = timezone.now() + timedelta(days=1)
+        self._reserva(inicio, inicio + DURACION_MAXIMA_RESERVA)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self._reserva(inicio, inicio + DURACION_MAXIMA_RESERVA + timedelta(seconds=1))
+
+    def test_asegurar_particiones_mueve_filas_por_defecto(self):
+        semestre = semestre_de(timezone.now())
+        for _ in range(SEMESTRES_ADELANTE + 1):
+            semestre = siguiente_semestre(*semestre)
+        inicio, _ = limites_semestre(*semestre)
+        nueva = nombre_particion('reservas_reserva', *semestre)
+        reserva = self._reserva(inicio + timedelta(days=3), inicio + timedelta(days=3, hours=2))
+        self.assertEqual(_particion_de('reservas_reserva', reserva.pk), nombre_defecto('reservas_reserva'))
+
+        creadas = asegurar_particiones(adelante=SEMESTRES_ADELANTE + 1)
+
+        self.assertIn(nueva, creadas)
+        self.assertEqual(_particion_de('reservas_reserva', reserva.pk), nueva)
+        with connection.cursor() as cursor:
+            self.assertIn(nueva, particiones(cursor, 'reservas_reserva'))
+        self.assertEqual(list(Reserva.objects.solapa(self.espacio, inicio, inicio + timedelta(days=4))), [reserva])
+        self.assertEqual(asegurar_particiones(adelante=SEMESTRES_ADELANTE + 1), [])
+
+
+class ArchivoTests(APITestCase):
+    def setUp(self):
+        self.admin = Usuario.objects.create_superuser(username='admin', password='x')
+        self.espacio = Espacio.objects.create(codigo='A101', nombre='Aula 101')
+        self.semestre = semestre_de(timezone.now())
+        self.inicio_semestre, self.frontera = limites_semestre(*self.semestre)
+
+    def _ausencia(self, programada, registrada):
+        reserva = Reserva.objects.create(
+            usuario=self.admin,
+            espacio=self.espacio,
+            fecha_inicio=programada,
+            fecha_fin=programada + timedelta(hours=2),
+            estado=EstadoReserva.APROBADO,
+            metadata={'tipo_uso': 'clase'},
+        )
+        return RegistroApertura.objects.create(
+            reserva=reserva,
+            espacio=self.espacio,
+            fecha_programada=programada,
+            asistencia_estado=EstadoAsistencia.AUSENTE,
+            asistencia_registrada_en=registrada,
+        )
+
+    def _reporte(self, desde, hasta=None):
+        self.client.force_authenticate(self.admin)
+        params = {'inicio': timezone.localdate(desde).isoformat()}
+        if hasta:
+            params['fin'] = timezone.localdate(hasta).isoformat()
+        respuesta = self.client.get('/api/reportes/ausencias/', params)
+        self.assertEqual(respuesta.status_code, 200)
+        return {fila['reserva_id'] for fila in respuesta.data['resultados']}
+
+    def _archivar(self):
+        # Las llaves foraneas diferidas de lo creado en la transaccion del test
+        # impiden desprender la particion; se verifican antes, como al confirmar.
+        connection.check_constraints()
+        return archivo.archivar_semestre(*self.semestre)
+
+    def _historial_archivado(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {archivo.nombre_archivo(archivo.HISTORIAL)}")
+            return cursor.fetchone()[0]
+
+    def test_archivar_y_restaurar(self):
+        registro = self._ausencia(self.inicio_semestre + timedelta(days=5), self.inicio_semestre + timedelta(days=5))
+        reserva = registro.reserva
+        posterior = self._ausencia(self.frontera + timedelta(days=5), self.frontera + timedelta(days=5))
+
+        self.assertEqual(self._archivar(), (1, 1, 1))
+
+        self.assertEqual(archivo.frontera(), self.frontera)
+        self.assertFalse(Reserva.objects.filter(pk=reserva.pk).exists())
+        self.assertFalse(RegistroApertura.objects.filter(pk=registro.pk).exists())
+        self.assertFalse(ReservaEstadoHistorial.objects.filter(reserva_id=reserva.pk).exists())
+        self.assertTrue(ReservaArchivada.objects.filter(pk=reserva.pk).exists())
+        archivado = RegistroAperturaArchivado.objects.select_related('reserva').get(pk=registro.pk)
+        self.assertEqual(archivado.reserva.metadata, {'tipo_uso': 'clase'})
+        self.assertEqual(self._historial_archivado(), 1)
+        self.assertTrue(Reserva.objects.filter(pk=posterior.reserva_id).exists())
+        with self.assertRaises(archivo.ErrorArchivo):
+            self._archivar()
+
+        archivo.restaurar_semestre(*self.semestre)
+
+        self.assertIsNone(archivo.frontera())
+        self.assertEqual(Reserva.objects.get(pk=reserva.pk).metadata, {'tipo_uso': 'clase'})
+        self.assertEqual(RegistroApertura.objects.get(pk=registro.pk).asistencia_estado, EstadoAsistencia.AUSENTE)
+        self.assertEqual(ReservaEstadoHistorial.objects.filter(reserva_id=reserva.pk).count(), 1)
+        self.assertFalse(RegistroAperturaArchivado.objects.exists())
+        self.assertEqual(self._historial_archivado(), 0)
+        with connection.cursor() as cursor:
+            self.assertIn(
+                nombre_particion('reservas_reserva', *self.semestre), particiones(cursor, 'reservas_reserva')
+            )
+
+    def test_reporte_que_cruza_la_frontera(self):
+        antigua = self._ausencia(self.frontera - timedelta(days=2), self.frontera - timedelta(days=2))
+        # Clase antes de la frontera, ausencia registrada despues: queda en el archivo.
+        tardia = self._ausencia(self.frontera - timedelta(days=1), self.frontera + timedelta(days=1))
+        viva = self._ausencia(self.frontera + timedelta(days=3), self.frontera + timedelta(days=3))
+        self._archivar()
+        self.assertTrue(RegistroAperturaArchivado.objects.filter(pk=tardia.pk).exists())
+
+        todas = {str(antigua.reserva_id), str(tardia.reserva_id), str(viva.reserva_id)}
+        self.assertEqual(self._reporte(self.frontera - timedelta(days=5), self.frontera + timedelta(days=5)), todas)
+        self.assertEqual(self._reporte(self.frontera - timedelta(days=5)), todas)
+        self.assertEqual(self._reporte(self.frontera), {str(tardia.reserva_id), str(viva.reserva_id)})
+        self.assertEqual(self._reporte(self.frontera + timedelta(days=2)), {str(viva.reserva_id)})
+
+
+class BarridoMixin:
+    def setUp(self):
+        self.ahora = timezone.now().replace(microsecond=0)
+        reloj = mock.patch('django.utils.timezone.now', return_value=self.ahora)
+        reloj.start()
+        self.addCleanup(reloj.stop)
+        self.usuario = Usuario.objects.create_user(username='docente', password='x')
+        self.espacio = Espacio.objects.create(codigo='A101', nombre='Aula 101')
+
+    def _registro(self, programada, fin, **extra):
+        reserva = Reserva.objects.create(
+            usuario=self.usuario,
+            espacio=self.espacio,
+            fecha_inicio=programada,
+            fecha_fin=fin,
+            estado=EstadoReserva.APROBADO,
+        )
+        extra.setdefault('completado', True)
+        return RegistroApertura.objects.create(
+            reserva=reserva, espacio=self.espacio, fecha_programada=programada, **extra
+        )
+
+    def _ausencia_vencida(self, minutos=1):
+        programada = self.ahora - VENTANA_ASISTENCIA - timedelta(minutes=minutos)
+        return self._registro(programada, self.ahora + timedelta(hours=1))
+
+
+class BarridoTests(BarridoMixin, TestCase):
+    def test_marca_ausencias_y_cierra_vencidos(self):
+        ausente = self._ausencia_vencida()
+        en_ventana = self._registro(
+            self.ahora - VENTANA_ASISTENCIA + timedelta(minutes=1), self.ahora + timedelta(hours=1)
+        )
+        sin_abrir = self._registro(
+            self.ahora - timedelta(hours=3), self.ahora - timedelta(hours=1), completado=False
+        )
+        terminado = self._registro(
+            self.ahora - timedelta(hours=2),
+            self.ahora - VENTANA_CIERRE - timedelta(minutes=1),
+            asistencia_estado=EstadoAsistencia.PRESENTE,
+        )
+        por_terminar = self._registro(
+            self.ahora - timedelta(hours=2),
+            self.ahora - VENTANA_CIERRE + timedelta(minutes=1),
+            asistencia_estado=EstadoAsistencia.PRESENTE,
+        )
+
+        self.assertEqual(barrer_registros_vencidos(), (1, 1))
+
+        ausente.refresh_from_db()
+        self.assertEqual(ausente.asistencia_estado, EstadoAsistencia.AUSENTE)
+        self.assertEqual(ausente.asistencia_registrada_en, self.ahora)
+        self.assertTrue(ausente.ausencia_notificada)
+        self.assertTrue(ausente.cierre_registrado)
+        self.assertEqual(ausente.cierre_motivo, MotivoCierre.AUSENCIA)
+        self.assertTrue(ausente.metadata['cierre']['automatico'])
+        self.assertEqual(Reserva.objects.get(pk=ausente.reserva_id).metadata['estado_aula'], 'cerrada')
+
+        terminado.refresh_from_db()
+        self.assertTrue(terminado.cierre_registrado)
+        self.assertEqual(terminado.cierre_registrado_en, self.ahora)
+        self.assertEqual(terminado.cierre_motivo, MotivoCierre.FIN_CLASE)
+        self.assertEqual(terminado.asistencia_estado, EstadoAsistencia.PRESENTE)
+
+        for intacto in (en_ventana, sin_abrir, por_terminar):
+            intacto.refresh_from_db()
+            self.assertFalse(intacto.cierre_registrado)
+        en_ventana.refresh_from_db()
+        self.assertIsNone(en_ventana.asistencia_estado)
+
+        self.assertEqual(barrer_registros_vencidos(), (0, 0))
+
+    def test_un_evento_por_ausencia_en_una_insercion_por_lote(self):
+        registros = [self._ausencia_vencida(minutos) for minutos in range(1, 6)]
+        # El mas viejo (primer lote) ya se habia notificado: se marca sin encolar otro evento.
+        avisado = registros[-1]
+        RegistroApertura.objects.filter(pk=avisado.pk).update(ausencia_notificada=True)
+        tabla_eventos = EventoNotificacion._meta.db_table
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(barrer_registros_vencidos(lote=2), (5, 0))
+
+        inserciones = [
+            consulta for consulta in consultas.captured_queries
+            if consulta['sql'].startswith(f'INSERT INTO "{tabla_eventos}"')
+        ]
+        self.assertEqual(len(inserciones), 3)
+        eventos = EventoNotificacion.objects.all()
+        self.assertEqual(eventos.count(), 4)
+        self.assertEqual(
+            {evento.metadata['reserva_id'] for evento in eventos},
+            {str(registro.reserva_id) for registro in registros[:-1]},
+        )
+        self.assertTrue(all(evento.audiencia == AudienciaNotificacion.ADMINS for evento in eventos))
+
+        barrer_registros_vencidos(lote=2)
+        self.assertEqual(EventoNotificacion.objects.count(), 4)
+
+
+class BarridoConcurrenteTests(BarridoMixin, TransactionTestCase):
+    def test_salta_registros_bloqueados(self):
+        bloqueado = self._ausencia_vencida(1)
+        libre = self._ausencia_vencida(2)
+
+        otra = connections.create_connection('default')
+        try:
+            with otra.cursor() as cursor:
+                cursor.execute('BEGIN')
+                cursor.execute('SELECT 1 FROM reservas_registroapertura WHERE id = %s FOR UPDATE', [bloqueado.pk])
+                self.assertEqual(barrer_registros_vencidos(), (1, 0))
+                cursor.execute('ROLLBACK')
+        finally:
+            otra.close()
+
+        libre.refresh_from_db()
+        bloqueado.refresh_from_db()
+        self.assertEqual(libre.asistencia_estado, EstadoAsistencia.AUSENTE)
+        self.assertIsNone(bloqueado.asistencia_estado)
+        self.assertEqual(EventoNotificacion.objects.count(), 1)
+
+        self.assertEqual(barrer_registros_vencidos(), (1, 0))
+        bloqueado.refresh_from_db()
+        self.assertEqual(bloqueado.asistencia_estado, EstadoAsistencia.AUSENTE)
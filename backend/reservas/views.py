@@ -1,44 +1,62 @@
 import json
 from datetime import datetime, timedelta
+from itertools import chain
 
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import Prefetch, Q, prefetch_related_objects
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime, parse_date
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import ParseError, PermissionDenied
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from espacios.models import TipoEspacio, DisponibilidadEspacio
-from notificaciones.models import Notificacion, TipoNotificacion
+from config import metricas
+from config.trazas import trazar
+from espacios.models import TipoEspacio
+from espacios.referencias import disponibilidad_del_dia
+from notificaciones import outbox
+from notificaciones.models import AudienciaNotificacion
 from incidencias.models import Incidencia
-from usuarios.models import Usuario
+from llaves.models import EstadoLlave, Llave
+from usuarios.permisos import (
+    GESTIONAR_APERTURAS,
+    GESTIONAR_AULAS,
+    GESTIONAR_LABORATORIOS,
+    capacidades_de,
+)
 from .models import (
     EstadoReserva,
     Reserva,
     ReservaEstadoHistorial,
     RegistroApertura,
+    RegistroAperturaArchivado,
     EstadoAsistencia,
     MotivoCierre,
 )
+from . import archivo
+from .pagination import HistorialCursorPagination
 from .serializer import (
     ReservaSerializer,
     ReservaEstadoHistorialSerializer,
     RegistroAperturaSerializer,
 )
+from .cierres import (
+    CIERRE_UPDATE_FIELDS,
+    VENTANA_APERTURA_ANTES,
+    VENTANA_APERTURA_DESPUES,
+    VENTANA_ASISTENCIA,
+    VENTANA_CIERRE,
+    aplicar_cierre,
+    datos_ausencia,
+)
 
 
 def _is_admin_user(user):
-    if not user or not getattr(user, "is_authenticated", False):
-        return False
-    if getattr(user, "is_superuser", False):
-        return True
-    rol = getattr(user, "rol", None)
-    nombre = getattr(rol, "nombre", None)
-    return bool(nombre and nombre.lower() == "admin")
+    return capacidades_de(user).es_admin
 
 
 def _localized(dt):
@@ -67,11 +85,10 @@ class ReservaViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly]
     CLASS_EVENT_PREFIX = "[CLASE]"
 
-    # Roles responsables por tipo de espacio. admin siempre puede gestionar.
+    # Permiso que gestiona cada tipo de espacio. Sin entrada: solo admin.
     tipo_responsable_map = {
-        TipoEspacio.AULA: {"secretaria", "admin"},
-        TipoEspacio.LABORATORIO: {"laboratorista", "admin"},
-        TipoEspacio.SALA: {"admin"},
+        TipoEspacio.AULA: GESTIONAR_AULAS,
+        TipoEspacio.LABORATORIO: GESTIONAR_LABORATORIOS,
     }
 
     def get_queryset(self):
@@ -97,54 +114,31 @@ class ReservaViewSet(viewsets.ModelViewSet):
         if modo and modo.lower() == "disponibilidad":
             return queryset
 
-        role = self._user_role(user)
-        manager_roles = {"admin", "secretaria", "laboratorista"}
-
-        if role in manager_roles:
-            if role == "admin":
-                return queryset
-
-            filters = Q(usuario=user)
-            if role == "laboratorista":
-                filters |= Q(espacio__tipo__iexact=TipoEspacio.LABORATORIO)
-            if role == "secretaria":
-                filters |= Q(espacio__tipo__iexact=TipoEspacio.AULA)
-            return queryset.filter(filters)
-
-        if role == "conserje":
+        capacidades = capacidades_de(user)
+        if capacidades.es_admin or capacidades.puede(GESTIONAR_APERTURAS):
             # Conserjes necesitan acceder a la reserva para aperturas/cierres
             return queryset
 
-        return queryset.filter(usuario=user)
+        filters = Q(usuario=user)
+        if capacidades.puede(GESTIONAR_LABORATORIOS):
+            filters |= Q(espacio__tipo__iexact=TipoEspacio.LABORATORIO)
+        if capacidades.puede(GESTIONAR_AULAS):
+            filters |= Q(espacio__tipo__iexact=TipoEspacio.AULA)
+        return queryset.filter(filters)
 
+    @trazar()
     def perform_create(self, serializer):
         user = getattr(self.request, "user", None)
         if not user or not getattr(user, "is_authenticated", False):
             raise PermissionDenied("Debes iniciar sesion para crear una reserva.")
         serializer.save(creado_por=user, usuario=user)
 
-    def _user_role(self, user):
-        if not user or not getattr(user, "is_authenticated", False):
-            return None
-        if getattr(user, "is_superuser", False):
-            return "admin"
-        rol = getattr(user, "rol", None)
-        if rol and rol.nombre:
-            return rol.nombre.lower()
-        return None
-
-    def _allowed_roles_for_reserva(self, reserva):
-        tipo = reserva.espacio.tipo
-        allowed = self.tipo_responsable_map.get(tipo, {"admin"})
-        return allowed | {"admin"}
-
     def _can_manage_reserva(self, user, reserva):
-        if not user or not getattr(user, "is_authenticated", False):
-            return False
-        if getattr(user, "is_superuser", False):
+        capacidades = capacidades_de(user)
+        if capacidades.es_admin:
             return True
-        role = self._user_role(user)
-        return role in self._allowed_roles_for_reserva(reserva)
+        permiso = self.tipo_responsable_map.get(reserva.espacio.tipo)
+        return bool(permiso and capacidades.puede(permiso))
 
     def _register_historial(self, reserva, estado_nuevo, comentario, user):
         ReservaEstadoHistorial.objects.create(
@@ -166,6 +160,7 @@ class ReservaViewSet(viewsets.ModelViewSet):
             return True
         return self._can_manage_reserva(user, reserva)
 
+    @trazar()
     def _ensure_registro_apertura(self, reserva):
         fecha_programada = reserva.fecha_inicio
         if not fecha_programada or not reserva.espacio_id:
@@ -201,16 +196,7 @@ class ReservaViewSet(viewsets.ModelViewSet):
         return "Reserva especial"
 
     def _can_manage_aperturas(self, user):
-        role = self._user_role(user)
-        return role in {"conserje", "admin"}
-
-    def _admin_recipients(self):
-        return (
-            Usuario.objects.filter(
-                Q(is_superuser=True) | Q(rol__nombre__iexact="admin")
-            )
-            .distinct()
-        )
+        return capacidades_de(user).puede(GESTIONAR_APERTURAS)
 
     def _notify_apertura(self, reserva, registro, user):
         destinatario = reserva.usuario
@@ -241,49 +227,24 @@ class ReservaViewSet(viewsets.ModelViewSet):
             "evento": "apertura",
         }
 
-        Notificacion.objects.create(
-            tipo=TipoNotificacion.AGENDA,
-            destinatario=destinatario,
-            remitente=user if getattr(user, "is_authenticated", False) else None,
-            mensaje=mensaje,
+        outbox.encolar(
+            mensaje,
             metadata=metadata_detalle,
+            destinatario=destinatario,
+            remitente=user,
         )
 
     def _notify_ausencia(self, reserva, registro, profesor_solicitante, user):
         if registro.ausencia_notificada:
             return
 
-        admins = list(self._admin_recipients())
-        if not admins:
-            return
-
-        aula = reserva.espacio.nombre if reserva.espacio else "Espacio sin nombre"
-        hora_programada = (
-            reserva.fecha_inicio.isoformat() if reserva.fecha_inicio else None
-        )
-        mensaje = (
-            f"Ausencia detectada en {aula}. "
-            "El profesor o responsable no se presento a la hora programada."
+        mensaje, metadata_detalle = datos_ausencia(reserva, profesor_solicitante)
+        outbox.encolar(
+            mensaje,
+            metadata=metadata_detalle,
+            audiencia=AudienciaNotificacion.ADMINS,
+            remitente=user,
         )
-
-        metadata_detalle = {
-            "reserva_id": str(reserva.id),
-            "espacio_id": str(reserva.espacio_id) if reserva.espacio_id else None,
-            "aula": aula,
-            "hora_programada": hora_programada,
-            "profesor": profesor_solicitante,
-            "evento": "ausencia",
-        }
-
-        for admin in admins:
-            Notificacion.objects.create(
-                tipo=TipoNotificacion.AGENDA,
-                destinatario=admin,
-                remitente=user if getattr(user, "is_authenticated", False) else None,
-                mensaje=mensaje,
-                metadata=metadata_detalle.copy(),
-            )
-
         registro.ausencia_notificada = True
 
     def _registrar_cierre_registro(
@@ -299,53 +260,16 @@ class ReservaViewSet(viewsets.ModelViewSet):
             return registro
 
         hora_cierre = hora_cierre or timezone.now()
-        registro.cierre_registrado = True
-        registro.cierre_registrado_en = hora_cierre
-        registro.cierre_registrado_por = (
-            user if getattr(user, "is_authenticated", False) else None
-        )
-        registro.cierre_motivo = motivo
-        registro.cierre_observaciones = observaciones or ""
-
-        metadata_registro = registro.metadata or {}
-        cierre_meta = metadata_registro.setdefault("cierre", {})
-        cierre_meta.update(
-            {
-                "motivo": motivo,
-                "motivo_display": registro.get_cierre_motivo_display(),
-                "registrado_en": hora_cierre.isoformat(),
-                "registrado_por": getattr(
-                    registro.cierre_registrado_por, "id", None
-                ),
-                "observaciones": registro.cierre_observaciones,
-                "automatico": automatico,
-            }
-        )
-        metadata_registro["estado_aula"] = "cerrada"
-        registro.metadata = metadata_registro
-
-        reserva = registro.reserva
-        reserva_metadata = reserva.metadata or {}
-        reserva_metadata.update(
-            {
-                "estado_aula": "cerrada",
-                "cierre_registrado_en": hora_cierre.isoformat(),
-                "cierre_motivo": motivo,
-            }
-        )
-
-        registro.save(
-            update_fields=[
-                "cierre_registrado",
-                "cierre_registrado_en",
-                "cierre_registrado_por",
-                "cierre_motivo",
-                "cierre_observaciones",
-                "metadata",
-            ]
+        aplicar_cierre(
+            registro,
+            motivo,
+            observaciones,
+            user,
+            hora_cierre,
+            automatico=automatico,
         )
-        reserva.metadata = reserva_metadata
-        reserva.save(update_fields=["metadata", "actualizado_en"])
+        registro.save(update_fields=CIERRE_UPDATE_FIELDS)
+        registro.reserva.save(update_fields=["metadata", "actualizado_en"])
         registro.refresh_from_db()
         return registro
 
@@ -378,6 +302,35 @@ class ReservaViewSet(viewsets.ModelViewSet):
             "es_clase": tipo_uso == "Clase programada",
         }
 
+    def _estado_llaves(self, espacio):
+        """Resumen de las llaves del espacio; requiere ``espacio.llaves`` precargado."""
+        llaves = list(espacio.llaves.all()) if espacio else []
+        detalle = []
+        for llave in llaves:
+            prestamo = llave.prestamo_actual
+            portador = prestamo.usuario if prestamo else None
+            detalle.append(
+                {
+                    "id": str(llave.id),
+                    "codigo": llave.codigo,
+                    "estado": llave.estado,
+                    "estado_display": llave.get_estado_display(),
+                    "portador": (portador.get_full_name() or portador.username) if portador else None,
+                    "prestada_desde": prestamo.fecha_prestamo.isoformat() if prestamo else None,
+                }
+            )
+
+        disponibles = sum(1 for llave in llaves if llave.estado == EstadoLlave.DISPONIBLE)
+        if not llaves:
+            estado = "sin_llave"
+        elif disponibles:
+            estado = EstadoLlave.DISPONIBLE.value
+        elif any(llave.estado == EstadoLlave.PRESTADA for llave in llaves):
+            estado = EstadoLlave.PRESTADA.value
+        else:
+            estado = "no_disponible"
+        return {"estado": estado, "disponibles": disponibles, "llaves": detalle}
+
     def _estado_operativo(self, reserva, registro, ahora):
         tz = timezone.get_current_timezone()
         hora_inicio = reserva.fecha_inicio
@@ -440,6 +393,7 @@ class ReservaViewSet(viewsets.ModelViewSet):
                 codigo = part
         return codigo, grupo
 
+    @trazar()
     def _ensure_horario_reserva(self, bloque, fecha_objetivo, hora_inicio, hora_fin, codigo, grupo):
         horario_id = str(bloque.id)
         fecha_clave = fecha_objetivo.isoformat()
@@ -498,6 +452,7 @@ class ReservaViewSet(viewsets.ModelViewSet):
         )
         return reserva
 
+    @trazar()
     def _schedule_entries_for_date(self, fecha_objetivo, reservas):
         if not fecha_objetivo:
             return []
@@ -513,37 +468,15 @@ class ReservaViewSet(viewsets.ModelViewSet):
                     (reserva.fecha_inicio, reserva.fecha_fin)
                 )
 
-        dia_semana = fecha_objetivo.weekday()  # 0=Lunes
-        dia_filters = Q(recurrente=True, dia_semana=dia_semana)
-        dia_filters |= Q(
-            recurrente=False,
-            fecha_inicio__lte=fecha_objetivo,
-            fecha_fin__gte=fecha_objetivo,
-        )
-        dia_filters |= Q(
-            recurrente=False,
-            fecha_inicio__lte=fecha_objetivo,
-            fecha_fin__isnull=True,
-        )
-        dia_filters |= Q(
-            recurrente=False,
-            fecha_inicio__isnull=True,
-            fecha_fin__gte=fecha_objetivo,
-        )
-        dia_filters |= Q(
-            recurrente=False,
-            fecha_inicio__isnull=True,
-            fecha_fin__isnull=True,
-        )
-
-        horarios = (
-            DisponibilidadEspacio.objects.filter(
-                es_bloqueo=True,
-                observaciones__istartswith=self.CLASS_EVENT_PREFIX,
-            )
-            .filter(dia_filters)
-            .select_related("espacio")
-            .order_by("hora_inicio")
+        # Bloques de clase del dia, tomados de la cache de disponibilidad y ordenados por hora.
+        prefijo = self.CLASS_EVENT_PREFIX.lower()
+        horarios = sorted(
+            (
+                bloque
+                for bloque in disponibilidad_del_dia(fecha_objetivo)
+                if bloque.es_bloqueo and (bloque.observaciones or "").lower().startswith(prefijo)
+            ),
+            key=lambda bloque: (bloque.hora_inicio is None, bloque.hora_inicio),
         )
 
         nuevas_reservas = []
@@ -616,6 +549,7 @@ class ReservaViewSet(viewsets.ModelViewSet):
             reserva.estado = EstadoReserva.APROBADO
             reserva.save(update_fields=["estado", "actualizado_en"])
             self._ensure_registro_apertura(reserva)
+            metricas.contar_evento("reserva_aprobada")
 
             pendientes_conflictivos = Reserva.objects.solapa(
                 reserva.espacio,
@@ -633,10 +567,20 @@ class ReservaViewSet(viewsets.ModelViewSet):
                 )
                 otra_reserva.estado = EstadoReserva.RECHAZADO
                 otra_reserva.save(update_fields=["estado", "actualizado_en"])
+                metricas.contar_evento("reserva_rechazada_automatica")
 
         serializer = self.get_serializer(reserva)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=["get"], url_path="historial", permission_classes=[IsAuthenticated])
+    def historial(self, request, pk=None):
+        reserva = self.get_object()
+        historial = ReservaEstadoHistorial.objects.filter(reserva=reserva).order_by("-fecha", "-id")
+        paginador = HistorialCursorPagination()
+        pagina = paginador.paginate_queryset(historial, request, view=self)
+        serializer = ReservaEstadoHistorialSerializer(pagina, many=True)
+        return paginador.get_paginated_response(serializer.data)
+
     @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
     def rechazar(self, request, pk=None):
         reserva = self.get_object()
@@ -649,6 +593,7 @@ class ReservaViewSet(viewsets.ModelViewSet):
         self._register_historial(reserva, EstadoReserva.RECHAZADO, comentario, request.user)
         reserva.estado = EstadoReserva.RECHAZADO
         reserva.save(update_fields=["estado", "actualizado_en"])
+        metricas.contar_evento("reserva_rechazada")
         serializer = self.get_serializer(reserva)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -683,6 +628,14 @@ class ReservaViewSet(viewsets.ModelViewSet):
         )
         reservas = list(reservas_qs)
         reservas.extend(self._schedule_entries_for_date(fecha_objetivo, reservas))
+        # Llaves de todos los espacios del dia (con su prestamo abierto) en una consulta.
+        prefetch_related_objects(
+            reservas,
+            Prefetch(
+                "espacio__llaves",
+                queryset=Llave.objects.select_related("prestamo_actual__usuario").order_by("codigo"),
+            ),
+        )
 
         ahora = timezone.now()
         resultados = []
@@ -774,6 +727,7 @@ class ReservaViewSet(viewsets.ModelViewSet):
                     "profesor_solicitante": solicitante,
                     "tipo_uso": detalles["tipo_uso"],
                     "requiere_llaves": reserva.requiere_llaves,
+                    "llaves": self._estado_llaves(reserva.espacio),
                     "codigo_materia": detalles["codigo_materia"],
                     "codigo_grupo": detalles["codigo_grupo"],
                     "es_clase": detalles["es_clase"],
@@ -897,8 +851,8 @@ class ReservaViewSet(viewsets.ModelViewSet):
             )
 
         now = timezone.now()
-        ventana_inicio = hora_programada - timedelta(minutes=20)
-        ventana_fin = hora_programada + timedelta(minutes=5)
+        ventana_inicio = hora_programada - VENTANA_APERTURA_ANTES
+        ventana_fin = hora_programada + VENTANA_APERTURA_DESPUES
         if now < ventana_inicio:
             espera = _format_duration(ventana_inicio - now)
             return Response(
@@ -1073,7 +1027,7 @@ class ReservaViewSet(viewsets.ModelViewSet):
                 apertura_real, timezone.get_current_timezone()
             )
         ventana_inicio = apertura_real or hora_programada
-        ventana_fin = hora_programada + timedelta(minutes=30)
+        ventana_fin = hora_programada + VENTANA_ASISTENCIA
         if now < ventana_inicio:
             espera = _format_duration(ventana_inicio - now)
             return Response(
@@ -1188,6 +1142,7 @@ class ReservaViewSet(viewsets.ModelViewSet):
             ]
         )
         if estado == EstadoAsistencia.AUSENTE:
+            metricas.contar_evento("ausencia")
             registro = self._registrar_cierre_registro(
                 registro,
                 MotivoCierre.AUSENCIA,
@@ -1284,7 +1239,7 @@ class ReservaViewSet(viewsets.ModelViewSet):
         if not hora_fin_referencia:
             hora_fin_referencia = hora_inicio_cierre
 
-        ventana_fin = hora_fin_referencia + timedelta(minutes=5)
+        ventana_fin = hora_fin_referencia + VENTANA_CIERRE
         if hora_cierre < hora_inicio_cierre:
             espera = _format_duration(hora_inicio_cierre - hora_cierre)
             return Response(
@@ -1322,9 +1277,30 @@ class ReservaViewSet(viewsets.ModelViewSet):
 
 
 class ReservaEstadoHistorialViewSet(viewsets.ModelViewSet):
-    queryset = ReservaEstadoHistorial.objects.all().order_by("-fecha")
+    queryset = ReservaEstadoHistorial.objects.all().order_by("-fecha", "-id")
     serializer_class = ReservaEstadoHistorialSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = HistorialCursorPagination
+
+    def _filtro(self, nombre):
+        valor = self.request.query_params.get(nombre)
+        if not valor:
+            return None
+        campo = ReservaEstadoHistorial._meta.get_field(nombre).target_field
+        try:
+            return campo.to_python(valor)
+        except DjangoValidationError:
+            raise ParseError(f"Valor invalido para '{nombre}'.")
+
+    def get_queryset(self):
+        queryset = ReservaEstadoHistorial.objects.all().order_by("-fecha", "-id")
+        reserva_id = self._filtro("reserva")
+        if reserva_id:
+            queryset = queryset.filter(reserva_id=reserva_id)
+        cambiado_por_id = self._filtro("cambiado_por")
+        if cambiado_por_id:
+            queryset = queryset.filter(cambiado_por_id=cambiado_por_id)
+        return queryset
 
 
 class ReporteAdminMixin:
@@ -1348,6 +1324,28 @@ class ReporteAdminMixin:
                 raise ValueError("Formato de fecha invalido para 'fin'. Usa YYYY-MM-DD.")
         return inicio, fin
 
+    def _con_archivo(self, consulta, inicio, columna):
+        """
+        Registros de ``consulta(modelo)`` en las tablas vivas y, si el rango
+        puede alcanzar el archivo, tambien los archivados.
+
+        El archivo se separa por ``fecha_programada`` pero los reportes filtran
+        por ``columna``, que puede caer despues de la frontera (una ausencia
+        registrada dias despues de la clase). Si el rango empieza en la frontera
+        o despues, se pregunta al archivo por ``columna`` (indice BRIN).
+        """
+        fuentes = [consulta(RegistroApertura)]
+        frontera = archivo.frontera()
+        if frontera and (
+            inicio is None
+            or inicio < timezone.localdate(frontera)
+            or RegistroAperturaArchivado.objects.filter(
+                **{f"{columna}__gte": timezone.make_aware(datetime.combine(inicio, datetime.min.time()))}
+            ).exists()
+        ):
+            fuentes.append(consulta(RegistroAperturaArchivado))
+        return chain(*fuentes)
+
     def _reporte_aperturas(self, request):
         self._require_admin(request.user)
         try:
@@ -1355,19 +1353,20 @@ class ReporteAdminMixin:
         except ValueError as exc:
             return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        registros = (
-            RegistroApertura.objects.filter(completado=True)
-            .select_related("espacio", "reserva__usuario")
-            .order_by("-completado_en")
-        )
-
-        if inicio:
-            registros = registros.filter(completado_en__date__gte=inicio)
-        if fin:
-            registros = registros.filter(completado_en__date__lte=fin)
+        def consulta(modelo):
+            registros = (
+                modelo.objects.filter(completado=True)
+                .select_related("espacio", "reserva__usuario")
+                .order_by("-completado_en")
+            )
+            if inicio:
+                registros = registros.filter(completado_en__date__gte=inicio)
+            if fin:
+                registros = registros.filter(completado_en__date__lte=fin)
+            return registros
 
         resultados = []
-        for registro in registros:
+        for registro in self._con_archivo(consulta, inicio, "completado_en"):
             reserva = registro.reserva
             usuario = getattr(reserva, "usuario", None)
             nombre_usuario = None
@@ -1399,24 +1398,28 @@ class ReporteAdminMixin:
         except ValueError as exc:
             return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        registros = (
-            RegistroApertura.objects.filter(
-                asistencia_estado=EstadoAsistencia.AUSENTE
+        def consulta(modelo):
+            registros = (
+                modelo.objects.filter(
+                    asistencia_estado=EstadoAsistencia.AUSENTE
+                )
+                .select_related("espacio", "reserva")
+                .order_by("-asistencia_registrada_en")
             )
-            .select_related("espacio", "reserva")
-            .order_by("-asistencia_registrada_en")
-        )
-
-        if inicio:
-            registros = registros.filter(asistencia_registrada_en__date__gte=inicio)
-        if fin:
-            registros = registros.filter(asistencia_registrada_en__date__lte=fin)
+            if inicio:
+                registros = registros.filter(asistencia_registrada_en__date__gte=inicio)
+            if fin:
+                registros = registros.filter(asistencia_registrada_en__date__lte=fin)
+            return registros
 
         resultados = []
-        for registro in registros:
+        for registro in self._con_archivo(consulta, inicio, "asistencia_registrada_en"):
             reserva = registro.reserva
             metadata = registro.metadata or {}
-            reserva_metadata = reserva.metadata if isinstance(reserva.metadata, dict) else {}
+            # En el archivo la reserva puede faltar (LEFT JOIN, ver RegistroAperturaArchivado).
+            reserva_metadata = getattr(reserva, "metadata", None)
+            if not isinstance(reserva_metadata, dict):
+                reserva_metadata = {}
             curso_data = reserva_metadata.get("curso") if isinstance(reserva_metadata.get("curso"), dict) else {}
 
             def _first_value(data, keys):
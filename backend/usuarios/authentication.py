@@ -0,0 +1,70 @@
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .models import Rol, Usuario
+from .tokens import (
+    CLAIM_ROL,
+    CLAIM_ROL_ID,
+    CLAIM_SUPERUSUARIO,
+    CLAIM_VERSION,
+    CLAIMS_PERFIL,
+    estado_token,
+)
+
+
+class JWTRolAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` con soporte para ``JWT_SIN_ESTADO``.
+
+    En ese modo, las peticiones de solo lectura construyen el usuario a partir
+    de los claims (sin consultar ``Rol``; ``Usuario`` solo cuando su version no
+    esta en cache, ver ``tokens.estado_token``). Las escrituras siempre cargan
+    el usuario y rechazan tokens con una ``version_token`` anterior.
+    """
+
+    def get_user(self, validated_token):
+        if getattr(self, "_solo_lectura", False) and CLAIM_VERSION in validated_token:
+            return self._usuario_desde_token(validated_token)
+
+        user = super().get_user(validated_token)
+        version = validated_token.get(CLAIM_VERSION)
+        if version is not None and version != user.version_token:
+            raise AuthenticationFailed("El token es de una version anterior del usuario.", code="token_version")
+        return user
+
+    def authenticate(self, request):
+        self._solo_lectura = (
+            getattr(settings, "JWT_SIN_ESTADO", False) and request.method in SAFE_METHODS
+        )
+        return super().authenticate(request)
+
+    def _usuario_desde_token(self, token):
+        usuario_id = token.get(jwt_settings.USER_ID_CLAIM)
+        if usuario_id is None:
+            raise AuthenticationFailed("El token no identifica al usuario.", code="token_not_valid")
+
+        estado = estado_token(usuario_id)
+        if estado is None:
+            raise AuthenticationFailed("Usuario no encontrado.", code="user_not_found")
+        version, activo = estado
+        if not activo:
+            raise AuthenticationFailed("El usuario esta inactivo.", code="user_inactive")
+        if version != token[CLAIM_VERSION]:
+            raise AuthenticationFailed("El token es de una version anterior del usuario.", code="token_version")
+
+        # Instancia sin guardar: sirve para filtros (usuario=request.user) y para
+        # leer rol.nombre, pero no tiene el resto del perfil.
+        usuario = Usuario(
+            id=int(usuario_id),
+            is_active=activo,
+            is_superuser=bool(token.get(CLAIM_SUPERUSUARIO)),
+            version_token=token[CLAIM_VERSION],
+            **{campo: token.get(campo) or "" for campo in CLAIMS_PERFIL},
+        )
+        usuario.rol = Rol(id=token[CLAIM_ROL_ID], nombre=token[CLAIM_ROL]) if token.get(CLAIM_ROL_ID) else None
+        usuario._state.adding = False
+        usuario.desde_token = True
+        return usuario
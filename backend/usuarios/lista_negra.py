@@ -0,0 +1,145 @@
+"""
+Lista negra de refresh tokens.
+
+Con ``ROTATE_REFRESH_TOKENS`` y ``BLACKLIST_AFTER_ROTATION`` cada refresh agrega
+una fila a ``OutstandingToken`` y otra a ``BlacklistedToken``. Aqui se:
+
+- recuerdan los JTI revocados recientemente (LRU acotado en memoria y, si la
+  cache es compartida, tambien en ella) para rechazar un refresh repetido sin
+  consultar la base;
+- revocan y registran tokens con el usuario ya cargado por el serializer, sin
+  volver a buscarlo en cada paso;
+- purgan en lotes los tokens vencidos (comando ``purgar_tokens``).
+
+Un token que no esta en memoria se sigue verificando en la base: otro proceso
+pudo revocarlo, asi que solo las respuestas positivas salen de la memoria.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+
+class RevocadosRecientes:
+    """LRU de ``jti -> exp`` (epoch); las entradas vencidas se descartan al leerlas."""
+
+    def __init__(self, capacidad):
+        self.capacidad = capacidad
+        self._jtis = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _clave(self, jti):
+        return f"usuarios:jti_revocado:{jti}"
+
+    def contiene(self, jti):
+        ahora = time.time()
+        with self._lock:
+            exp = self._jtis.get(jti)
+            if exp is not None:
+                if exp > ahora:
+                    self._jtis.move_to_end(jti)
+                    return True
+                del self._jtis[jti]
+        exp = cache.get(self._clave(jti))
+        if exp is None or exp <= ahora:
+            return False
+        self._recordar(jti, exp)
+        return True
+
+    def agregar(self, jti, exp):
+        restante = int(exp - time.time())
+        if restante <= 0:
+            return
+        self._recordar(jti, exp)
+        cache.set(self._clave(jti), exp, timeout=restante)
+
+    def _recordar(self, jti, exp):
+        with self._lock:
+            self._jtis[jti] = exp
+            self._jtis.move_to_end(jti)
+            while len(self._jtis) > self.capacidad:
+                self._jtis.popitem(last=False)
+
+
+revocados = RevocadosRecientes(getattr(settings, "TOKENS_REVOCADOS_EN_MEMORIA", 10000))
+
+
+class RefreshTokenRevocable(RefreshToken):
+    """
+    ``RefreshToken`` que consulta primero ``revocados``. Si el serializer asigna
+    ``usuario``, ``blacklist`` y ``outstand`` lo usan en lugar de buscarlo.
+    """
+
+    usuario = None
+
+    @property
+    def jti(self):
+        return self.payload[jwt_settings.JTI_CLAIM]
+
+    def check_blacklist(self):
+        if revocados.contiene(self.jti):
+            raise TokenError("El token fue revocado.")
+        try:
+            super().check_blacklist()
+        except TokenError:
+            revocados.agregar(self.jti, self.payload["exp"])
+            raise
+
+    def _datos_registro(self):
+        return {
+            "user": self.usuario,
+            "created_at": self.current_time,
+            "token": str(self),
+            "expires_at": datetime_from_epoch(self.payload["exp"]),
+        }
+
+    def blacklist(self):
+        if self.usuario is None:
+            resultado = super().blacklist()
+        else:
+            token, _ = OutstandingToken.objects.get_or_create(jti=self.jti, defaults=self._datos_registro())
+            resultado = BlacklistedToken.objects.get_or_create(token=token)
+        revocados.agregar(self.jti, self.payload["exp"])
+        return resultado
+
+    def outstand(self):
+        if self.usuario is None:
+            return super().outstand()
+        # Tras la rotacion el JTI es nuevo (``set_jti``): no hace falta buscarlo antes.
+        return OutstandingToken.objects.create(jti=self.jti, **self._datos_registro()), True
+
+
+def purgar_vencidos(ahora=None, lote=1000, pausa=0):
+    """
+    Borra los tokens vencidos (y su fila en la lista negra) de ``lote`` en ``lote``.
+    Devuelve la cantidad de ``OutstandingToken`` eliminados.
+    """
+    ahora = ahora or timezone.now()
+    total = 0
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=ahora)
+            .order_by("expires_at", "id")
+            .values_list("id", flat=True)[:lote]
+        )
+        if not ids:
+            break
+        with transaction.atomic():
+            BlacklistedToken.objects.filter(token_id__in=ids).delete()
+            OutstandingToken.objects.filter(id__in=ids).delete()
+        total += len(ids)
+        if len(ids) < lote:
+            break
+        if pausa:
+            time.sleep(pausa)
+    return total
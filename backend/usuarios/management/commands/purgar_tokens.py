@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from usuarios.lista_negra import purgar_vencidos
+
+
+class Command(BaseCommand):
+    help = (
+        "Elimina los refresh tokens vencidos de la lista de tokens emitidos y de la "
+        "lista negra. Borra en lotes cortos para no bloquear los refresh en curso."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=1000,
+            help="Tokens eliminados por transaccion (por defecto 1000).",
+        )
+        parser.add_argument(
+            "--pausa",
+            type=float,
+            default=0,
+            help="Segundos de espera entre lotes para repartir la carga.",
+        )
+
+    def handle(self, *args, **options):
+        lote = options["lote"]
+        pausa = options["pausa"]
+        if lote < 1:
+            raise CommandError("--lote debe ser mayor que cero.")
+        if pausa < 0:
+            raise CommandError("--pausa no puede ser negativa.")
+
+        total = purgar_vencidos(lote=lote, pausa=pausa)
+        self.stdout.write(f"Tokens vencidos eliminados: {total}.")
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+# La tabla es de simplejwt; `purgar_tokens` recorre los vencidos por expires_at.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0002_version_token'),
+        ('token_blacklist', '0013_alter_blacklistedtoken_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS usuarios_token_expira_idx "
+            "ON token_blacklist_outstandingtoken (expires_at, id);",
+            reverse_sql="DROP INDEX IF EXISTS usuarios_token_expira_idx;",
+        ),
+    ]
@@ -28,6 +28,8 @@ class Usuario(AbstractUser):
     externo_provider = models.CharField(max_length=100, blank=True, null=True)
     externo_id = models.CharField(max_length=255, blank=True, null=True)
     actualizado_en = models.DateTimeField(auto_now=True)
+    # Se incrementa cuando cambian rol, superusuario o estado; invalida los JWT emitidos antes.
+    version_token = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}" if self.last_name else self.first_name
@@ -0,0 +1,147 @@
+"""
+Capacidades compiladas por rol.
+
+Cada ``Rol`` se traduce una sola vez a un ``Capacidades`` inmutable: los
+permisos por defecto de su nombre mas los de ``Rol.permisos`` (``{"modulo":
+"nivel"}`` o ``{"modulo": ["nivel", ...]}``, que producen ``"modulo:nivel"``).
+El resultado queda en memoria del proceso por ``rol_id``, junto con la
+generacion del rol leida de la cache ``referencias``. Al confirmar el guardado o
+borrado de un rol (ver ``signals.py``) la generacion sube y cualquier proceso
+que lea esa cache lo recompila. Con ``CACHE_REFERENCIAS=memoria`` la cache es de
+cada proceso y los demas no ven la generacion nueva, asi que cada entrada
+compilada ademas vence a los ``CACHE_REFERENCIAS_TTL`` segundos: ese es el
+desfase maximo entre workers. Con ``archivo`` o ``db`` el cambio se ve de
+inmediato.
+
+Las vistas preguntan ``capacidades_de(request.user).puede(...)`` en lugar de
+comparar ``rol.nombre``.
+"""
+
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from config import metricas
+from config.referencias import ALIAS as CACHE_REFERENCIAS
+
+
+GESTIONAR_AULAS = "reservas:manage_aulas"
+GESTIONAR_LABORATORIOS = "reservas:manage_labs"
+GESTIONAR_APERTURAS = "aperturas:manage"
+GESTIONAR_LLAVES = "llaves:manage"
+
+# Nivel que concede cualquier permiso del modulo ("usuarios": "full").
+NIVEL_TOTAL = "full"
+ROL_ADMIN = "admin"
+
+# Lo que cada rol conocido puede hacer aunque su JSON de permisos este vacio.
+PERMISOS_POR_ROL = {
+    "secretaria": {GESTIONAR_AULAS},
+    "laboratorista": {GESTIONAR_LABORATORIOS},
+    "conserje": {GESTIONAR_APERTURAS, GESTIONAR_LLAVES},
+}
+
+
+@dataclass(frozen=True)
+class Capacidades:
+    rol: str | None = None
+    es_admin: bool = False
+    permisos: frozenset = field(default_factory=frozenset)
+
+    def puede(self, permiso):
+        if self.es_admin:
+            return True
+        if permiso in self.permisos:
+            return True
+        modulo = permiso.split(":", 1)[0]
+        return f"{modulo}:{NIVEL_TOTAL}" in self.permisos
+
+
+SIN_PERMISOS = Capacidades()
+SUPERUSUARIO = Capacidades(rol=ROL_ADMIN, es_admin=True)
+
+# rol_id -> (generacion, vence, Capacidades)
+_compiladas = {}
+
+
+def _clave_generacion(rol_id):
+    return f"usuarios:permisos:{rol_id}"
+
+
+def _generacion(clave):
+    cache = caches[CACHE_REFERENCIAS]
+    generacion = cache.get(_clave_generacion(clave))
+    if generacion is None:
+        # Igual que en config.referencias: un valor inicial unico por si la cache se reinicio.
+        cache.add(_clave_generacion(clave), time.time_ns(), timeout=None)
+        generacion = cache.get(_clave_generacion(clave))
+    return generacion
+
+
+def compilar(nombre, permisos):
+    nombre = (nombre or "").strip().lower() or None
+    concedidos = set(PERMISOS_POR_ROL.get(nombre, ()))
+    if not isinstance(permisos, dict):
+        permisos = {}
+    for modulo, niveles in permisos.items():
+        if isinstance(niveles, str):
+            niveles = [niveles]
+        if not isinstance(niveles, (list, tuple)):
+            continue
+        concedidos.update(f"{modulo}:{nivel}" for nivel in niveles if isinstance(nivel, str) and nivel)
+    return Capacidades(rol=nombre, es_admin=nombre == ROL_ADMIN, permisos=frozenset(concedidos))
+
+
+def _datos_rol(user, rol_id):
+    # Si el rol ya vino cargado con el usuario se reutiliza; el del modo sin
+    # estado (``desde_token``) solo trae el nombre, asi que se consulta.
+    from .models import Rol, Usuario
+
+    if Usuario.rol.is_cached(user) and not getattr(user, "desde_token", False):
+        rol = user.rol
+        return (rol.nombre, rol.permisos) if rol else None
+    return Rol.objects.filter(pk=rol_id).values_list("nombre", "permisos").first()
+
+
+def capacidades_de(user):
+    if not user or not getattr(user, "is_authenticated", False):
+        return SIN_PERMISOS
+    if getattr(user, "is_superuser", False):
+        return SUPERUSUARIO
+    rol_id = getattr(user, "rol_id", None)
+    if rol_id is None:
+        return SIN_PERMISOS
+
+    clave = str(rol_id)
+    generacion = _generacion(clave)
+    ahora = time.monotonic()
+    compilada = _compiladas.get(clave)
+    acierto = bool(compilada and compilada[0] == generacion and compilada[1] > ahora)
+    metricas.cache_leida("permisos", acierto)
+    if acierto:
+        return compilada[2]
+
+    datos = _datos_rol(user, rol_id)
+    if datos is None:
+        return SIN_PERMISOS
+    capacidades = compilar(*datos)
+    _compiladas[clave] = (generacion, ahora + settings.CACHE_REFERENCIAS_TTL, capacidades)
+    return capacidades
+
+
+def _publicar_generacion(clave):
+    _compiladas.pop(clave, None)
+    cache = caches[CACHE_REFERENCIAS]
+    try:
+        cache.incr(_clave_generacion(clave))
+    except ValueError:
+        cache.set(_clave_generacion(clave), time.time_ns(), timeout=None)
+
+
+def invalidar(rol_id):
+    # Al confirmar: antes, otro proceso podria recompilar con el rol viejo y la generacion nueva.
+    clave = str(rol_id)
+    transaction.on_commit(lambda: _publicar_generacion(clave))
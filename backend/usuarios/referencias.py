@@ -0,0 +1,6 @@
+from config.referencias import ConjuntoReferencia
+
+from .models import Rol
+
+
+ROLES = ConjuntoReferencia('roles', lambda: list(Rol.objects.order_by('nombre')), modelos=[Rol])
@@ -1,5 +1,10 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .lista_negra import RefreshTokenRevocable
 from .models import Usuario, Rol
+from .tokens import CLAIM_VERSION, agregar_claims
 
 class RolSerializer(serializers.ModelSerializer):
     class Meta:
@@ -20,3 +25,41 @@ class UsuarioSerializer(serializers.ModelSerializer):
             'is_active', 'date_joined', 'actualizado_en'
         ]
         read_only_fields = ['id', 'date_joined', 'actualizado_en']
+
+
+class TokenConRolSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return agregar_claims(super().get_token(user), user)
+
+
+class TokenConRolRefreshSerializer(TokenRefreshSerializer):
+    token_class = RefreshTokenRevocable
+
+    def validate(self, attrs):
+        # Mismo flujo que TokenRefreshSerializer, pero el token se decodifica una
+        # sola vez y el usuario se carga una sola vez para todos los pasos.
+        refresh = self.token_class(attrs['refresh'])
+        usuario = (
+            Usuario.objects.filter(pk=refresh.get(jwt_settings.USER_ID_CLAIM))
+            .only('id', 'is_active', 'version_token')
+            .first()
+        )
+        if not jwt_settings.USER_AUTHENTICATION_RULE(usuario):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        # El access nuevo copia los claims del refresh: si el rol cambio, hay que iniciar sesion otra vez.
+        version = refresh.get(CLAIM_VERSION)
+        if version is not None and version != usuario.version_token:
+            raise InvalidToken('El rol o el estado del usuario cambio. Inicia sesion de nuevo.')
+
+        refresh.usuario = usuario
+        data = {'access': str(refresh.access_token)}
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if jwt_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data['refresh'] = str(refresh)
+        return data
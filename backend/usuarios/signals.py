@@ -0,0 +1,57 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Rol, Usuario
+from .permisos import invalidar as invalidar_permisos
+from .tokens import invalidar_tokens_de_rol, publicar_estado
+
+
+# Campos que viajan como claims en el JWT; si cambian, los tokens emitidos quedan obsoletos.
+CAMPOS_AUTORIZACION = ('rol_id', 'is_superuser', 'is_active')
+
+
+@receiver(pre_save, sender=Usuario)
+def versionar_token_usuario(sender, instance, update_fields=None, **kwargs):
+    instance._version_token_cambio = False
+    if not instance.pk:
+        return
+    if update_fields is not None and not {'rol', 'rol_id', 'is_superuser', 'is_active'} & set(update_fields):
+        return
+    anterior = Usuario.objects.filter(pk=instance.pk).values(*CAMPOS_AUTORIZACION).first()
+    if anterior and any(anterior[campo] != getattr(instance, campo) for campo in CAMPOS_AUTORIZACION):
+        instance.version_token += 1
+        instance._version_token_cambio = True
+
+
+@receiver(post_save, sender=Usuario)
+def publicar_version_usuario(sender, instance, update_fields=None, **kwargs):
+    if not getattr(instance, '_version_token_cambio', False):
+        return
+    if update_fields is not None and 'version_token' not in update_fields:
+        Usuario.objects.filter(pk=instance.pk).update(version_token=instance.version_token)
+    publicar_estado(instance.pk, instance.version_token, instance.is_active)
+
+
+@receiver(pre_save, sender=Rol)
+def detectar_cambio_nombre_rol(sender, instance, **kwargs):
+    instance._nombre_cambio = False
+    if instance.pk:
+        anterior = Rol.objects.filter(pk=instance.pk).values_list('nombre', flat=True).first()
+        instance._nombre_cambio = anterior is not None and anterior != instance.nombre
+
+
+@receiver(post_save, sender=Rol)
+def versionar_tokens_rol(sender, instance, **kwargs):
+    invalidar_permisos(instance.pk)
+    if getattr(instance, '_nombre_cambio', False):
+        invalidar_tokens_de_rol(instance.pk)
+
+
+@receiver(pre_delete, sender=Rol)
+def versionar_tokens_rol_eliminado(sender, instance, **kwargs):
+    invalidar_tokens_de_rol(instance.pk)
+
+
+@receiver(post_delete, sender=Rol)
+def descartar_permisos_rol(sender, instance, **kwargs):
+    invalidar_permisos(instance.pk)
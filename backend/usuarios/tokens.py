@@ -0,0 +1,76 @@
+"""
+Claims de rol en los JWT y versionado de tokens.
+
+Los tokens llevan el nombre del rol, si el usuario es superusuario y
+``Usuario.version_token``. Con ``JWT_SIN_ESTADO`` activo, las lecturas se
+autorizan solo con esos claims (ver ``authentication.py``); cuando cambia el rol
+o se desactiva al usuario la version sube y los tokens anteriores dejan de
+servir.
+
+Para comparar sin ir a la base en cada lectura, ``(version_token, is_active)``
+se guarda en la cache ``referencias``: se publica al confirmar el cambio y, si
+un proceso no tiene la entrada, la lee de la base y la agrega. Las entradas
+vencen a los ``CACHE_REFERENCIAS_TTL`` segundos, que es el desfase maximo con
+``CACHE_REFERENCIAS=memoria`` (cache por proceso); con ``archivo`` o ``db`` el
+cambio se ve de inmediato.
+"""
+
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+
+from config.referencias import ALIAS as CACHE_REFERENCIAS
+
+
+CLAIM_ROL = "rol"
+CLAIM_ROL_ID = "rol_id"
+CLAIM_SUPERUSUARIO = "es_superusuario"
+CLAIM_VERSION = "tv"
+CLAIMS_PERFIL = ("username", "first_name", "last_name")
+
+
+def _clave_version(usuario_id):
+    return f"usuarios:version_token:{usuario_id}"
+
+
+def estado_token(usuario_id):
+    """``(version_token, is_active)`` vigentes del usuario, o ``None`` si no existe."""
+    from .models import Usuario
+
+    cache = caches[CACHE_REFERENCIAS]
+    estado = cache.get(_clave_version(usuario_id))
+    if estado is None:
+        estado = Usuario.objects.filter(pk=usuario_id).values_list("version_token", "is_active").first()
+        if estado is None:
+            return None
+        # add y no set: si mientras tanto se publico un cambio, no se pisa con lo leido.
+        cache.add(_clave_version(usuario_id), tuple(estado))
+    return tuple(estado)
+
+
+def publicar_estado(usuario_id, version, activo):
+    def publicar():
+        caches[CACHE_REFERENCIAS].set(_clave_version(usuario_id), (version, activo))
+
+    transaction.on_commit(publicar)
+
+
+def agregar_claims(token, usuario):
+    rol = usuario.rol
+    token[CLAIM_ROL] = rol.nombre.lower() if rol and rol.nombre else None
+    token[CLAIM_ROL_ID] = str(rol.pk) if rol else None
+    token[CLAIM_SUPERUSUARIO] = bool(usuario.is_superuser)
+    token[CLAIM_VERSION] = usuario.version_token
+    for campo in CLAIMS_PERFIL:
+        token[campo] = getattr(usuario, campo, "") or ""
+    return token
+
+
+def invalidar_tokens_de_rol(rol_id):
+    """Sube la version de todos los usuarios del rol (por ejemplo, al renombrarlo)."""
+    from .models import Usuario
+
+    Usuario.objects.filter(rol_id=rol_id).update(version_token=F("version_token") + 1)
+    filas = Usuario.objects.filter(rol_id=rol_id).values_list("id", "version_token", "is_active")
+    for usuario_id, version, activo in filas:
+        publicar_estado(usuario_id, version, activo)
@@ -3,7 +3,9 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from .models import Usuario, Rol
-from .serializers import UsuarioSerializer, RolSerializer
+from .referencias import ROLES
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .serializers import RolSerializer, TokenConRolRefreshSerializer, TokenConRolSerializer, UsuarioSerializer
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 
 class RolViewSet(viewsets.ModelViewSet):
@@ -11,6 +13,9 @@ class RolViewSet(viewsets.ModelViewSet):
     serializer_class = RolSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    def list(self, request, *args, **kwargs):
+        return Response(self.get_serializer(ROLES.obtener(), many=True).data)
+
 class UsuarioViewSet(viewsets.ModelViewSet):
     queryset = Usuario.objects.all().order_by('-date_joined')
     serializer_class = UsuarioSerializer
@@ -18,5 +23,17 @@ class UsuarioViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def me(self, request):
-        serializer = self.get_serializer(request.user)
+        usuario = request.user
+        if getattr(usuario, 'desde_token', False):
+            # Con JWT_SIN_ESTADO el usuario viene de los claims; el perfil completo esta en la base.
+            usuario = Usuario.objects.select_related('rol').get(pk=usuario.pk)
+        serializer = self.get_serializer(usuario)
         return Response(serializer.data)
+
+
+class TokenConRolView(TokenObtainPairView):
+    serializer_class = TokenConRolSerializer
+
+
+class TokenConRolRefreshView(TokenRefreshView):
+    serializer_class = TokenConRolRefreshSerializer
@@ -1,7 +1,7 @@
 import axios from 'axios';
 
 // Configurar Axios con base URL
-const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000/api/';
+export const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000/api/';
 axios.defaults.baseURL = API_BASE_URL;
 
 // Interceptor para agregar token de auth
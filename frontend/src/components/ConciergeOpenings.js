@@ -614,6 +614,17 @@ const renderOpeningCard = (opening) => {
     final: { label: 'Aula cerrada', style: { backgroundColor: PALETTE.red, color: '#fff' } },
   };
   const stageBadge = stageConfig[stage] || stageConfig.inicial;
+  const llavesInfo = opening.llaves || { estado: 'sin_llave', llaves: [] };
+  const llavePrestada = (llavesInfo.llaves || []).find((llave) => llave.estado === 'prestada');
+  const llaveLabels = {
+    disponible: `Llave disponible (${llavesInfo.disponibles})`,
+    prestada: llavePrestada
+      ? `Llave prestada a ${llavePrestada.portador || 'sin registro'}`
+      : 'Llave prestada',
+    no_disponible: 'Llave no disponible',
+    sin_llave: 'Sin llave registrada',
+  };
+  const llaveLabel = llaveLabels[llavesInfo.estado] || llaveLabels.sin_llave;
   const cardKey =
     opening.uid ||
     opening.reserva_id ||
@@ -655,6 +666,12 @@ const renderOpeningCard = (opening) => {
               </div>
               <div className="text-muted small">
                 <div><strong>Solicitante:</strong> {solicitanteLabel}</div>
+                <div>
+                  <strong>Llave:</strong>{' '}
+                  <span className={llavesInfo.estado === 'disponible' ? 'text-success' : 'text-danger'}>
+                    {llaveLabel}
+                  </span>
+                </div>
                 {opening.es_clase ? (
                   <div>
                     <strong>Materia:</strong> {opening.codigo_materia || 'N/D'} · <strong>Grupo:</strong> {opening.codigo_grupo || 'N/D'}
@@ -2,6 +2,7 @@ import React, { useEffect, useMemo, useState } from 'react';
 import { Link } from 'react-router-dom';
 import api from '../api';
 import { getUserFromToken } from '../utils/auth';
+import { subscribeNotificaciones } from '../utils/notificacionesStream';
 
 const quickActions = [
   {
@@ -44,6 +45,7 @@ const Home = () => {
   const [reservations, setReservations] = useState([]);
   const [spaces, setSpaces] = useState([]);
   const [notifications, setNotifications] = useState([]);
+  const [unreadCount, setUnreadCount] = useState(0);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const userRole = useMemo(
@@ -78,10 +80,11 @@ const Home = () => {
           api.get('usuarios/me/'),
           api.get('reservas/'),
           api.get('espacios/'),
-          api.get('notificaciones/'),
+          api.get('notificaciones/', { params: { page_size: 3 } }),
+          api.get('notificaciones/no-leidas/'),
         ]);
 
-        const [userRes, reservationsRes, spacesRes, notificationsRes] = responses;
+        const [userRes, reservationsRes, spacesRes, notificationsRes, unreadRes] = responses;
 
         if (userRes.status === 'fulfilled' && userRes.value?.data) {
           setUser(userRes.value.data);
@@ -95,8 +98,15 @@ const Home = () => {
           setSpaces(spacesRes.value.data);
         }
 
-        if (notificationsRes.status === 'fulfilled' && Array.isArray(notificationsRes.value?.data)) {
-          setNotifications(notificationsRes.value.data);
+        if (
+          notificationsRes.status === 'fulfilled' &&
+          Array.isArray(notificationsRes.value?.data?.results)
+        ) {
+          setNotifications(notificationsRes.value.data.results);
+        }
+
+        if (unreadRes.status === 'fulfilled' && typeof unreadRes.value?.data?.no_leidas === 'number') {
+          setUnreadCount(unreadRes.value.data.no_leidas);
         }
 
         const hasRejections = responses.some((res) => res.status === 'rejected');
@@ -113,6 +123,19 @@ const Home = () => {
     fetchDashboard();
   }, []);
 
+  useEffect(
+    () =>
+      subscribeNotificaciones({
+        onNotificacion: (notification) =>
+          setNotifications((current) => [
+            notification,
+            ...current.filter((item) => item.id !== notification.id),
+          ]),
+        onContador: ({ no_leidas: noLeidas }) => setUnreadCount(noLeidas),
+      }),
+    []
+  );
+
   const upcomingReservations = useMemo(() => {
     const now = new Date();
     return reservations
@@ -141,7 +164,6 @@ const Home = () => {
     const uniqueSpacesUsed = new Set(
       reservations.map((reservation) => reservation.espacio?.id).filter(Boolean)
     ).size;
-    const unreadCount = notifications.filter((notification) => notification.leido === false).length;
 
     return [
       {
@@ -157,7 +179,7 @@ const Home = () => {
       {
         label: 'Avisos sin leer',
         value: unreadCount.toLocaleString(),
-        detail: `${notifications.length.toLocaleString()} en total`,
+        detail: unreadCount > 0 ? 'Revisa tu bandeja' : 'Todo al dia',
       },
       {
         label: 'Reservas registradas',
@@ -165,7 +187,7 @@ const Home = () => {
         detail: 'Historico dentro de la plataforma',
       },
     ];
-  }, [upcomingReservations, reservations, spaces, notifications]);
+  }, [upcomingReservations, reservations, spaces, notifications, unreadCount]);
 
   const greetingName = useMemo(() => {
     if (!user) return 'Hola, bienvenido';
@@ -2,9 +2,27 @@ import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import api from '../api';
 
+const ESTADO_OPTIONS = [
+  { value: '', label: 'Todos los estados' },
+  { value: 'abierta', label: 'Abierta' },
+  { value: 'en_proceso', label: 'En proceso' },
+  { value: 'cerrada', label: 'Cerrada' },
+];
+
+// El backend marca las coincidencias con <mark>; se pintan como nodos de texto.
+const renderHighlight = (text) =>
+  text.split(/(<mark>.*?<\/mark>)/g).map((part, index) => {
+    const match = part.match(/^<mark>(.*)<\/mark>$/);
+    return match ? <mark key={index}>{match[1]}</mark> : <React.Fragment key={index}>{part}</React.Fragment>;
+  });
+
 const IncidenciasList = () => {
   const [incidencias, setIncidencias] = useState([]);
+  const [nextUrl, setNextUrl] = useState(null);
+  const [filters, setFilters] = useState({ q: '', estado: '', desde: '', hasta: '' });
+  const [searchText, setSearchText] = useState('');
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState('');
 
   useEffect(() => {
@@ -12,17 +30,97 @@ const IncidenciasList = () => {
       setError('');
       setLoading(true);
       try {
-        const response = await api.get('incidencias/');
-        setIncidencias(Array.isArray(response.data) ? response.data : []);
+        const params = Object.fromEntries(Object.entries(filters).filter(([, value]) => value));
+        const response = await api.get('incidencias/', { params });
+        setIncidencias(Array.isArray(response.data?.results) ? response.data.results : []);
+        setNextUrl(response.data?.next || null);
       } catch (err) {
-        setError('Error al cargar incidencias.');
+        setError(err.response?.data?.detail || 'Error al cargar incidencias.');
       } finally {
         setLoading(false);
       }
     };
 
     fetchIncidencias();
-  }, []);
+  }, [filters]);
+
+  const handleSearchSubmit = (event) => {
+    event.preventDefault();
+    setFilters((current) => ({ ...current, q: searchText.trim() }));
+  };
+
+  const handleFilterChange = (event) => {
+    const { name, value } = event.target;
+    setFilters((current) => ({ ...current, [name]: value }));
+  };
+
+  const handleLoadMore = async () => {
+    if (!nextUrl) return;
+    setLoadingMore(true);
+    try {
+      const response = await api.get(nextUrl);
+      const results = Array.isArray(response.data?.results) ? response.data.results : [];
+      setIncidencias((current) => [...current, ...results]);
+      setNextUrl(response.data?.next || null);
+    } catch (err) {
+      setError('Error al cargar incidencias.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const filtersBar = (
+    <div className="card-elevated p-3 bg-white mb-4">
+      <form className="d-flex gap-2 mb-3" onSubmit={handleSearchSubmit}>
+        <input
+          type="search"
+          className="form-control"
+          placeholder="Buscar por palabra clave (proyector, aire...)"
+          value={searchText}
+          onChange={(event) => setSearchText(event.target.value)}
+        />
+        <button type="submit" className="btn btn-success">Buscar</button>
+      </form>
+      <div className="row g-3 align-items-end">
+        <div className="col-md-4">
+          <label className="form-label small text-muted" htmlFor="incidencias-estado">Estado</label>
+          <select
+            id="incidencias-estado"
+            name="estado"
+            className="form-select"
+            value={filters.estado}
+            onChange={handleFilterChange}
+          >
+            {ESTADO_OPTIONS.map((option) => (
+              <option key={option.value} value={option.value}>{option.label}</option>
+            ))}
+          </select>
+        </div>
+        <div className="col-md-4">
+          <label className="form-label small text-muted" htmlFor="incidencias-desde">Desde</label>
+          <input
+            id="incidencias-desde"
+            type="date"
+            name="desde"
+            className="form-control"
+            value={filters.desde}
+            onChange={handleFilterChange}
+          />
+        </div>
+        <div className="col-md-4">
+          <label className="form-label small text-muted" htmlFor="incidencias-hasta">Hasta</label>
+          <input
+            id="incidencias-hasta"
+            type="date"
+            name="hasta"
+            className="form-control"
+            value={filters.hasta}
+            onChange={handleFilterChange}
+          />
+        </div>
+      </div>
+    </div>
+  );
 
   if (loading) {
     return (
@@ -55,6 +153,8 @@ const IncidenciasList = () => {
         </div>
       </div>
 
+      {filtersBar}
+
       {incidencias.length === 0 ? (
         <div className="card-elevated p-4 bg-white text-center">
           <h4 className="mb-1">Sin incidencias activas</h4>
@@ -87,9 +187,14 @@ const IncidenciasList = () => {
                         <strong>Reportada:</strong>{' '}
                         {inc.fecha_reportada ? new Date(inc.fecha_reportada).toLocaleString() : 'N/D'}
                       </span>
+                      <span>
+                        <strong>Respuestas:</strong> {inc.respuestas_count ?? 0}
+                      </span>
                     </div>
                   </div>
-                  {inc.descripcion ? (
+                  {inc.resaltado ? (
+                    <p className="text-muted mb-0">{renderHighlight(inc.resaltado)}</p>
+                  ) : inc.descripcion ? (
                     <p className="text-muted mb-0">{inc.descripcion}</p>
                   ) : (
                     <p className="text-muted mb-0">Sin descripcion proporcionada.</p>
@@ -100,6 +205,19 @@ const IncidenciasList = () => {
           })}
         </div>
       )}
+
+      {nextUrl && (
+        <div className="text-center mt-4">
+          <button
+            type="button"
+            className="btn btn-outline-success"
+            onClick={handleLoadMore}
+            disabled={loadingMore}
+          >
+            {loadingMore ? 'Cargando...' : 'Cargar mas'}
+          </button>
+        </div>
+      )}
     </div>
   );
 };
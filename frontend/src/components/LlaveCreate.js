@@ -6,11 +6,9 @@ const LlaveCreate = () => {
   const [formData, setFormData] = useState({
     codigo: '',
     espacio: '',
-    responsable: '',
     estado: 'disponible'
   });
   const [espacios, setEspacios] = useState([]);
-  const [usuarios, setUsuarios] = useState([]);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const navigate = useNavigate();
@@ -18,12 +16,8 @@ const LlaveCreate = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [espRes, usrRes] = await Promise.all([
-          api.get('espacios/'),
-          api.get('usuarios/')
-        ]);
+        const espRes = await api.get('espacios/');
         setEspacios(espRes.data);
-        setUsuarios(usrRes.data);
       } catch (err) {
         setError('Error al cargar datos');
       }
@@ -85,20 +79,6 @@ const LlaveCreate = () => {
                   ))}
                 </select>
               </div>
-              <div className="mb-3">
-                <label className="form-label">Responsable</label>
-                <select
-                  name="responsable"
-                  className="form-control"
-                  value={formData.responsable}
-                  onChange={handleChange}
-                >
-                  <option value="">Seleccionar responsable</option>
-                  {usuarios.map((usr) => (
-                    <option key={usr.id} value={usr.id}>{usr.first_name} {usr.last_name}</option>
-                  ))}
-                </select>
-              </div>
               <div className="mb-3">
                 <label className="form-label">Estado</label>
                 <select
@@ -109,7 +89,6 @@ const LlaveCreate = () => {
                   required
                 >
                   <option value="disponible">Disponible</option>
-                  <option value="prestada">Prestada</option>
                   <option value="perdida">Perdida</option>
                   <option value="mantenimiento">Mantenimiento</option>
                 </select>
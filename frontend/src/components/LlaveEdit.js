@@ -7,11 +7,9 @@ const LlaveEdit = () => {
   const [formData, setFormData] = useState({
     codigo: '',
     espacio: '',
-    responsable: '',
     estado: ''
   });
   const [espacios, setEspacios] = useState([]);
-  const [usuarios, setUsuarios] = useState([]);
   const [loading, setLoading] = useState(true);
   const [saving, setSaving] = useState(false);
   const [error, setError] = useState('');
@@ -20,19 +18,16 @@ const LlaveEdit = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [llaveRes, espRes, usrRes] = await Promise.all([
+        const [llaveRes, espRes] = await Promise.all([
           api.get(`llaves/${id}/`),
-          api.get('espacios/'),
-          api.get('usuarios/')
+          api.get('espacios/')
         ]);
         setFormData({
           codigo: llaveRes.data.codigo || '',
           espacio: llaveRes.data.espacio.id,
-          responsable: llaveRes.data.responsable ? llaveRes.data.responsable.id : '',
           estado: llaveRes.data.estado
         });
         setEspacios(espRes.data);
-        setUsuarios(usrRes.data);
       } catch (err) {
         setError('Error al cargar datos');
       } finally {
@@ -98,20 +93,6 @@ const LlaveEdit = () => {
                   ))}
                 </select>
               </div>
-              <div className="mb-3">
-                <label className="form-label">Responsable</label>
-                <select
-                  name="responsable"
-                  className="form-control"
-                  value={formData.responsable}
-                  onChange={handleChange}
-                >
-                  <option value="">Seleccionar responsable</option>
-                  {usuarios.map((usr) => (
-                    <option key={usr.id} value={usr.id}>{usr.first_name} {usr.last_name}</option>
-                  ))}
-                </select>
-              </div>
               <div className="mb-3">
                 <label className="form-label">Estado</label>
                 <select
@@ -119,13 +100,15 @@ const LlaveEdit = () => {
                   className="form-control"
                   value={formData.estado}
                   onChange={handleChange}
+                  disabled={formData.estado === 'prestada'}
                   required
                 >
+                  {formData.estado === 'prestada' && <option value="prestada">Prestada</option>}
                   <option value="disponible">Disponible</option>
-                  <option value="prestada">Prestada</option>
                   <option value="perdida">Perdida</option>
                   <option value="mantenimiento">Mantenimiento</option>
                 </select>
+                <div className="form-text">Las llaves se marcan como prestadas al prestarlas; una llave prestada cambia de estado al devolverla.</div>
               </div>
               <button type="submit" className="btn btn-success" disabled={saving}>
                 {saving ? 'Guardando...' : 'Actualizar Llave'}
@@ -24,6 +24,15 @@ const LlavesList = () => {
     fetchLlaves();
   }, []);
 
+  const handleDevolver = async (llave) => {
+    try {
+      const response = await api.post(`llaves/${llave.id}/devolver/`);
+      setLlaves((current) => current.map((item) => (item.id === llave.id ? response.data : item)));
+    } catch (err) {
+      setError(err.response?.data?.detail || 'No fue posible registrar la devolucion.');
+    }
+  };
+
   if (loading) {
     return (
       <div className="text-center py-5">
@@ -65,8 +74,7 @@ const LlavesList = () => {
       ) : (
         <div className="row g-4">
           {llaves.map((llave) => {
-            const responsable = llave.responsable || {};
-            const espacio = llave.espacio || {};
+            const prestamo = llave.prestamo_actual;
             return (
               <div key={llave.id} className="col-lg-6">
                 <div className="card-elevated h-100 p-4 bg-white d-flex flex-column gap-3">
@@ -75,21 +83,35 @@ const LlavesList = () => {
                       <h5 className="mb-1">{llave.codigo || 'Llave sin codigo'}</h5>
                       <span className="tag">{llave.estado || 'Sin estado'}</span>
                     </div>
-                    <Link to={`/llaves/${llave.id}/edit`} className="btn btn-sm btn-outline-success">
-                      Editar
-                    </Link>
+                    <div className="d-flex gap-2">
+                      {prestamo && (
+                        <button
+                          type="button"
+                          className="btn btn-sm btn-success"
+                          onClick={() => handleDevolver(llave)}
+                        >
+                          Recibir
+                        </button>
+                      )}
+                      <Link to={`/llaves/${llave.id}/edit`} className="btn btn-sm btn-outline-success">
+                        Editar
+                      </Link>
+                    </div>
                   </div>
                   <div className="reservation-card__meta">
                     <div className="d-flex flex-column small">
                       <span>
-                        <strong>Espacio:</strong> {espacio.nombre || 'No asignado'}
+                        <strong>Espacio:</strong> {llave.espacio_nombre || 'No asignado'}
                       </span>
                       <span>
-                        <strong>Responsable:</strong>{' '}
-                        {responsable.first_name
-                          ? `${responsable.first_name} ${responsable.last_name || ''}`
-                          : 'No asignado'}
+                        <strong>Responsable:</strong> {llave.responsable_nombre || 'No asignado'}
                       </span>
+                      {prestamo && (
+                        <span>
+                          <strong>Prestada desde:</strong>{' '}
+                          {new Date(prestamo.fecha_prestamo).toLocaleString()}
+                        </span>
+                      )}
                       <span>
                         <strong>Creada:</strong>{' '}
                         {llave.creado_en ? new Date(llave.creado_en).toLocaleString() : 'N/D'}
@@ -1,10 +1,13 @@
 import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import api from '../api';
+import { subscribeNotificaciones } from '../utils/notificacionesStream';
 
 const NotificacionesList = () => {
   const [notificaciones, setNotificaciones] = useState([]);
+  const [nextUrl, setNextUrl] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState('');
 
   useEffect(() => {
@@ -13,7 +16,8 @@ const NotificacionesList = () => {
       setLoading(true);
       try {
         const response = await api.get('notificaciones/');
-        setNotificaciones(Array.isArray(response.data) ? response.data : []);
+        setNotificaciones(Array.isArray(response.data?.results) ? response.data.results : []);
+        setNextUrl(response.data?.next || null);
       } catch (err) {
         setError('Error al cargar notificaciones.');
       } finally {
@@ -24,6 +28,45 @@ const NotificacionesList = () => {
     fetchNotificaciones();
   }, []);
 
+  const handleLoadMore = async () => {
+    if (!nextUrl) return;
+    setLoadingMore(true);
+    try {
+      const response = await api.get(nextUrl);
+      const results = Array.isArray(response.data?.results) ? response.data.results : [];
+      setNotificaciones((current) => [
+        ...current,
+        ...results.filter((item) => !current.some((existing) => existing.id === item.id)),
+      ]);
+      setNextUrl(response.data?.next || null);
+    } catch (err) {
+      setError('Error al cargar notificaciones.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const handleMarkAllRead = async () => {
+    try {
+      await api.post('notificaciones/marcar-leidas/', { antes: new Date().toISOString() });
+      setNotificaciones((current) => current.map((item) => ({ ...item, leido: true })));
+    } catch (err) {
+      setError('No fue posible marcar las notificaciones como leidas.');
+    }
+  };
+
+  useEffect(
+    () =>
+      subscribeNotificaciones({
+        onNotificacion: (notificacion) =>
+          setNotificaciones((current) => [
+            notificacion,
+            ...current.filter((item) => item.id !== notificacion.id),
+          ]),
+      }),
+    []
+  );
+
   if (loading) {
     return (
       <div className="text-center py-5">
@@ -47,7 +90,10 @@ const NotificacionesList = () => {
               Publica comunicados para la comunidad y revisa su estado de envio y lectura en un solo lugar.
             </p>
           </div>
-          <div>
+          <div className="d-flex gap-2">
+            <button type="button" className="btn btn-outline-light fw-semibold" onClick={handleMarkAllRead}>
+              Marcar todas como leidas
+            </button>
             <Link to="/notificaciones/create" className="btn btn-light text-success fw-semibold">
               Crear notificacion
             </Link>
@@ -111,6 +157,19 @@ const NotificacionesList = () => {
           })}
         </div>
       )}
+
+      {nextUrl && (
+        <div className="text-center mt-4">
+          <button
+            type="button"
+            className="btn btn-outline-success"
+            onClick={handleLoadMore}
+            disabled={loadingMore}
+          >
+            {loadingMore ? 'Cargando...' : 'Cargar mas'}
+          </button>
+        </div>
+      )}
     </div>
   );
 };
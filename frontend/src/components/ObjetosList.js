@@ -6,13 +6,18 @@ const ObjetosList = () => {
   const [objetos, setObjetos] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  const [query, setQuery] = useState('');
+  const [searchText, setSearchText] = useState('');
 
   useEffect(() => {
     const fetchObjetos = async () => {
       setError('');
       setLoading(true);
       try {
-        const response = await api.get('objetos-perdidos/');
+        // Con texto se consulta la busqueda por similitud (solo objetos sin reclamar).
+        const response = query
+          ? await api.get('objetos-perdidos/buscar/', { params: { q: query } })
+          : await api.get('objetos-perdidos/');
         setObjetos(Array.isArray(response.data) ? response.data : []);
       } catch (err) {
         setError('Error al cargar objetos perdidos.');
@@ -22,7 +27,12 @@ const ObjetosList = () => {
     };
 
     fetchObjetos();
-  }, []);
+  }, [query]);
+
+  const handleSearchSubmit = (event) => {
+    event.preventDefault();
+    setQuery(searchText.trim());
+  };
 
   if (loading) {
     return (
@@ -55,6 +65,17 @@ const ObjetosList = () => {
         </div>
       </div>
 
+      <form className="card-elevated p-3 bg-white mb-4 d-flex gap-2" onSubmit={handleSearchSubmit}>
+        <input
+          type="search"
+          className="form-control"
+          placeholder="Describe el objeto que buscas (celular negro, cuaderno...)"
+          value={searchText}
+          onChange={(event) => setSearchText(event.target.value)}
+        />
+        <button type="submit" className="btn btn-success">Buscar</button>
+      </form>
+
       {objetos.length === 0 ? (
         <div className="card-elevated p-4 bg-white text-center">
           <h4 className="mb-1">Sin registros recientes</h4>
@@ -0,0 +1,28 @@
+import { API_BASE_URL } from '../api';
+
+// El stream lo atiende el servidor ASGI (servicio `stream` en docker-compose).
+const STREAM_URL =
+  process.env.REACT_APP_STREAM_URL || `${API_BASE_URL}notificaciones/stream/`;
+
+export const subscribeNotificaciones = ({ onNotificacion, onContador } = {}) => {
+  const token = localStorage.getItem('token');
+  if (!token || typeof window.EventSource === 'undefined') {
+    return () => {};
+  }
+
+  const source = new EventSource(`${STREAM_URL}?token=${encodeURIComponent(token)}`);
+
+  const parse = (handler) => (event) => {
+    if (!handler) return;
+    try {
+      handler(JSON.parse(event.data));
+    } catch (error) {
+      console.error('Evento de notificaciones invalido:', error);
+    }
+  };
+
+  source.addEventListener('notificacion', parse(onNotificacion));
+  source.addEventListener('contador', parse(onContador));
+
+  return () => source.close();
+};